@@ -0,0 +1,32 @@
+import os, time
+from catmetrics import incr
+
+# --- Asset presence index ---
+# Instead of one stat() per asset object, list each assets/objects/<xx>/ shard
+# once with os.scandir and diff the asset index against the resulting name set.
+
+def scan_shard(shard_dir):
+    try:
+        with os.scandir(shard_dir) as it:
+            return {e.name for e in it if not e.name.endswith((".part", ".tmp"))}
+    except FileNotFoundError:
+        return set()
+
+def find_missing_objects(objects, objects_dir):
+    """objects: (hash, size) pairs. Return ({hash: size} not on disk, per-phase timings in seconds)."""
+    t0 = time.perf_counter()
+    wanted = dict(objects)
+    shards = {}
+    for h in wanted:
+        shards.setdefault(h[:2], []).append(h)
+    t1 = time.perf_counter()
+    present = set()
+    for sub in shards:
+        present |= scan_shard(os.path.join(objects_dir, sub))
+    t2 = time.perf_counter()
+    missing = {h: size for h, size in wanted.items() if h not in present}
+    t3 = time.perf_counter()
+    incr("assets.present", len(wanted) - len(missing)); incr("assets.missing", len(missing))
+    timings = {"index": t1 - t0, "scan": t2 - t1, "diff": t3 - t2, "total": t3 - t0,
+               "objects": len(wanted), "shards": len(shards), "missing": len(missing)}
+    return missing, timings
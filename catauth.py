@@ -0,0 +1,172 @@
+import os, json, time, uuid, threading, http.client
+from cathttp import get_session
+from catmeta import read_json
+from catmetrics import incr
+
+ELYBY_AUTHSERVER = "https://authserver.ely.by/auth"
+AUTH_TIMEOUT = 10
+# A token validated this recently is used without asking the authserver again
+VALIDATE_INTERVAL = 300
+
+class AuthError(Exception):
+    pass
+
+def _post(url, payload, session=None):
+    try:
+        return (session or get_session()).post(url, json=payload, timeout=AUTH_TIMEOUT, retries=0)
+    except (OSError, http.client.HTTPException) as e:
+        raise AuthError(f"Auth failed: {e}")
+
+def _profile(data, username, client_token):
+    profile = data.get("selectedProfile", {})
+    return {"username": profile.get("name", username), "uuid": profile.get("id"),
+            "token": data.get("accessToken"), "client_token": data.get("clientToken", client_token),
+            "type": "elyby"}
+
+def authenticate_elyby(username, password, client_token=None, server=ELYBY_AUTHSERVER, session=None):
+    payload = {"agent": {"name": "Minecraft", "version": 1},
+               "username": username, "password": password, "requestUser": True}
+    if client_token: payload["clientToken"] = client_token
+    resp = _post(f"{server}/authenticate", payload, session)
+    if resp.status != 200: raise AuthError(resp.text)
+    return _profile(resp.json(), username, client_token)
+
+def validate_elyby(access_token, server=ELYBY_AUTHSERVER, session=None):
+    """True if the token is still good, False if the authserver rejected it."""
+    resp = _post(f"{server}/validate", {"accessToken": access_token}, session)
+    if resp.status in (200, 204): return True
+    if resp.status in (401, 403): return False
+    raise AuthError(f"validate: HTTP {resp.status}")
+
+def refresh_elyby(access_token, client_token, server=ELYBY_AUTHSERVER, session=None):
+    """Trade a token for a fresh one; None if it can no longer be refreshed."""
+    resp = _post(f"{server}/refresh", {"accessToken": access_token, "clientToken": client_token,
+                                       "requestUser": True}, session)
+    if resp.status in (401, 403): return None
+    if resp.status != 200: raise AuthError(f"refresh: HTTP {resp.status}")
+    return _profile(resp.json(), None, client_token)
+
+# --- Session store ---
+# Keeps the Ely.by access/client tokens per account in auth.json (mode 0600),
+# so an online launch does not need the password or a blocking round-trip.
+# session() returns the stored session at once and checks it in the
+# background: /validate, then /refresh if needed. A full authenticate only
+# happens once both have rejected the token, with the password if one was
+# given, otherwise on the next launch. Network errors keep the stored token.
+# A refresh invalidates the old token, so revalidation is serialized per
+# account (across SessionStore instances on the same file) and starts from
+# whatever the previous holder saved.
+
+_account_locks = {}
+_account_locks_lock = threading.Lock()
+
+def _account_lock(path, username):
+    key = (os.path.abspath(path), username.lower())
+    with _account_locks_lock:
+        return _account_locks.setdefault(key, threading.Lock())
+
+class SessionStore:
+    def __init__(self, path, server=ELYBY_AUTHSERVER, session=None):
+        self.path, self.server, self.http = path, server, session
+        self._lock = threading.Lock()
+        data = read_json(path, {})
+        self._data = {"client_token": data.get("client_token") or uuid.uuid4().hex,
+                      "last": data.get("last"), "accounts": data.get("accounts", {})}
+
+    def _save(self):
+        # The file holds bearer tokens: never let it exist world-readable, not even as a temp file
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f: json.dump(self._data, f)
+        os.replace(tmp, self.path)
+
+    @property
+    def last_username(self): return self._data["last"]
+
+    def get(self, username):
+        with self._lock:
+            entry = self._data["accounts"].get(username.lower())
+            return dict(entry) if entry else None
+
+    def put(self, username, session):
+        with self._lock:
+            self._data["accounts"][username.lower()] = {**session, "validated": time.time()}
+            self._data["last"] = username
+            self._save()
+
+    def _reload(self, username):
+        # Another SessionStore (or process) may have refreshed the token since we loaded
+        entry = read_json(self.path, {}).get("accounts", {}).get(username.lower())
+        with self._lock:
+            mine = self._data["accounts"].get(username.lower())
+            if entry and (not mine or entry.get("validated", 0) > mine.get("validated", 0)):
+                self._data["accounts"][username.lower()] = entry
+
+    def forget(self, username):
+        with self._lock:
+            if self._data["accounts"].pop(username.lower(), None) is not None: self._save()
+
+    def login(self, username, password):
+        """Full username/password authenticate; stores and returns the session."""
+        session = authenticate_elyby(username, password, self._data["client_token"], self.server, self.http)
+        incr("auth.authenticate")
+        self.put(username, session)
+        return session
+
+    def revalidate(self, username):
+        """Check a stored token: returns the (possibly refreshed) session, or None if it is dead."""
+        with _account_lock(self.path, username):
+            self._reload(username)
+            return self._revalidate(username)
+
+    def _revalidate(self, username):
+        cached = self.get(username)
+        if not cached: return None
+        if time.time() - cached.get("validated", 0) < VALIDATE_INTERVAL: return cached
+        if validate_elyby(cached["token"], self.server, self.http):
+            incr("auth.validated")
+            self.put(username, cached)
+            return cached
+        fresh = refresh_elyby(cached["token"], cached.get("client_token") or self._data["client_token"],
+                              self.server, self.http)
+        if fresh is None:
+            incr("auth.invalidated")
+            self.forget(username)
+            return None
+        incr("auth.refreshed")
+        fresh["username"] = fresh["username"] or cached["username"]
+        fresh["uuid"] = fresh["uuid"] or cached["uuid"]
+        self.put(username, fresh)
+        return fresh
+
+    def session(self, username, password=None, on_refresh=None, on_invalid=None, on_error=None,
+                background=True):
+        """Stored session right away (checked in the background), else a full login."""
+        cached = self.get(username)
+        if cached is None:
+            incr("auth.cache_miss")
+            if not password: raise AuthError(f"No saved Ely.by session for {username}, password required")
+            return self.login(username, password)
+        incr("auth.cache_hit")
+        with self._lock:
+            if self._data["last"] != username:
+                self._data["last"] = username; self._save()
+        def worker():
+            try:
+                fresh = self.revalidate(username)
+            except AuthError as e:
+                if on_error: on_error(e)
+                return
+            if fresh is None and password:
+                try: fresh = self.login(username, password)
+                except AuthError as e:
+                    if on_error: on_error(e)
+                    return
+            if fresh is None:
+                if on_invalid: on_invalid(username)
+            elif fresh["token"] != cached["token"] and on_refresh:
+                on_refresh(fresh)
+        if background: threading.Thread(target=worker, daemon=True).start()
+        else: worker()
+        return cached
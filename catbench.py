@@ -0,0 +1,321 @@
+import os, io, sys, json, time, shutil, hashlib, argparse, tempfile, threading, platform, statistics, subprocess
+from contextlib import redirect_stdout
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from catinstall import VersionInstaller
+from catmeta import ManifestCache
+from catmods import ModInstaller
+from catfabric import FabricMeta
+from catstore import ObjectStore, set_store
+from catmirrors import MirrorRegistry, set_mirrors
+from catmetrics import RunMetrics
+
+BENCH_FORMAT = 1
+BENCH_VERSION = "1.20.1"
+BENCH_SESSION = {"username": "bench", "uuid": "0" * 32, "token": "0", "type": "offline"}
+
+# --- Synthetic endpoints ---
+# Everything the installers talk to, generated deterministically from a seed:
+# the same seed and sizes always produce byte-identical files and hashes, so
+# runs on different commits download exactly the same data.
+
+def _blob(seed, name, size):
+    block = hashlib.sha256(f"{seed}:{name}".encode()).digest()
+    return (block * (size // len(block) + 1))[:size]
+
+def _sha1(data): return hashlib.sha1(data).hexdigest()
+
+class Fixture:
+    def __init__(self, seed=1, assets=2000, asset_size=8192, libraries=40,
+                 library_size=256 * 1024, jar_size=4 * 1024 * 1024, mods=10, mod_size=512 * 1024):
+        self.seed = seed
+        self.config = {"seed": seed, "assets": assets, "asset_size": asset_size,
+                       "libraries": libraries, "library_size": library_size,
+                       "jar_size": jar_size, "mods": mods, "mod_size": mod_size}
+        self.files = {}      # path -> bytes, served as-is
+        self.mods = {}       # slug -> modrinth version document
+        self.by_sha1 = {}    # mod file sha1 -> version document
+        self.base = None
+
+    def _add(self, path, data):
+        self.files[path] = data
+        return {"url": self.base + path, "sha1": _sha1(data), "size": len(data)}
+
+    def build(self, base):
+        c, self.base = self.config, base
+        self.files.clear(); self.mods.clear(); self.by_sha1.clear()
+        objects = {}
+        for i in range(c["assets"]):
+            # Vary sizes a little so shards and index entries are not uniform
+            data = _blob(self.seed, f"asset{i}", c["asset_size"] + i % 97)
+            h = _sha1(data)
+            self.files[f"/resources/{h[:2]}/{h}"] = data
+            # Every fourth object is music, which deferred installs leave for later
+            name = f"minecraft/sounds/music/bench{i}.ogg" if i % 4 == 0 else f"minecraft/bench/{i}.ogg"
+            objects[name] = {"hash": h, "size": len(data)}
+        index = self._add(f"/mojang/indexes/{BENCH_VERSION}.json",
+                          json.dumps({"objects": objects}).encode())
+        libraries = []
+        for i in range(c["libraries"]):
+            path = f"org/bench/lib{i}/1.0/lib{i}-1.0.jar"
+            art = self._add(f"/libraries/{path}", _blob(self.seed, path, c["library_size"]))
+            libraries.append({"name": f"org.bench:lib{i}:1.0", "downloads": {"artifact": {"path": path, **art}}})
+        client = self._add("/mojang/client.jar", _blob(self.seed, "client", c["jar_size"]))
+        version = {"id": BENCH_VERSION, "type": "release", "mainClass": "net.minecraft.client.main.Main",
+                   "minecraftArguments": "--username ${auth_player_name} --version ${version_name} "
+                                         "--gameDir ${game_directory} --assetsDir ${assets_root} "
+                                         "--assetIndex ${assets_index_name} --uuid ${auth_uuid} "
+                                         "--accessToken ${auth_access_token} --userType ${user_type}",
+                   "downloads": {"client": client}, "libraries": libraries,
+                   "assetIndex": {"id": BENCH_VERSION, **index}}
+        vjson = self._add(f"/mojang/v/{BENCH_VERSION}.json", json.dumps(version).encode())
+        manifest = {"latest": {"release": BENCH_VERSION},
+                    "versions": [{"id": BENCH_VERSION, "type": "release", "url": vjson["url"], "sha1": vjson["sha1"]}]}
+        self.files["/mojang/version_manifest_v2.json"] = json.dumps(manifest).encode()
+        self.files["/fabric/versions/game"] = json.dumps(
+            [{"version": BENCH_VERSION, "stable": True}, {"version": "1.19.4", "stable": True}]).encode()
+        for i in range(c["mods"]):
+            slug = f"benchmod{i}"
+            f = self._add(f"/files/{slug}-1.0.jar", _blob(self.seed, slug, c["mod_size"]))
+            # benchmod0 plays Fabric API: every other mod requires it
+            doc = {"id": f"v{i:06d}", "project_id": f"P{i:07d}", "version_number": "1.0",
+                   "game_versions": [BENCH_VERSION], "loaders": ["fabric"],
+                   "dependencies": [{"project_id": "P0000000", "dependency_type": "required"}] if i else [],
+                   "files": [{"url": f["url"], "filename": f"{slug}-1.0.jar", "primary": True,
+                              "size": f["size"], "hashes": {"sha1": f["sha1"]}}]}
+            self.mods[slug] = doc
+            self.by_sha1[f["sha1"]] = doc
+        return self
+
+    def modrinth(self, method, path, query, body):
+        if method == "GET" and path == "/projects":
+            ids = json.loads(query.get("ids", ["[]"])[0])
+            return [{"id": d["project_id"], "slug": s} for s, d in self.mods.items()
+                    if s in ids or d["project_id"] in ids]
+        if method == "GET" and path.startswith("/project/") and path.endswith("/version"):
+            pid = path.split("/")[2]
+            return [d for d in self.mods.values() if pid == d["project_id"]]
+        if method == "GET" and path.startswith("/version/"):
+            return next((d for d in self.mods.values() if d["id"] == path.split("/")[2]), None)
+        if method == "POST" and path in ("/version_files", "/version_files/update"):
+            return {h: self.by_sha1[h] for h in body.get("hashes", []) if h in self.by_sha1}
+        return None
+
+# --- Shaped HTTP server ---
+# `latency` is added before every response, `bandwidth` (bytes/s, 0 = off)
+# caps each response body. Range requests are honoured like the real CDNs.
+
+class BenchServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, fixture, latency=0.0, bandwidth=0, host="127.0.0.1", port=0):
+        super().__init__((host, port), BenchHandler)
+        self.fixture, self.latency, self.bandwidth = fixture, latency, bandwidth
+        self.requests = 0
+        self._lock = threading.Lock()
+        fixture.build(f"http://{host}:{self.server_address[1]}")
+
+    @property
+    def base(self): return self.fixture.base
+
+    def count(self):
+        with self._lock: self.requests += 1
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown(); self.server_close()
+
+class BenchHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, every
+    # keep-alive response would wait on the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args): pass
+
+    def _send(self, status, body, ctype="application/octet-stream", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items(): self.send_header(k, v)
+        self.end_headers()
+        if self.command == "HEAD": return
+        rate = self.server.bandwidth
+        if not rate:
+            self.wfile.write(body); return
+        step = max(1024, rate // 50)
+        for i in range(0, len(body), step):
+            self.wfile.write(body[i:i + step])
+            time.sleep(len(body[i:i + step]) / rate)
+
+    def _json(self, data):
+        self._send(200, json.dumps(data).encode(), "application/json")
+
+    def _handle(self, body=None):
+        self.server.count()
+        if self.server.latency: time.sleep(self.server.latency)
+        fx, url = self.server.fixture, urlsplit(self.path)
+        if url.path.startswith("/modrinth/"):
+            try: body = json.loads(body) if body else {}
+            except ValueError: return self._send(400, b"bad json")
+            data = fx.modrinth(self.command, url.path[len("/modrinth"):], parse_qs(url.query), body)
+            return self._json(data) if data is not None else self._send(404, b"not found")
+        data = fx.files.get(url.path)
+        if data is None: return self._send(404, b"not found")
+        etag = f'"{_sha1(data)}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, b"", headers={"ETag": etag})
+        rng = self.headers.get("Range", "")
+        if rng.startswith("bytes=") and rng.endswith("-"):
+            start = int(rng[6:-1])
+            if start >= len(data):
+                return self._send(416, b"", headers={"Content-Range": f"bytes */{len(data)}"})
+            return self._send(206, data[start:], headers={
+                "Content-Range": f"bytes {start}-{len(data) - 1}/{len(data)}", "ETag": etag})
+        self._send(200, data, headers={"ETag": etag})
+
+    def do_GET(self): self._handle()
+    def do_HEAD(self): self._handle()
+
+    def do_POST(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        self._handle(self.rfile.read(n))
+
+# --- Scenarios ---
+# One repeat = one fresh base dir and object store, then every scenario in
+# order; later scenarios deliberately run against the state the earlier ones
+# left behind (warm tree, warm plan cache, mods already on disk).
+
+def _run_once(server, work, workers, per_host):
+    base = server.base
+    mc_dir, cache_dir = os.path.join(work, "minecraft"), os.path.join(work, "cache")
+    set_store(ObjectStore(os.path.join(work, "store")))
+    metrics = RunMetrics("bench", "run", BENCH_VERSION)
+    # The library mod comes in as a dependency
+    slugs = list(server.fixture.mods)[1:]
+
+    def installer(tree=mc_dir, defer=False):
+        inst = VersionInstaller(tree, cache_dir, base + "/resources/", workers, per_host,
+                                launcher="bench", defer_assets=defer)
+        inst.set_manifest(ManifestCache(cache_dir, base + "/mojang/version_manifest_v2.json").get(background=False))
+        return inst
+
+    def mods():
+        return ModInstaller(os.path.join(mc_dir, "mods"), BENCH_VERSION,
+                            workers=workers, api=base + "/modrinth",
+                            cache_dir=os.path.join(cache_dir, "modrinth")).install(slugs)
+
+    with metrics.phase("cold_install"):
+        inst = installer()
+        inst.ensure_version(BENCH_VERSION, progress=None)
+    with metrics.phase("warm_verify"):
+        installer().ensure_version(BENCH_VERSION, progress=None, verify=True)
+    inst.launch_plans.invalidate(BENCH_VERSION)
+    with metrics.phase("launch_plan_cold"):
+        installer().build_launch_command(BENCH_VERSION, BENCH_SESSION)
+    with metrics.phase("launch_plan_warm"):
+        installer().build_launch_command(BENCH_VERSION, BENCH_SESSION)
+    with metrics.phase("store_install"):
+        installer(os.path.join(work, "minecraft2")).ensure_version(BENCH_VERSION, progress=None)
+    set_store(None)
+    with metrics.phase("first_launch_deferred"):
+        inst = installer(os.path.join(work, "minecraft3"), defer=True)
+        inst.ensure_version(BENCH_VERSION, progress=None)
+    with metrics.phase("deferred_fetch"):
+        inst.fetch_deferred(BENCH_VERSION, rate=None)
+    set_store(ObjectStore(os.path.join(work, "store")))
+    with metrics.phase("fabric_meta"):
+        FabricMeta(cache_dir, api=base + "/fabric").is_supported(BENCH_VERSION)
+    with metrics.phase("mods_cold"):
+        mods()
+    with metrics.phase("mods_warm"):
+        mods()
+    set_store(None)
+    return metrics.phases
+
+def _git_head():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run_bench(fixture, repeat=3, latency=0.0, bandwidth=0, workers=16, per_host=8, keep=None):
+    server = BenchServer(fixture, latency, bandwidth).start()
+    set_mirrors(MirrorRegistry())      # built-in defaults only, never the user's mirrors.json
+    runs = []
+    try:
+        for i in range(repeat):
+            work = tempfile.mkdtemp(prefix="catbench-", dir=keep)
+            try:
+                with redirect_stdout(io.StringIO()):
+                    runs.append(_run_once(server, work, workers, per_host))
+            finally:
+                if keep is None: shutil.rmtree(work, ignore_errors=True)
+    finally:
+        server.stop()
+    scenarios = {}
+    for phases in runs:
+        for p in phases:
+            s = scenarios.setdefault(p["phase"], {"seconds": [], "bytes": p["bytes"], "counters": {}})
+            s["seconds"].append(p["seconds"])
+            s["counters"] = p.get("counters", {})
+    for s in scenarios.values():
+        s["median"] = round(statistics.median(s["seconds"]), 4)
+        s["min"] = min(s["seconds"])
+    return {"format": BENCH_FORMAT, "commit": _git_head(), "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(), "platform": sys.platform,
+            "config": {**fixture.config, "repeat": repeat, "latency": latency, "bandwidth": bandwidth,
+                       "workers": workers, "per_host": per_host},
+            "requests": server.requests, "scenarios": scenarios}
+
+def compare(old, new):
+    """Median of each scenario in `new` relative to `old` (<1.0 is faster)."""
+    rows = []
+    if old.get("config") != new.get("config"):
+        rows.append("warning: configs differ, numbers are not directly comparable")
+    for name, s in new["scenarios"].items():
+        prev = old.get("scenarios", {}).get(name)
+        if not prev:
+            rows.append(f"{name:18} {s['median']:9.4f}s      (new)"); continue
+        ratio = s["median"] / prev["median"] if prev["median"] else float("inf")
+        rows.append(f"{name:18} {prev['median']:9.4f}s -> {s['median']:9.4f}s  x{ratio:.2f}")
+    return "\n".join(rows)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Offline installer benchmark against a local stand-in server")
+    ap.add_argument("--assets", type=int, default=2000)
+    ap.add_argument("--asset-size", type=int, default=8192)
+    ap.add_argument("--libraries", type=int, default=40)
+    ap.add_argument("--library-size", type=int, default=256 * 1024)
+    ap.add_argument("--jar-size", type=int, default=4 * 1024 * 1024)
+    ap.add_argument("--mods", type=int, default=10)
+    ap.add_argument("--mod-size", type=int, default=512 * 1024)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    ap.add_argument("--bandwidth", type=int, default=0, help="bytes/s per response, 0 = unlimited")
+    ap.add_argument("--workers", type=int, default=16)
+    ap.add_argument("--per-host", type=int, default=8)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--keep", help="keep work dirs under this directory")
+    ap.add_argument("--out", help="write the JSON report here instead of stdout")
+    ap.add_argument("--compare", help="previous JSON report to compare against")
+    a = ap.parse_args(argv)
+    fixture = Fixture(a.seed, a.assets, a.asset_size, a.libraries, a.library_size,
+                      a.jar_size, a.mods, a.mod_size)
+    result = run_bench(fixture, a.repeat, a.latency, a.bandwidth, a.workers, a.per_host, a.keep)
+    text = json.dumps(result, indent=2)
+    if a.out:
+        with open(a.out, "w") as f: f.write(text)
+    else:
+        print(text)
+    if a.compare:
+        with open(a.compare) as f: print(compare(json.load(f), result), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
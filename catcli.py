@@ -0,0 +1,351 @@
+import os, sys, json, time, argparse, threading
+
+# Only the standard library is imported up front: --help and `list` must not
+# pay for http.client/ssl, tkinter or minecraft_launcher_lib. Each command
+# imports what it needs.
+
+EXIT_OK, EXIT_FAILED, EXIT_USAGE, EXIT_CANCELLED = 0, 1, 2, 130
+
+def _base_dir(args):
+    if args.base_dir: return args.base_dir
+    from catstore import default_base_dir
+    return default_base_dir()
+
+def _paths(args):
+    # Same layout as client.py, so the GUI and the CLI share one tree
+    base = _base_dir(args)
+    return {"cache": os.path.join(base, "cache"), "metrics": os.path.join(base, "metrics"),
+            "minecraft": os.path.join(base, "minecraft"), "runtimes": os.path.join(base, "runtimes")}
+
+def _use_base_dir(base):
+    # The shared store, mirror registry and metadata cache default to
+    # ~/.catclient; rebind them so --base-dir leaves the home directory alone
+    from catstore import ObjectStore, set_store
+    from catmirrors import load_mirrors, set_mirrors
+    from catindex import MetaCache, set_meta_cache
+    set_store(ObjectStore(os.path.join(base, "store")))
+    set_mirrors(load_mirrors(base))
+    set_meta_cache(MetaCache(os.path.join(base, "cache", "meta")))
+
+def _runtimes(args, paths):
+    if args.system_java: return None
+    from catjava import RuntimeManager
+    return RuntimeManager(paths["runtimes"], paths["cache"])
+
+def _emit(args, result, text):
+    if args.json: print(json.dumps(result, indent=2), file=args.stdout)
+    elif text: print(text, file=args.stdout)
+
+def _stderr_progress(label):
+    def progress(done, total, bytes_done, bytes_total):
+        print(f"[{label}] {done}/{total} files, {bytes_done // 1048576}/{bytes_total // 1048576} MiB",
+              file=sys.stderr)
+    return progress
+
+def _targets(specs, default_dir):
+    """VERSION or VERSION@DIR -> [(version, minecraft dir)]."""
+    out = []
+    for spec in specs:
+        version, _, path = spec.partition("@")
+        out.append((version, os.path.abspath(path) if path else default_dir))
+    return out
+
+def _manifest(args, paths):
+    from catmeta import ManifestCache
+    if args.offline:
+        manifest = ManifestCache(paths["cache"]).load()
+        if manifest is None: raise RuntimeError("no cached version manifest (run once without --offline)")
+        return manifest
+    from catmirrors import get_mirrors
+    return ManifestCache(paths["cache"], session=get_mirrors()).get(background=False)
+
+# --- list ---
+
+def cmd_list(args):
+    paths = _paths(args)
+    if args.installed:
+        root = os.path.join(paths["minecraft"], "versions")
+        try: names = sorted(os.listdir(root))
+        except OSError: names = []
+        versions = [{"id": n} for n in names if os.path.exists(os.path.join(root, n, f"{n}.json"))]
+    else:
+        from catmeta import ManifestCache
+        cache = ManifestCache(paths["cache"])
+        manifest = cache.load() if not args.refresh else None
+        if manifest is None: manifest = _manifest(args, paths)
+        versions = [{"id": v["id"], "type": v["type"]} for v in manifest["versions"]
+                    if not args.type or v["type"] == args.type]
+    _emit(args, {"versions": versions}, "\n".join(v["id"] for v in versions))
+    return EXIT_OK
+
+# --- install / verify ---
+
+def _install_one(args, paths, manifest, version, mc_dir, cancel, workers):
+    from catmetrics import RunMetrics
+    metrics = RunMetrics("cli", "verify" if args.verify else "install", version)
+    result = {"version": version, "dir": mc_dir, "ok": False}
+    t0 = time.perf_counter()
+    try:
+        if args.mll or args.fabric:
+            _install_mll(args, manifest, version, mc_dir, metrics)
+        else:
+            from catinstall import VersionInstaller
+            inst = VersionInstaller(mc_dir, paths["cache"], workers=workers, launcher="cli",
+                                    runtimes=_runtimes(args, paths))
+            inst.set_manifest(manifest)
+            progress = None if args.quiet else _stderr_progress(version)
+            status = None if args.quiet else lambda text: print(f"[{version}] {text}", file=sys.stderr)
+            if not inst.ensure_version(version, progress, args.verify, cancel, metrics, status):
+                raise RuntimeError(f"unknown version {version}")
+        if args.mods:
+            from catmods import ModInstaller
+            with metrics.phase("mods"):
+                result["mods"] = ModInstaller(os.path.join(mc_dir, "mods"), version, status=lambda t: None,
+                                              cache_dir=os.path.join(paths["cache"], "modrinth")
+                                              ).install(args.mods.split(","))
+            if result["mods"]["conflicts"]:
+                raise RuntimeError("mod conflicts: " + "; ".join(result["mods"]["conflicts"]))
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        result["seconds"] = round(time.perf_counter() - t0, 3)
+        result["bytes"] = metrics.report()["bytes"]
+        try: metrics.write(paths["metrics"])
+        except OSError: pass
+    return result
+
+def _install_mll(args, manifest, version, mc_dir, metrics):
+    # The path catclienthdrv0/deepcraft4k take: seed from the store, let mll
+    # install, adopt what it fetched, then Fabric on top
+    import minecraft_launcher_lib as mll
+    from catdl import seed_version, adopt_version
+    entry = next((v for v in manifest["versions"] if v["id"] == version), None)
+    if entry is None: raise RuntimeError(f"unknown version {version}")
+    with metrics.phase("store_seed"):
+        seed_version(mc_dir, version, entry["url"], entry.get("sha1"))
+    with metrics.phase("minecraft"):
+        mll.install.install_minecraft_version(version, mc_dir)
+    with metrics.phase("store_adopt"):
+        adopt_version(mc_dir, version)
+    if args.fabric:
+        with metrics.phase("fabric"):
+            mll.fabric.install_fabric(version, mc_dir)
+
+def cmd_install(args):
+    from concurrent.futures import ThreadPoolExecutor
+    paths = _paths(args)
+    manifest = _manifest(args, paths)
+    targets = _targets(args.versions, paths["minecraft"])
+    jobs = max(1, min(args.jobs, len(targets)))
+    # Split the download pool so N parallel installs don't open N times the connections
+    workers = max(4, args.workers // jobs)
+    cancel = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=jobs)
+    futures = [pool.submit(_install_one, args, paths, manifest, v, d, cancel, workers) for v, d in targets]
+    try:
+        results = [f.result() for f in futures]
+    except KeyboardInterrupt:
+        cancel.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+        return EXIT_CANCELLED
+    pool.shutdown()
+    ok = all(r["ok"] for r in results)
+    text = "\n".join(f"{'ok  ' if r['ok'] else 'FAIL'} {r['version']:24} {r['seconds']:8.2f}s "
+                     f"{r['bytes'] / 1048576:8.1f} MiB  {r.get('error', '')}".rstrip() for r in results)
+    _emit(args, {"ok": ok, "results": results}, text)
+    return EXIT_OK if ok else EXIT_FAILED
+
+# --- launch ---
+
+def _auth(args):
+    if not args.elyby:
+        import uuid
+        name = args.username
+        return {"username": name, "uuid": str(uuid.uuid3(uuid.NAMESPACE_DNS, name)),
+                "token": "cat_offline", "type": "offline"}
+    from catauth import SessionStore
+    store = SessionStore(os.path.join(_base_dir(args), "auth.json"))
+    return store.session(args.elyby, os.environ.get("CATCLIENT_PASSWORD"))
+
+def cmd_launch(args):
+    import subprocess
+    from catjvm import JvmTuner, count_mods
+    paths = _paths(args)
+    mc_dir = os.path.abspath(args.dir) if args.dir else paths["minecraft"]
+    jvm = JvmTuner(paths["cache"])
+    session = _auth(args)
+    if args.mll:
+        import minecraft_launcher_lib as mll
+        options = {"username": session["username"], "uuid": session["uuid"], "token": session["token"]}
+        java, options["jvmArguments"] = jvm.jvm_args(args.version, mods=count_mods(os.path.join(mc_dir, "mods")))
+        if java: options["executablePath"] = java
+        command = mll.command.get_minecraft_command(args.version, mc_dir, options)
+    else:
+        from catinstall import VersionInstaller
+        inst = VersionInstaller(mc_dir, paths["cache"], launcher="cli", runtimes=_runtimes(args, paths))
+        inst.set_manifest(_manifest(args, paths))
+        command = inst.build_launch_command(args.version, session, jvm=jvm)
+    if not command:
+        _emit(args, {"ok": False, "error": f"no launch command for {args.version}"},
+              f"No launch command for {args.version}")
+        return EXIT_FAILED
+    if args.print:
+        _emit(args, {"ok": True, "command": command}, subprocess.list2cmdline(command))
+        return EXIT_OK
+    process = subprocess.Popen(command, cwd=mc_dir)
+    if not args.wait:
+        _emit(args, {"ok": True, "pid": process.pid}, f"Started {args.version} (pid {process.pid})")
+        return EXIT_OK
+    code = process.wait()
+    _emit(args, {"ok": code == 0, "exit_code": code}, f"{args.version} exited with {code}")
+    return EXIT_OK if code == 0 else EXIT_FAILED
+
+# --- swarm ---
+
+def cmd_swarm(args):
+    from catinstall import VersionInstaller
+    from catjvm import JvmTuner
+    from catsuper import Supervisor
+    paths = _paths(args)
+    mc_dir = os.path.abspath(args.dir) if args.dir else paths["minecraft"]
+    inst = VersionInstaller(mc_dir, paths["cache"], launcher="cli", runtimes=_runtimes(args, paths))
+    inst.set_manifest(_manifest(args, paths))
+    sup = Supervisor(inst, JvmTuner(paths["cache"]), prefix=args.prefix, stagger=args.stagger,
+                     heap_mb=args.heap, game_args=args.game_arg, interval=args.interval)
+    def report(final=False):
+        stats = sup.stats()
+        if args.json:
+            print(json.dumps(stats if final else {k: v for k, v in stats.items() if k != "clients"}),
+                  file=args.stdout, flush=True)
+            return
+        cap = stats["capacity"] or {}
+        print(f"{stats['running']}/{stats['instances']} running, {stats['failed']} failed, "
+              f"CPU {stats['cpu_percent']}%, RSS {stats['rss_mb']} MiB, "
+              f"capacity ~{cap.get('clients', '?')} clients", file=args.stdout, flush=True)
+        if final:
+            for c in stats["clients"]:
+                print(f"  {c['username']:16} exit {c['exit_code']!s:5} peak {c['peak_rss_mb']:6} MiB "
+                      f"{c['cpu_seconds']:8.1f} CPU s  {c['crash'] or ''}".rstrip(), file=args.stdout)
+    deadline = time.monotonic() + args.duration if args.duration else None
+    try:
+        sup.launch(args.version, args.count)
+        while not sup.wait(timeout=args.interval):
+            report()
+            if deadline and time.monotonic() >= deadline: break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sup.stop()
+    report(final=True)
+    return EXIT_OK if not sup.stats()["failed"] else EXIT_FAILED
+
+# --- pass-through tools ---
+
+def cmd_tool(args):
+    if args.cmd == "gc":
+        import catgc as tool
+    elif args.cmd == "snapshot":
+        import catsnap as tool
+    elif args.cmd == "trace":
+        import cattrace as tool
+        if args.base_dir and not any(a.startswith("--history") for a in args.rest):
+            args.rest = ["--history", os.path.join(_base_dir(args), "metrics", tool.HISTORY_NAME)] + args.rest
+    else:
+        import catbench as tool
+    return tool.main(args.rest)
+
+def _global_options(parser, default=None):
+    parser.add_argument("--base-dir", default=default, help="CatClient data directory (default: ~/.catclient)")
+    parser.add_argument("--json", action="store_true", default=default or False,
+                        help="machine-readable output on stdout")
+    parser.add_argument("--offline", action="store_true", default=default or False,
+                        help="use the cached manifest, no metadata requests")
+    parser.add_argument("-q", "--quiet", action="store_true", default=default or False, help="no progress output")
+    parser.add_argument("--system-java", action="store_true", default=default or False,
+                        help="launch with the java on PATH instead of a managed Mojang runtime")
+    return parser
+
+def build_parser():
+    ap = _global_options(argparse.ArgumentParser(prog="catcli",
+                                                 description="Headless CatClient: install, verify and launch"))
+    # The same options after the command name; SUPPRESS keeps a subcommand from
+    # resetting what was given before it
+    common = _global_options(argparse.ArgumentParser(add_help=False), argparse.SUPPRESS)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("list", parents=[common], help="list available or installed versions")
+    p.add_argument("--installed", action="store_true")
+    p.add_argument("--type", choices=["release", "snapshot", "old_beta", "old_alpha"])
+    p.add_argument("--refresh", action="store_true", help="revalidate the manifest first")
+    p.set_defaults(func=cmd_list)
+
+    for name, verify in (("install", False), ("verify", True)):
+        p = sub.add_parser(name, parents=[common],
+                           help=("re-hash and repair" if verify else "install") + " versions in parallel")
+        p.add_argument("versions", nargs="+", metavar="VERSION[@DIR]",
+                       help="version id, optionally into its own instance directory")
+        p.add_argument("-j", "--jobs", type=int, default=4, help="versions provisioned at once")
+        p.add_argument("--workers", type=int, default=16, help="download threads shared by all jobs")
+        p.add_argument("--mll", action="store_true", help="install through minecraft_launcher_lib")
+        p.add_argument("--fabric", action="store_true", help="also install Fabric (implies --mll)")
+        p.add_argument("--mods", help="comma-separated Modrinth slugs to install")
+        p.set_defaults(func=cmd_install, verify=verify)
+
+    p = sub.add_parser("launch", parents=[common], help="launch an installed version")
+    p.add_argument("version")
+    p.add_argument("--dir", help="instance directory (default: the client's tree)")
+    p.add_argument("--username", default="CatPlayer", help="offline username")
+    p.add_argument("--elyby", metavar="USER", help="use the saved Ely.by session (password from CATCLIENT_PASSWORD)")
+    p.add_argument("--mll", action="store_true", help="build the command with minecraft_launcher_lib")
+    p.add_argument("--print", action="store_true", help="print the command instead of running it")
+    p.add_argument("--wait", action="store_true", help="wait and exit with the game's status")
+    p.set_defaults(func=cmd_launch)
+
+    p = sub.add_parser("swarm", parents=[common], help="run many clients of one version for load testing")
+    p.add_argument("version")
+    p.add_argument("-n", "--count", type=int, default=4, help="clients to start")
+    p.add_argument("--dir", help="shared game tree (default: the client's tree)")
+    p.add_argument("--prefix", default="CatBot", help="offline username prefix")
+    p.add_argument("--stagger", type=float, default=5.0, help="seconds between starts")
+    p.add_argument("--heap", type=int, metavar="MB", help="heap per client (default: the JVM profile's)")
+    p.add_argument("--game-arg", action="append", default=[], help="extra game argument (repeatable)")
+    p.add_argument("--interval", type=float, default=5.0, help="seconds between stats reports")
+    p.add_argument("--duration", type=float, help="stop every client after this many seconds")
+    p.set_defaults(func=cmd_swarm)
+
+    for name, text in (("gc", "garbage-collect unreferenced files (catgc)"),
+                       ("snapshot", "export/import instance snapshots (catsnap)"),
+                       ("bench", "offline installer benchmark (catbench)"),
+                       ("trace", "launch stage p50/p95 from the launch history (cattrace)")):
+        p = sub.add_parser(name, help=text, add_help=False)
+        p.add_argument("rest", nargs=argparse.REMAINDER)
+        p.set_defaults(func=cmd_tool)
+    return ap
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    # argparse won't start a REMAINDER with an option; the pass-through tools take them all
+    if extra:
+        if args.func is not cmd_tool: parser.error(f"unrecognized arguments: {' '.join(extra)}")
+        args.rest = extra + args.rest
+    args.stdout = sys.stdout
+    if args.base_dir: _use_base_dir(os.path.abspath(args.base_dir))
+    if args.cmd in ("install", "verify") and args.fabric: args.mll = True
+    # download_file and mll report on stdout; keep it clean for --json
+    if args.quiet: sys.stdout = open(os.devnull, "w")
+    elif args.json: sys.stdout = sys.stderr
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        return EXIT_CANCELLED
+    except Exception as e:
+        if args.json: _emit(args, {"ok": False, "error": f"{type(e).__name__}: {e}"}, None)
+        else: print(f"error: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    finally:
+        sys.stdout = args.stdout
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,10 +5,18 @@ import subprocess
 import os
 import json
 import uuid
-import threading
-import requests
 import re
 from pathlib import Path
+from catmeta import ManifestCache
+from catmirrors import get_mirrors
+from catmods import ModInstaller
+from catfabric import FabricMeta
+from cattasks import TaskRunner
+from catlog import LogPump
+from catdl import seed_version, adopt_version
+from catmetrics import RunMetrics
+from cattrace import LaunchTrace
+from catjvm import JvmTuner, count_mods
 
 class CatClient21:
     def __init__(self, root):
@@ -31,6 +39,10 @@ class CatClient21:
         
         # Custom Minecraft directory (like MeowClient)
         self.minecraft_dir = os.path.join(str(Path.home()), ".meowcraft")
+        self.manifest_cache = ManifestCache(os.path.join(self.minecraft_dir, "cache"),
+                                           session=get_mirrors())
+        self.fabric_meta = FabricMeta(os.path.join(self.minecraft_dir, "cache"))
+        self.jvm = JvmTuner(os.path.join(self.minecraft_dir, "cache"))
         
         # Setup variables
         self.versions = []
@@ -38,6 +50,8 @@ class CatClient21:
         self.selected_install_version = tk.StringVar()
         self.username = tk.StringVar(value="Player")
         self.setup_done = False
+        self.log_pump = None
+        self.tasks = TaskRunner(self.root)
         
         self.setup_ui()
         self.load_available_mc_versions()
@@ -117,22 +131,20 @@ class CatClient21:
         self.status_label.config(text="Versions refreshed")
     
     def load_available_mc_versions(self):
-        try:
-            version_list = mll.utils.get_version_list()
-            releases = []
-            for v in version_list:
-                if v['type'] in ['release', 'snapshot']:
-                    try:
-                        if mll.fabric.is_minecraft_version_supported(v['id']):
-                            releases.append(v['id'])
-                    except:
-                        continue
-            self.install_version_combo['values'] = releases
-            if releases:
-                latest_release = next((v for v in releases if re.match(r'^\d+\.\d+(\.\d+)?$', v)), releases[0])
-                self.selected_install_version.set(latest_release)
-        except Exception as e:
-            self.status_label.config(text=f"Error loading available versions: {str(e)}")
+        self.tasks.submit(self._load_available_mc_versions_thread,
+                          on_done=self._set_available_mc_versions,
+                          on_error=lambda e: self.status_label.config(text=f"Error loading available versions: {str(e)}"))
+    
+    def _load_available_mc_versions_thread(self, task):
+        version_list = self.manifest_cache.get()["versions"]
+        return self.fabric_meta.supported(
+            [v['id'] for v in version_list if v['type'] in ['release', 'snapshot']])
+    
+    def _set_available_mc_versions(self, releases):
+        self.install_version_combo['values'] = releases
+        if releases and not self.selected_install_version.get():
+            latest_release = next((v for v in releases if re.match(r'^\d+\.\d+(\.\d+)?$', v)), releases[0])
+            self.selected_install_version.set(latest_release)
     
     def check_setup(self):
         if os.path.exists(self.minecraft_dir):
@@ -164,113 +176,162 @@ class CatClient21:
             self.status_label.config(text=f"Error loading versions: {str(e)}")
     
     # ----------------- Setup -----------------
+    def set_status(self, text):
+        self.status_label.config(text=text)
+    
     def setup_minecraft(self):
-        threading.Thread(target=self._setup_minecraft_thread, daemon=True).start()
+        mc_version = self.selected_install_version.get()
+        self.setup_btn.config(state=tk.DISABLED)
+        self.progress.start()
+        self.status_label.config(text="Setting up CatClient...")
+        self.tasks.submit(self._setup_minecraft_thread, mc_version,
+                          on_done=self._setup_done, on_error=self._setup_failed,
+                          on_status=self.set_status, on_progress=self.set_progress,
+                          on_finish=self._setup_finished)
     
-    def _setup_minecraft_thread(self):
+    def set_progress(self, value, maximum):
+        if str(self.progress['mode']) != 'determinate':
+            self.progress.stop()
+            self.progress.config(mode='determinate')
+        self.progress.config(maximum=max(maximum, 1), value=value)
+    
+    def get_metrics_dir(self):
+        return os.path.join(self.minecraft_dir, "metrics")
+    
+    def _setup_minecraft_thread(self, task, mc_version):
+        metrics = RunMetrics("catclient21", "setup", mc_version)
         try:
-            self.setup_btn.config(state=tk.DISABLED)
-            self.progress.start()
-            self.status_label.config(text="Setting up CatClient...")
-            
-            if not os.path.exists(self.minecraft_dir):
-                os.makedirs(self.minecraft_dir)
-            
-            mc_version = self.selected_install_version.get()
-            if not mc_version:
-                raise Exception("No version selected for installation")
-            
-            if not mll.fabric.is_minecraft_version_supported(mc_version):
+            return self._setup_minecraft(task, mc_version, metrics)
+        finally:
+            metrics.write(self.get_metrics_dir())
+    
+    def _setup_minecraft(self, task, mc_version, metrics):
+        if not os.path.exists(self.minecraft_dir):
+            os.makedirs(self.minecraft_dir)
+        
+        if not mc_version:
+            raise Exception("No version selected for installation")
+        
+        with metrics.phase("fabric_meta"):
+            if not self.fabric_meta.is_supported(mc_version):
                 raise Exception(f"Fabric not supported for {mc_version}")
-            
-            self.status_label.config(text=f"Installing Minecraft {mc_version}...")
-            callback = {"setStatus": lambda text: self.status_label.config(text=text),
-                        "setProgress": lambda p: None, "setMax": lambda m: None}
+        
+        task.status(f"Installing Minecraft {mc_version}...")
+        with metrics.phase("manifest"):
+            entry = next((v for v in self.manifest_cache.get()["versions"] if v["id"] == mc_version), None)
+        with metrics.phase("store_seed"):
+            if entry:
+                seed_version(self.minecraft_dir, mc_version, entry["url"], entry.get("sha1"))
+        # mll reports file counts through setMax/setProgress; drive the bar with them
+        steps = {"max": 0}
+        callback = {"setStatus": task.status,
+                    "setProgress": lambda p: task.progress(p, steps["max"]),
+                    "setMax": lambda m: steps.update(max=m)}
+        with metrics.phase("minecraft"):
             mll.install.install_minecraft_version(mc_version, self.minecraft_dir, callback=callback)
-            
-            self.status_label.config(text=f"Installing Fabric for {mc_version}...")
+        with metrics.phase("store_adopt"):
+            adopt_version(self.minecraft_dir, mc_version)
+        task.check()
+        
+        task.status(f"Installing Fabric for {mc_version}...")
+        with metrics.phase("fabric"):
             mll.fabric.install_fabric(mc_version, self.minecraft_dir, callback=callback)
-            
-            mods_dir = os.path.join(self.minecraft_dir, 'mods')
-            if not os.path.exists(mods_dir):
-                os.makedirs(mods_dir)
-            
-            essential_mods = ['sodium','lithium','phosphor','iris','modmenu']
-            for slug in essential_mods:
-                self.download_mod_from_modrinth(slug, mc_version)
-            
-            self.load_versions()
-            if self.versions:
-                installed = self.versions[0]['id']
-                self.selected_version.set(installed)
-                self.save_config({"launch_version": installed})
-                self.status_label.config(text=f"Setup complete! Default set to {installed}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Setup failed: {str(e)}")
-            self.status_label.config(text=f"Setup failed: {str(e)}")
-        finally:
-            self.progress.stop()
-            self.setup_btn.config(state=tk.NORMAL)
+        task.check()
+        
+        mods_dir = os.path.join(self.minecraft_dir, 'mods')
+        essential_mods = ['sodium','lithium','phosphor','iris','modmenu']
+        with metrics.phase("mods"):
+            return self.install_mods(task, mods_dir, essential_mods, mc_version)
+    
+    def _setup_done(self, mods_result):
+        self.load_versions()
+        if self.versions:
+            installed = self.versions[0]['id']
+            self.selected_version.set(installed)
+            self.save_config({"launch_version": installed})
+            self.status_label.config(text=f"Setup complete! Default set to {installed}")
+        if mods_result and mods_result["conflicts"]:
+            conflicts = "; ".join(mods_result["conflicts"])
+            self.status_label.config(text=f"{self.status_label.cget('text')} (mods not installed: {conflicts})")
+        elif mods_result and mods_result["missing"] + mods_result["failed"]:
+            skipped = ", ".join(mods_result["missing"] + mods_result["failed"])
+            self.status_label.config(text=f"{self.status_label.cget('text')} (skipped mods: {skipped})")
+    
+    def _setup_failed(self, e):
+        messagebox.showerror("Error", f"Setup failed: {str(e)}")
+        self.status_label.config(text=f"Setup failed: {str(e)}")
+    
+    def _setup_finished(self):
+        self.progress.stop()
+        self.progress.config(mode='indeterminate', value=0)
+        self.setup_btn.config(state=tk.NORMAL)
     
-    def download_mod_from_modrinth(self, slug, mc_version, loader='fabric'):
+    def install_mods(self, task, mods_dir, slugs, mc_version, loader='fabric'):
         try:
-            api_url = f"https://api.modrinth.com/v2/project/{slug}/version?game_versions=[\"{mc_version}\"]&loaders=[\"{loader}\"]"
-            resp = requests.get(api_url)
-            resp.raise_for_status()
-            versions = resp.json()
-            if versions:
-                version_data = versions[0]
-                file_url = version_data['files'][0]['url']
-                filename = version_data['files'][0]['filename']
-                mod_path = os.path.join(self.minecraft_dir, 'mods', filename)
-                self.status_label.config(text=f"Downloading {slug}...")
-                mod_data = requests.get(file_url).content
-                with open(mod_path, 'wb') as f:
-                    f.write(mod_data)
+            installer = ModInstaller(mods_dir, mc_version, loader, status=task.status,
+                                     cache_dir=os.path.join(self.minecraft_dir, "cache", "modrinth"))
+            return installer.install(slugs)
         except Exception as e:
-            self.status_label.config(text=f"Failed to download {slug}: {str(e)}, skipping...")
+            task.status(f"Failed to install mods: {str(e)}, skipping...")
     
     # ----------------- Launch -----------------
     def launch_minecraft(self):
         if not self.setup_done:
             messagebox.showerror("Error", "Please setup CatClient first")
             return
-        threading.Thread(target=self._launch_minecraft_thread, daemon=True).start()
+        version = self.selected_version.get()
+        self.launch_btn.config(state=tk.DISABLED)
+        self.progress.start()
+        self.status_label.config(text=f"Launching CatClient ({version})...")
+        self.root.title(f"CatClient 2.1 - Running {version}")
+        trace = LaunchTrace("catclient21", version)
+        self.tasks.submit(self._launch_minecraft_thread, version, self.username.get(), trace,
+                          on_done=self._launch_done, on_error=self._launch_failed,
+                          on_status=self.set_status, on_finish=self._launch_finished)
     
-    def _launch_minecraft_thread(self):
-        try:
-            self.launch_btn.config(state=tk.DISABLED)
-            self.progress.start()
-            
-            version = self.selected_version.get()
-            username = self.username.get()
-            player_uuid = str(uuid.uuid5(uuid.NAMESPACE_OID, username))
-            
-            self.status_label.config(text=f"Launching CatClient ({version})...")
-            self.root.title(f"CatClient 2.1 - Running {version}")
-            
-            options = {"username": username, "uuid": player_uuid, "token": ""}
+    def _launch_minecraft_thread(self, task, version, username, metrics):
+        player_uuid = str(uuid.uuid5(uuid.NAMESPACE_OID, username))
+        
+        options = {"username": username, "uuid": player_uuid, "token": ""}
+        with metrics.phase("launch_command"):
+            java, options["jvmArguments"] = self.jvm.jvm_args(
+                version, mods=count_mods(os.path.join(self.minecraft_dir, "mods")))
+            if java: options["executablePath"] = java
             command = mll.command.get_minecraft_command(version, self.minecraft_dir, options)
-            
-            self.status_label.config(text=f"Starting game ({version})...")
+        
+        task.status(f"Starting game ({version})...")
+        with metrics.phase("spawn"):
             process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            
-            try:
-                stdout, stderr = process.communicate(timeout=5)
-                if process.returncode != 0:
-                    error_msg = stderr.decode('utf-8') if stderr else stdout.decode('utf-8')
-                    raise Exception(f"Game failed to start: {error_msg}")
-            except subprocess.TimeoutExpired:
-                pass
-            
-            self.status_label.config(text=f"Game started! ({version})")
-            self.save_config({"launch_version": version})
-        except Exception as e:
-            messagebox.showerror("Error", f"Launch failed: {str(e)}")
-            self.status_label.config(text=f"Launch failed: {str(e)}")
-        finally:
-            self.progress.stop()
-            self.launch_btn.config(state=tk.NORMAL)
+        self.log_pump = LogPump(process, os.path.join(self.minecraft_dir, 'logs', 'catclient'),
+                                on_line=metrics.on_line, on_crash=self._game_crashed).start()
+        metrics.write(self.get_metrics_dir())
+        # The shared history, not this launcher's metrics dir, so one report covers both
+        metrics.watch(process, log=self.log_pump)
+        
+        try:
+            process.wait(timeout=5)
+            if process.returncode != 0:
+                self.log_pump.join(timeout=1)
+                error_msg = "\n".join(self.log_pump.lines(20))
+                raise Exception(f"Game failed to start: {error_msg}")
+        except subprocess.TimeoutExpired:
+            pass
+        return version
+    
+    def _game_crashed(self, signature, line):
+        self.tasks.call(self.status_label.config, {"text": f"Game crashed: {line[:80]}"})
+    
+    def _launch_done(self, version):
+        self.status_label.config(text=f"Game started! ({version})")
+        self.save_config({"launch_version": version})
+    
+    def _launch_failed(self, e):
+        messagebox.showerror("Error", f"Launch failed: {str(e)}")
+        self.status_label.config(text=f"Launch failed: {str(e)}")
+    
+    def _launch_finished(self):
+        self.progress.stop()
+        self.launch_btn.config(state=tk.NORMAL)
 
 if __name__ == "__main__":
     root = tk.Tk()
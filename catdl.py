@@ -0,0 +1,277 @@
+import os, json, threading, time, hashlib, http.client
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from cathttp import get_session, HTTPError
+from catmirrors import get_mirrors, STALL_TIMEOUT
+from cattasks import Cancelled
+from catstore import get_store, version_files, seed_tree, adopt_tree
+from catmetrics import incr, in_context
+
+CHUNK_SIZE = 64 * 1024
+
+# --- Single file download ---
+# Files are streamed into `<dest>.part`, hashed while written and only renamed
+# over `dest` once size and sha1 check out, so an interrupted download never
+# leaves a truncated file behind. A leftover `.part` is resumed with a Range
+# request on the next attempt. Files with a known sha1 are shared through the
+# content-addressed store (catstore), so they are fetched once per machine.
+# URLs under a known base are tried on each mirror catmirrors ranks for it,
+# moving on after an error, a stall or a hash mismatch.
+# Parallel installs into one tree (catcli install -j, a deferred fetch next to
+# a relaunch) share libraries and assets, so each dest has one writer at a
+# time; the others wait for it and then find the file complete.
+
+class IntegrityError(Exception):
+    pass
+
+def sha1_file(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""): h.update(chunk)
+    return h.hexdigest()
+
+def is_complete(path, size=None, sha1=None, verify=False):
+    try: st = os.stat(path)
+    except OSError: return False
+    if size is not None and st.st_size != size: return False
+    if verify and sha1: return sha1_file(path) == sha1
+    return True
+
+# Paces a shared byte budget across threads; used to keep background
+# downloads from starving the game (or anything else) of bandwidth.
+class RateLimiter:
+    def __init__(self, rate):
+        self.rate = rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, n):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + n / self.rate
+        if start > now: time.sleep(start - now)
+
+def _fetch_part(url, part, session, size=None, throttle=None, timeout=None, retries=None):
+    """Stream url into part, resuming what is there; returns (sha1, written, offset, latency)."""
+    h = hashlib.sha1()
+    offset = 0
+    if os.path.exists(part):
+        offset = os.path.getsize(part)
+        if size is not None and offset >= size: offset = 0
+    t0 = time.perf_counter()
+    resp = session.get(url, headers={"Range": f"bytes={offset}-"} if offset else None, stream=True,
+                       timeout=timeout, retries=retries)
+    if resp.status == 416 and offset:
+        resp.close()
+        offset = 0
+        resp = session.get(url, stream=True, timeout=timeout, retries=retries)
+    latency = time.perf_counter() - t0
+    with resp:
+        resp.raise_for_status()
+        if offset and resp.status == 206:
+            with open(part, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""): h.update(chunk)
+            mode = "ab"
+            incr("download.resumed")
+        else:
+            offset, mode = 0, "wb"
+        written = offset
+        with open(part, mode) as f:
+            for chunk in iter(lambda: resp.read(CHUNK_SIZE), b""):
+                if throttle: throttle.consume(len(chunk))
+                f.write(chunk); h.update(chunk)
+                written += len(chunk)
+    return h.hexdigest(), written, offset, latency
+
+_dest_locks = {}   # abspath -> [lock, users]
+_dest_locks_lock = threading.Lock()
+
+@contextmanager
+def _dest_lock(path):
+    with _dest_locks_lock:
+        entry = _dest_locks.setdefault(path, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]: yield
+    finally:
+        with _dest_locks_lock:
+            entry[1] -= 1
+            if not entry[1]: del _dest_locks[path]
+
+def download_file(url, dest, size=None, sha1=None, verify=False, session=None, store=None,
+                  throttle=None, mirrors=None):
+    """Fetch url into dest; returns the number of bytes that went over the network."""
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    if is_complete(dest, size, sha1, verify): return 0
+    with _dest_lock(os.path.abspath(dest)):
+        if is_complete(dest, size, sha1, verify):
+            incr("download.shared"); return 0
+        return _download(url, dest, size, sha1, verify, session, store, throttle, mirrors)
+
+def _download(url, dest, size, sha1, verify, session, store, throttle, mirrors):
+    store = get_store() if store is None else store
+    if store and sha1:
+        if verify and store.has(sha1, size) and sha1_file(store.path_for(sha1)) != sha1:
+            store.discard(sha1)
+        if store.link_into(sha1, dest, size):
+            incr("download.store_hits"); return 0
+    part = dest + ".part"
+    session = session or get_session()
+    mirrors = mirrors or get_mirrors()
+    tries = mirrors.candidates(url)
+    # With somewhere else to go, a stalled mirror is given up on sooner
+    timeout = STALL_TIMEOUT if len(tries) > 1 else None
+    restarted = False
+    i = 0
+    while i < len(tries):
+        mirror, target = tries[i]
+        t0 = time.perf_counter()
+        last = i == len(tries) - 1
+        try:
+            # Only the last mirror gets the session's own retries
+            digest, written, offset, latency = _fetch_part(target, part, session, size, throttle,
+                                                           timeout, None if last else 0)
+            incr("download.files"); incr("download.bytes", written - offset)
+            if (size is not None and written != size) or (sha1 and digest != sha1):
+                incr("download.integrity_errors")
+                os.remove(part)
+                if offset and not restarted:
+                    # The leftover .part may hold other content (a republished file);
+                    # fetch it once more from byte 0 before blaming the mirror
+                    restarted = True
+                    incr("download.resume_restarts")
+                    continue
+                raise IntegrityError(f"{target}: got {written} bytes sha1 {digest}, "
+                                     f"expected {size} bytes sha1 {sha1}")
+        except (OSError, http.client.HTTPException, HTTPError, IntegrityError):
+            mirrors.report(mirror, ok=False)
+            if last: raise
+            incr("mirrors.failover")
+            i += 1
+            continue
+        mirrors.report(mirror, latency, written - offset, time.perf_counter() - t0)
+        break
+    os.replace(part, dest)
+    if store and sha1: store.adopt(dest, sha1, verified=True)
+    return written - offset
+
+# --- Sharing trees managed by minecraft_launcher_lib ---
+# mll skips any file whose sha1 already matches, so placing stored objects into
+# the tree before it runs turns a repeat install into a local link pass.
+
+def seed_version(minecraft_dir, version_id, url, sha1=None, store=None):
+    store = get_store() if store is None else store
+    vjson = os.path.join(minecraft_dir, "versions", version_id, f"{version_id}.json")
+    download_file(url, vjson, sha1=sha1, store=store)
+    if not store: return 0
+    with open(vjson) as f: data = json.load(f)
+    idx = data.get("assetIndex")
+    if idx:
+        download_file(idx["url"], os.path.join(minecraft_dir, "assets", "indexes", f"{idx['id']}.json"),
+                      idx.get("size"), idx.get("sha1"), store=store)
+    return seed_tree(store, version_files(data, minecraft_dir, version_id))
+
+def adopt_version(minecraft_dir, version_id, store=None):
+    store = get_store() if store is None else store
+    vjson = os.path.join(minecraft_dir, "versions", version_id, f"{version_id}.json")
+    if not store or not os.path.exists(vjson): return 0
+    with open(vjson) as f: data = json.load(f)
+    return adopt_tree(store, version_files(data, minecraft_dir, version_id))
+
+# --- Download engine ---
+# Jobs are queued up front and run on a bounded worker pool, lowest priority
+# value first (launch-critical files before the rest). Each host gets its own
+# semaphore so a single CDN never sees more than `per_host` connections, and
+# `rate` (bytes/s) caps the whole run when set.
+
+class DownloadError(Exception):
+    def __init__(self, failures):
+        self.failures = failures
+        first = failures[0]
+        super().__init__(f"{len(failures)} download(s) failed, first: {first[0].url}: {first[1]}")
+
+class DownloadJob:
+    __slots__ = ("url", "dest", "size", "sha1", "tag", "priority", "verify")
+    def __init__(self, url, dest, size=None, sha1=None, tag=None, priority=1, verify=False):
+        self.url, self.dest, self.size, self.sha1, self.tag = url, dest, size, sha1, tag
+        self.priority, self.verify = priority, verify
+
+class Downloader:
+    def __init__(self, fetch, workers=16, per_host=8, progress=None, progress_interval=0.25,
+                 cancel=None, rate=None):
+        self.fetch = fetch
+        self.throttle = RateLimiter(rate) if rate else None
+        self.cancel = cancel
+        self.workers = max(1, workers)
+        self.per_host = max(1, per_host)
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.jobs = []
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self._last_report = 0.0
+        self.done = self.bytes_done = 0
+        self.tags = {}
+
+    def add(self, url, dest, size=None, sha1=None, tag=None, priority=1, verify=False):
+        # verify: hash dest (and its store object) rather than trusting a matching size
+        self.jobs.append(DownloadJob(url, dest, size, sha1, tag, priority, verify))
+
+    def _host_slot(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            sem = self._hosts.get(host)
+            if sem is None:
+                sem = self._hosts[host] = threading.BoundedSemaphore(self.per_host)
+        return sem
+
+    def _report(self, total, bytes_total, force=False):
+        if not self.progress: return
+        now = time.monotonic()
+        if not force and now - self._last_report < self.progress_interval: return
+        self._last_report = now
+        self.progress(self.done, total, self.bytes_done, bytes_total)
+
+    def _run_job(self, job, total, bytes_total):
+        if self.cancel is not None and self.cancel.is_set(): raise Cancelled()
+        start = time.perf_counter()
+        with self._host_slot(job.url):
+            # Only pass what is set, so plain fetch functions keep working
+            extra = {}
+            if self.throttle: extra["throttle"] = self.throttle
+            if job.verify: extra["verify"] = True
+            transferred = self.fetch(job.url, job.dest, size=job.size, sha1=job.sha1, **extra)
+        with self._lock:
+            self.done += 1
+            self.bytes_done += job.size or 0
+            # Per-tag span: first job start to last job end within this run
+            t = self.tags.setdefault(job.tag, {"files": 0, "bytes": 0, "start": start, "end": start})
+            t["files"] += 1
+            t["bytes"] += transferred if isinstance(transferred, int) else job.size or 0
+            t["start"], t["end"] = min(t["start"], start), max(t["end"], time.perf_counter())
+            self._report(total, bytes_total)
+
+    def run(self):
+        jobs, self.jobs = sorted(self.jobs, key=lambda j: j.priority), []
+        # One job per dest (the most urgent); download_file serializes across runs
+        seen = set()
+        jobs = [j for j in jobs if not (j.dest in seen or seen.add(j.dest))]
+        total = len(jobs)
+        bytes_total = sum(j.size or 0 for j in jobs)
+        self.done = self.bytes_done = 0
+        self.tags = {}
+        if not jobs: return 0
+        failures = []
+        with ThreadPoolExecutor(max_workers=min(self.workers, total)) as pool:
+            run_job = in_context(self._run_job)
+            futures = [(job, pool.submit(run_job, job, total, bytes_total)) for job in jobs]
+            for job, fut in futures:
+                try: fut.result()
+                except Exception as e: failures.append((job, e))
+        with self._lock:
+            self._report(total, bytes_total, force=True)
+        if self.cancel is not None and self.cancel.is_set(): raise Cancelled()
+        if failures: raise DownloadError(failures)
+        return total
@@ -0,0 +1,50 @@
+import os, time, threading
+from catmirrors import get_mirrors
+from catmeta import read_json, write_json_atomic
+from catmetrics import incr
+
+FABRIC_META_URL = "https://meta.fabricmc.net/v2"
+FABRIC_META_TTL = 6 * 3600
+
+# --- Fabric metadata ---
+# Fabric publishes the full list of supported game versions in one document.
+# Fetch it once, keep it on disk for FABRIC_META_TTL and answer membership
+# questions from an in-memory set. A stale copy is still used when offline.
+
+class FabricMeta:
+    def __init__(self, cache_dir, ttl=FABRIC_META_TTL, session=None, api=None):
+        self.path = os.path.join(cache_dir, "fabric_game_versions.json")
+        self.ttl, self.session = ttl, session
+        self.api = api or FABRIC_META_URL
+        self._versions = None
+        self._lock = threading.Lock()
+
+    def _fetch(self):
+        resp = (self.session or get_mirrors()).get(f"{self.api}/versions/game")
+        return [v["version"] for v in resp.raise_for_status().json()]
+
+    def game_versions(self, refresh=False):
+        with self._lock:
+            if self._versions is not None and not refresh: return self._versions
+            cached = read_json(self.path)
+            if cached and not refresh and time.time() - cached.get("fetched", 0) < self.ttl:
+                incr("fabric_meta.cache_hit")
+                self._versions = set(cached["versions"])
+                return self._versions
+            incr("fabric_meta.cache_miss")
+            try:
+                versions = self._fetch()
+            except Exception:
+                if not cached: raise
+                versions = cached["versions"]
+            else:
+                write_json_atomic(self.path, {"fetched": time.time(), "versions": versions})
+            self._versions = set(versions)
+            return self._versions
+
+    def is_supported(self, mc_version):
+        return mc_version in self.game_versions()
+
+    def supported(self, version_ids):
+        versions = self.game_versions()
+        return [v for v in version_ids if v in versions]
@@ -0,0 +1,204 @@
+import os, sys, json, time, shutil, argparse
+from catmeta import read_json, write_json_atomic
+from catsnap import installed_versions, instance_files
+from catstore import get_store
+from catmetrics import incr
+
+GC_FORMAT = 1
+GC_GRACE = 3600
+SWEEP_DIRS = ("assets/objects", "assets/indexes", "libraries")
+
+# --- Garbage collection ---
+# Mark: every installed version (or only `keep` plus what they inherit from)
+# references its JSON, jar, libraries, asset index and asset objects. Sweep:
+# anything else under SWEEP_DIRS, and whole version directories that are not
+# kept. assets/log_configs, natives and the rest of a kept version directory
+# are left alone. Nothing younger than GC_GRACE is touched, so a concurrent
+# install is safe. Age counts from the later of mtime and ctime: a file the
+# store hardlinks into a tree keeps the store inode's old mtime, but linking
+# it updates the ctime.
+#
+# Incremental: gc_state.json remembers, per version, the files its references
+# were computed from (by mtime and size) and per directory the mtime and
+# subdirectories seen on the last clean sweep. A later run only re-marks
+# versions whose JSON or index changed, lists directories whose mtime moved,
+# and checks paths that dropped out of the live set directly.
+
+def _stat_key(path):
+    try: st = os.stat(path)
+    except OSError: return None
+    return [st.st_mtime_ns, st.st_size]
+
+def _age(st, now): return now - max(st.st_mtime, st.st_ctime)
+
+def _deps(minecraft_dir, version_id):
+    """Files a version's reference list is derived from: its JSON chain and asset indexes."""
+    deps, vid = [], version_id
+    while vid and f"versions/{vid}/{vid}.json" not in deps:
+        rel = f"versions/{vid}/{vid}.json"
+        deps.append(rel)
+        data = read_json(os.path.join(minecraft_dir, rel), {})
+        idx = data.get("assetIndex", {}).get("id")
+        if idx: deps.append(f"assets/indexes/{idx}.json")
+        vid = data.get("inheritsFrom")
+    return deps
+
+class GarbageCollector:
+    def __init__(self, minecraft_dir, state_path=None, grace=GC_GRACE, store=None):
+        self.dir, self.grace = minecraft_dir, grace
+        self.state_path = state_path or os.path.join(minecraft_dir, ".catgc_state.json")
+        self.store = get_store() if store is None else store
+        state = read_json(self.state_path, {})
+        if state.get("format") != GC_FORMAT: state = {}
+        self.state = {"format": GC_FORMAT, "versions": state.get("versions", {}), "dirs": state.get("dirs", {})}
+
+    # --- Mark ---
+    def _refs(self, version_id):
+        cached = self.state["versions"].get(version_id)
+        if cached and all(_stat_key(os.path.join(self.dir, p)) == k for p, k in cached["deps"]):
+            incr("gc.mark_cached")
+            return cached
+        incr("gc.mark")
+        deps = _deps(self.dir, version_id)
+        refs = sorted(p for p in instance_files(self.dir, [version_id], extras=(), existing=False)
+                      if not p.startswith("versions/"))
+        entry = {"deps": [[p, _stat_key(os.path.join(self.dir, p))] for p in deps],
+                 "chain": [p.split("/")[1] for p in deps if p.startswith("versions/")], "refs": refs}
+        self.state["versions"][version_id] = entry
+        return entry
+
+    def mark(self, keep=None):
+        """Return (live version ids, live relative paths)."""
+        installed = installed_versions(self.dir)
+        roots = [v for v in installed if keep is None or v in keep]
+        live_versions, live = set(), set()
+        for vid in roots:
+            entry = self._refs(vid)
+            live_versions.update(entry["chain"])
+            live.update(entry["refs"])
+        for vid in list(self.state["versions"]):
+            if vid not in roots: del self.state["versions"][vid]
+        return live_versions, live
+
+    # --- Sweep ---
+    def _scan(self, rel, live, out, full):
+        path = os.path.join(self.dir, rel)
+        mtime = _stat_key(path)
+        if mtime is None: return
+        seen = self.state["dirs"].get(rel)
+        if not full and seen and seen[0] == mtime[0]:
+            for sub in seen[1]: self._scan(f"{rel}/{sub}", live, out, full)
+            return
+        subdirs, dirty = [], False
+        with os.scandir(path) as it:
+            for e in it:
+                child = f"{rel}/{e.name}"
+                if e.is_dir(follow_symlinks=False):
+                    subdirs.append(e.name)
+                    self._scan(child, live, out, full)
+                elif child not in live:
+                    out[child] = e.stat(follow_symlinks=False); dirty = True
+        # Only a clean directory may be skipped next time; one holding garbage
+        # (or young files spared by the grace period) is listed again
+        if dirty: self.state["dirs"].pop(rel, None)
+        else: self.state["dirs"][rel] = [mtime[0], sorted(subdirs)]
+
+    def collect(self, keep=None, dry_run=True, store=False, full=False):
+        """Find (and unless dry_run remove) unreachable files; returns a size report."""
+        t0 = time.perf_counter()
+        old_live = {p for e in self.state["versions"].values() for p in e["refs"]}
+        live_versions, live = self.mark(keep)
+        candidates = {}
+        for root in SWEEP_DIRS:
+            self._scan(root, live, candidates, full)
+        # Dropped out of the live set, possibly inside a directory skipped above
+        for rel in old_live - live:
+            try: candidates.setdefault(rel, os.lstat(os.path.join(self.dir, rel)))
+            except OSError: pass
+        now = time.time()
+        garbage = {rel: st.st_size for rel, st in candidates.items() if _age(st, now) >= self.grace}
+        young = len(candidates) - len(garbage)
+        dead_versions = {}
+        versions_dir = os.path.join(self.dir, "versions")
+        for vid in os.listdir(versions_dir) if os.path.isdir(versions_dir) else []:
+            vdir = os.path.join(versions_dir, vid)
+            if vid not in live_versions and os.path.isdir(vdir) and _age(os.stat(vdir), now) >= self.grace:
+                dead_versions[vid] = sum(os.path.getsize(os.path.join(d, n))
+                                         for d, _, names in os.walk(vdir) for n in names)
+        store_garbage = self._store_garbage(now) if store and self.store else {}
+        report = {"dry_run": dry_run, "live_files": len(live), "live_versions": sorted(live_versions),
+                  "young_skipped": young, "categories": {}, "versions": dead_versions}
+        for rel, size in garbage.items():
+            cat = "assets" if rel.startswith("assets/") else rel.split("/")[0]
+            c = report["categories"].setdefault(cat, {"files": 0, "bytes": 0})
+            c["files"] += 1; c["bytes"] += size
+        if dead_versions:
+            report["categories"]["versions"] = {"files": len(dead_versions), "bytes": sum(dead_versions.values())}
+        if store_garbage:
+            report["categories"]["store"] = {"files": len(store_garbage), "bytes": sum(store_garbage.values())}
+        report["bytes"] = sum(c["bytes"] for c in report["categories"].values())
+        if not dry_run:
+            for rel in garbage:
+                try: os.remove(os.path.join(self.dir, rel))
+                except OSError: pass
+            for vid in dead_versions:
+                shutil.rmtree(os.path.join(self.dir, "versions", vid), ignore_errors=True)
+            for path in store_garbage:
+                try: os.remove(path)
+                except OSError: pass
+            self._prune_empty(garbage)
+            incr("gc.removed_files", len(garbage)); incr("gc.removed_bytes", report["bytes"])
+            # Removals moved directory mtimes; drop those so they are relisted once
+            for rel in garbage: self.state["dirs"].pop(os.path.dirname(rel), None)
+            write_json_atomic(self.state_path, self.state)
+        report["seconds"] = round(time.perf_counter() - t0, 3)
+        return report
+
+    def _store_garbage(self, now):
+        # With hardlinked trees a store object nobody links to has nlink 1. A tree
+        # that got a copy instead keeps its own file, so dropping it only costs dedup.
+        out = {}
+        for dirpath, _, names in os.walk(self.store.objects):
+            for n in names:
+                path = os.path.join(dirpath, n)
+                try: st = os.stat(path)
+                except OSError: continue
+                if st.st_nlink == 1 and _age(st, now) >= self.grace: out[path] = st.st_size
+        return out
+
+    def _prune_empty(self, removed):
+        dirs = sorted({os.path.dirname(rel) for rel in removed}, key=len, reverse=True)
+        for rel in dirs:
+            while rel and rel not in SWEEP_DIRS:
+                try: os.rmdir(os.path.join(self.dir, rel))
+                except OSError: break
+                self.state["dirs"].pop(rel, None)
+                rel = os.path.dirname(rel)
+
+def format_report(report):
+    lines = [f"{'Would remove' if report['dry_run'] else 'Removed'} {report['bytes'] / 1048576:.1f} MiB "
+             f"({len(report['live_versions'])} live versions, {report['live_files']} live files, "
+             f"{report['seconds']}s)"]
+    for cat, c in sorted(report["categories"].items()):
+        lines.append(f"  {cat:10} {c['files']:7} files {c['bytes'] / 1048576:10.1f} MiB")
+    for vid in sorted(report["versions"]): lines.append(f"  version {vid}")
+    if report["young_skipped"]: lines.append(f"  ({report['young_skipped']} recent files left alone)")
+    return "\n".join(lines)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Remove files no installed version references")
+    ap.add_argument("minecraft_dir")
+    ap.add_argument("--keep", action="append", help="only keep this version (repeatable); default: all installed")
+    ap.add_argument("--delete", action="store_true", help="actually remove; the default is a dry run")
+    ap.add_argument("--store", action="store_true", help="also drop object store entries no tree links to")
+    ap.add_argument("--full", action="store_true", help="ignore the incremental state and list everything")
+    ap.add_argument("--grace", type=int, default=GC_GRACE, help="seconds a file must be untouched first")
+    ap.add_argument("--json", action="store_true")
+    a = ap.parse_args(argv)
+    gc = GarbageCollector(a.minecraft_dir, grace=a.grace)
+    report = gc.collect(set(a.keep) if a.keep else None, dry_run=not a.delete, store=a.store, full=a.full)
+    print(json.dumps(report, indent=2) if a.json else format_report(report))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+import json as _json, threading, time, ssl, base64, http.client, urllib.request
+from catmetrics import incr
+from urllib.parse import urlsplit, urljoin, urlencode, unquote
+
+USER_AGENT = "CatClient/1.5 (LunarCat)"
+DEFAULT_TIMEOUT = 30
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT = {"GET", "HEAD", "OPTIONS"}
+
+# --- Pooled HTTP session ---
+# One keep-alive connection pool per (scheme, host, port). Connections are
+# handed back once a response has been read to the end, so thousands of small
+# asset fetches share a handful of TCP+TLS handshakes.
+# Proxies come from the environment (HTTP_PROXY/HTTPS_PROXY/NO_PROXY) or the
+# system settings, like urllib and requests: https goes through a CONNECT
+# tunnel, plain http sends absolute-URI requests to the proxy.
+
+class HTTPError(Exception):
+    def __init__(self, resp):
+        self.status, self.response = resp.status, resp
+        super().__init__(f"HTTP {resp.status} {resp.reason} for {resp.url}")
+
+class Response:
+    def __init__(self, session, key, conn, raw, url, stream):
+        self.status, self.reason, self.headers, self.url = raw.status, raw.reason, raw.headers, url
+        self._session, self._key, self._conn, self._raw = session, key, conn, raw
+        self._body = None
+        if not stream:
+            self._body = raw.read()
+            self._release()
+
+    def _release(self):
+        if self._conn is None: return
+        conn, self._conn = self._conn, None
+        if self._raw.isclosed() and not self._raw.will_close:
+            self._session._put(self._key, conn)
+        else:
+            conn.close()
+
+    def read(self, n=-1):
+        if self._body is not None:
+            if n is None or n < 0: body, self._body = self._body, b""
+            else: body, self._body = self._body[:n], self._body[n:]
+            return body
+        chunk = self._raw.read() if n is None or n < 0 else self._raw.read(n)
+        if not chunk or self._raw.isclosed(): self._release()
+        return chunk
+
+    @property
+    def content(self):
+        if self._body is None:
+            self._body = self._raw.read()
+            self._release()
+        return self._body
+
+    @property
+    def text(self): return self.content.decode("utf-8", "replace")
+
+    def json(self): return _json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status >= 400: raise HTTPError(self)
+        return self
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close(); self._conn = None
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+class HttpSession:
+    def __init__(self, max_per_host=8, timeout=DEFAULT_TIMEOUT, retries=3, backoff=0.5,
+                 max_redirects=5, user_agent=USER_AGENT, proxies=None):
+        self.max_per_host, self.timeout = max_per_host, timeout
+        self.retries, self.backoff, self.max_redirects = retries, backoff, max_redirects
+        self.headers = {"User-Agent": user_agent, "Accept-Encoding": "identity"}
+        self._idle, self._stats = {}, {}
+        self._lock = threading.Lock()
+        self._ssl = ssl.create_default_context()
+        # {scheme: proxy url, "no": bypass list}; None = what urllib would use
+        self._system_proxies = proxies is None
+        self.proxies = urllib.request.getproxies() if proxies is None else proxies
+
+    def _proxy(self, scheme, host):
+        """(host, port, Proxy-Authorization or None) for a request, or None to go direct."""
+        proxy = self.proxies.get(scheme)
+        if not proxy: return None
+        if self._system_proxies: bypass = urllib.request.proxy_bypass(host)
+        else: bypass = urllib.request.proxy_bypass_environment(host, self.proxies)
+        if bypass: return None
+        p = urlsplit(proxy if "://" in proxy else "http://" + proxy)
+        auth = None
+        if p.username:
+            creds = f"{unquote(p.username)}:{unquote(p.password or '')}".encode()
+            auth = "Basic " + base64.b64encode(creds).decode()
+        return p.hostname, p.port or 8080, auth
+
+    # --- Pool ---
+    def _stat(self, host, field, n=1):
+        with self._lock:
+            st = self._stats.setdefault(host, {"requests": 0, "connections": 0, "reused": 0, "retries": 0})
+            st[field] += n
+        incr(f"http.{field}", n)
+
+    def stats(self):
+        with self._lock:
+            return {h: dict(s) for h, s in self._stats.items()}
+
+    def _get(self, key, timeout, proxy=None):
+        with self._lock:
+            idle = self._idle.get(key)
+            conn = idle.pop() if idle else None
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None: conn.sock.settimeout(timeout)
+            self._stat(key[1], "reused")
+            return conn, True
+        scheme, host, port = key
+        if proxy is None:
+            if scheme == "https":
+                conn = http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl)
+            else:
+                conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        elif scheme == "https":
+            conn = http.client.HTTPSConnection(proxy[0], proxy[1], timeout=timeout, context=self._ssl)
+            conn.set_tunnel(host, port, headers={"Proxy-Authorization": proxy[2]} if proxy[2] else None)
+        else:
+            conn = http.client.HTTPConnection(proxy[0], proxy[1], timeout=timeout)
+        self._stat(host, "connections")
+        return conn, False
+
+    def _put(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_per_host:
+                idle.append(conn); return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for c in conns: c.close()
+
+    # --- Requests ---
+    def _send(self, method, url, headers, body, timeout, stream):
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        key = (scheme, parts.hostname, parts.port or (443 if scheme == "https" else 80))
+        path = parts.path or "/"
+        if parts.query: path += "?" + parts.query
+        hdrs = dict(self.headers); hdrs.update(headers or {})
+        hdrs.setdefault("Host", parts.netloc)
+        proxy = self._proxy(scheme, parts.hostname)
+        if proxy and scheme == "http":
+            path = f"{scheme}://{parts.netloc}{path}"
+            if proxy[2]: hdrs.setdefault("Proxy-Authorization", proxy[2])
+        conn, reused = self._get(key, timeout, proxy)
+        self._stat(key[1], "requests")
+        try:
+            conn.request(method, path, body=body, headers=hdrs)
+            raw = conn.getresponse()
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            # A keep-alive connection the server already dropped is not a real failure
+            if reused and isinstance(e, (http.client.RemoteDisconnected, ConnectionResetError,
+                                         BrokenPipeError, http.client.BadStatusLine)):
+                return self._send(method, url, headers, body, timeout, stream)
+            raise
+        return Response(self, key, conn, raw, url, stream)
+
+    def request(self, method, url, headers=None, params=None, data=None, json=None,
+                timeout=None, stream=False, retries=None):
+        method = method.upper()
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        headers = dict(headers or {})
+        if params: url += ("&" if "?" in url else "?") + urlencode(params)
+        if json is not None:
+            data = _json.dumps(json).encode()
+            headers.setdefault("Content-Type", "application/json")
+        elif isinstance(data, str):
+            data = data.encode()
+        attempt = redirects = 0
+        while True:
+            try:
+                resp = self._send(method, url, headers, data, timeout, stream)
+            except (OSError, http.client.HTTPException):
+                if attempt >= retries or method not in IDEMPOTENT: raise
+            else:
+                if resp.status in (301, 302, 303, 307, 308) and resp.headers.get("Location"):
+                    resp.close()
+                    redirects += 1
+                    if redirects > self.max_redirects: return resp
+                    url = urljoin(url, resp.headers["Location"])
+                    if resp.status == 303: method, data = "GET", None
+                    continue
+                if resp.status not in RETRY_STATUSES or attempt >= retries or method not in IDEMPOTENT:
+                    return resp
+                resp.close()
+            attempt += 1
+            self._stat(urlsplit(url).hostname, "retries")
+            time.sleep(self.backoff * (2 ** (attempt - 1)))
+
+    def get(self, url, **kw): return self.request("GET", url, **kw)
+    def post(self, url, **kw): return self.request("POST", url, **kw)
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None: _session = HttpSession()
+        return _session
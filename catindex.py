@@ -0,0 +1,186 @@
+import os, sys, json, mmap, struct, hashlib, threading
+from array import array
+from catmeta import read_json
+from catmetrics import incr
+
+# --- Compact metadata cache ---
+# Version JSONs and asset indexes are converted once into a flat binary table
+# and memory-mapped on later reads instead of being parsed into dicts of dicts:
+#   header | meta JSON | sha1s (20 bytes/row) | sizes (u64/row) | string refs (u32/row/column) | strings
+# Strings are interned into one table of NUL-terminated UTF-8. Sections are 8-byte
+# aligned and use native byte order (the cache never leaves the machine). The
+# header carries the source JSON's mtime and size; when those change the table
+# is rebuilt from the JSON on the next read.
+#
+# Asset index: one row per object, string column = name.
+# Version JSON: one row per library artifact, string columns = path, url; the
+# meta JSON holds the rest of the document (mainClass, assetIndex, downloads...).
+
+META_FORMAT = 1
+MAGIC = b"CATMETA" + (b"L" if sys.byteorder == "little" else b"B")
+HEADER = struct.Struct("<8sIQQIII")  # magic, format, source mtime_ns, source size, rows, columns, meta length
+NO_SHA1 = bytes(20)
+NO_SIZE = 2 ** 64 - 1
+
+def _source_key(path):
+    try: st = os.stat(path)
+    except OSError: return None
+    return st.st_mtime_ns, st.st_size
+
+def _align(n): return (n + 7) & ~7
+
+def pack_table(key, meta, rows, columns):
+    """rows: (sha1 hex or None, size or None, (string per column)) -> bytes."""
+    strings, ids = [], {}
+    sha1s, sizes, refs = bytearray(), array("Q"), array("I")
+    for sha1, size, cols in rows:
+        sha1s += bytes.fromhex(sha1) if sha1 else NO_SHA1
+        sizes.append(NO_SIZE if size is None else size)
+        for s in cols:
+            i = ids.get(s)
+            if i is None:
+                if "\0" in s: raise ValueError(f"NUL in metadata string {s!r}")
+                i = ids[s] = len(strings); strings.append(s)
+            refs.append(i)
+    meta_blob = json.dumps(meta, separators=(",", ":")).encode()
+    out = bytearray(HEADER.pack(MAGIC, META_FORMAT, key[0], key[1], len(rows), columns, len(meta_blob)))
+    for part in (meta_blob, sha1s, sizes.tobytes(), refs.tobytes(), "".join(s + "\0" for s in strings).encode()):
+        out += part
+        out += bytes(_align(len(out)) - len(out))
+    return bytes(out)
+
+class CompactTable:
+    def __init__(self, buf):
+        mv = memoryview(buf)
+        magic, fmt, mtime, size, rows, cols, meta_len = HEADER.unpack_from(mv)
+        if magic != MAGIC or fmt != META_FORMAT: raise ValueError("not a metadata table")
+        self.key, self.rows, self.columns = (mtime, size), rows, cols
+        pos = HEADER.size
+        self.meta = json.loads(bytes(mv[pos:pos + meta_len])); pos = _align(pos + meta_len)
+        self._sha1s = mv[pos:pos + 20 * rows]; pos = _align(pos + 20 * rows)
+        self._sizes = mv[pos:pos + 8 * rows].cast("Q"); pos = _align(pos + 8 * rows)
+        self._refs = mv[pos:pos + 4 * rows * cols].cast("I"); pos = _align(pos + 4 * rows * cols)
+        if len(self._sha1s) != 20 * rows or len(self._refs) != rows * cols or pos > len(mv):
+            raise ValueError("truncated metadata table")
+        self._blob, self._strings = mv[pos:], None
+        self._buf = buf
+
+    def __len__(self): return self.rows
+
+    # Columns are materialised whole: one hex() / tolist() / split() each
+    # instead of per-row Python work
+    def sha1s(self):
+        hexed = self._sha1s.hex()
+        return [hexed[i:i + 40] for i in range(0, len(hexed), 40)]
+
+    def sizes(self): return self._sizes.tolist()
+
+    def column(self, c):
+        if self._strings is None:
+            # Every string is NUL-terminated; padding only adds empty entries at the end
+            self._strings = str(self._blob, "utf-8").split("\0")
+        strings = self._strings
+        return [strings[i] for i in self._refs[c::self.columns].tolist()]
+
+class AssetIndex(CompactTable):
+    def hashes(self):
+        """(sha1, size) per object, in index order; objects may share a hash."""
+        return zip(self.sha1s(), self.sizes())
+
+    def objects(self):
+        """(name, sha1, size) per object."""
+        return zip(self.column(0), self.sha1s(), self.sizes())
+
+class VersionMeta(CompactTable):
+    def get(self, key, default=None): return self.meta.get(key, default)
+
+    def artifacts(self):
+        """(path, url, sha1 or None, size or None) per library artifact."""
+        none = NO_SHA1.hex()
+        return [(path, url or None, None if sha1 == none else sha1, None if size == NO_SIZE else size)
+                for path, url, sha1, size in zip(self.column(0), self.column(1), self.sha1s(), self.sizes())]
+
+def _asset_rows(data):
+    return {}, [(o["hash"], o.get("size"), (name,)) for name, o in data.get("objects", {}).items()], 1
+
+def _version_rows(data):
+    meta = {k: v for k, v in data.items() if k != "libraries"}
+    rows = []
+    for lib in data.get("libraries", []):
+        art = lib.get("downloads", {}).get("artifact")
+        if art and art.get("path"):
+            rows.append((art.get("sha1"), art.get("size"), (art["path"], art.get("url") or "")))
+    return meta, rows, 2
+
+class MetaCache:
+    def __init__(self, cache_dir):
+        self.dir = cache_dir
+        self._mem = {}
+        self._lock = threading.Lock()
+
+    def _path(self, kind, src):
+        name = os.path.splitext(os.path.basename(src))[0]
+        tag = hashlib.sha1(os.path.abspath(src).encode()).hexdigest()[:12]
+        return os.path.join(self.dir, f"{kind}-{name}-{tag}.bin")
+
+    def _map(self, path, cls, key):
+        try:
+            with open(path, "rb") as f: buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try: table = cls(buf)
+        except (ValueError, TypeError, struct.error): return None
+        return table if table.key == key else None
+
+    def _get(self, kind, src, cls, rows):
+        key = _source_key(src)
+        if key is None: return None
+        with self._lock:
+            table = self._mem.get(src)
+        if table is not None and table.key == key:
+            incr("meta_cache.hit"); return table
+        path = self._path(kind, src)
+        table = self._map(path, cls, key)
+        if table is None:
+            incr("meta_cache.miss")
+            data = read_json(src)
+            if not isinstance(data, dict): return None
+            blob = pack_table(key, *rows(data))
+            table = cls(blob)
+            try:
+                os.makedirs(self.dir, exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f: f.write(blob)
+                os.replace(tmp, path)
+            except OSError:
+                # e.g. Windows refusing to replace a file another process has mapped; the table still works
+                pass
+        else:
+            incr("meta_cache.hit")
+        with self._lock:
+            self._mem[src] = table
+        return table
+
+    def version(self, vjson):
+        """Compact view of a version JSON, or None if it is missing or unreadable."""
+        return self._get("version", vjson, VersionMeta, _version_rows)
+
+    def asset_index(self, idx_path):
+        """Compact view of an asset index, or None if it is missing or unreadable."""
+        return self._get("assets", idx_path, AssetIndex, _asset_rows)
+
+_meta = None
+_meta_lock = threading.Lock()
+
+def get_meta_cache():
+    global _meta
+    with _meta_lock:
+        if _meta is None:
+            from catstore import default_base_dir
+            _meta = MetaCache(os.path.join(default_base_dir(), "cache", "meta"))
+        return _meta
+
+def set_meta_cache(cache):
+    """Swap the shared cache (None restores the default on next use)."""
+    global _meta
+    with _meta_lock: _meta = cache
@@ -0,0 +1,189 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from catdl import Downloader, download_file, is_complete
+from catlaunch import LaunchPlanCache, build_plan, render_command
+from catassets import find_missing_objects
+from catindex import MetaCache
+from catjava import java_version, LEGACY_RUNTIME
+from catmetrics import RunMetrics, incr, in_context
+from cattasks import Cancelled
+
+RESOURCES_URL = "https://resources.download.minecraft.net/"
+DOWNLOAD_WORKERS = 16
+DOWNLOAD_PER_HOST = 8
+# Asset paths the game can start without; fetched after launch when deferring
+DEFERRED_ASSET_PREFIXES = ("minecraft/sounds/music/", "minecraft/sounds/records/", "minecraft/music/")
+BACKGROUND_RATE = 4 * 1024 * 1024
+
+def print_progress(done, total, bytes_done, bytes_total):
+    print(f"[{done}/{total}] {bytes_done // 1024} / {bytes_total // 1024} KiB")
+
+# --- Vanilla version installer ---
+# The install/launch-plan logic behind CatClientApp, without any Tk. One
+# instance owns one game tree (versions/, libraries/, assets/).
+# With defer_assets set, ensure_version only fetches what the game needs to
+# start: client jar and libraries first, then the asset index and every object
+# not matched by DEFERRED_ASSET_PREFIXES. The rest is remembered per version and
+# fetched by fetch_deferred(), normally rate-limited while the game runs.
+
+def is_deferred_asset(name):
+    return name.startswith(DEFERRED_ASSET_PREFIXES)
+
+class VersionInstaller:
+    def __init__(self, minecraft_dir, cache_dir, resources_url=RESOURCES_URL,
+                 workers=DOWNLOAD_WORKERS, per_host=DOWNLOAD_PER_HOST, launcher="client",
+                 defer_assets=False, runtimes=None):
+        self.minecraft_dir = minecraft_dir
+        self.versions_dir = os.path.join(minecraft_dir, 'versions')
+        self.libraries_dir = os.path.join(minecraft_dir, 'libraries')
+        self.assets_dir = os.path.join(minecraft_dir, 'assets')
+        self.resources_url = resources_url
+        self.workers, self.per_host, self.launcher = workers, per_host, launcher
+        self.versions, self.version_sha1 = {}, {}
+        self.asset_timings = {}
+        self.defer_assets = defer_assets
+        self.deferred = {}
+        self.launch_plans = LaunchPlanCache(os.path.join(cache_dir, 'launch'))
+        self.meta = MetaCache(os.path.join(cache_dir, 'meta'))
+        self.runtimes = runtimes
+
+    def set_manifest(self, manifest):
+        self.versions = {v["id"]: v["url"] for v in manifest["versions"]}
+        self.version_sha1 = {v["id"]: v.get("sha1") for v in manifest["versions"]}
+
+    def version_paths(self, version_id):
+        vdir = os.path.join(self.versions_dir, version_id)
+        return vdir, os.path.join(vdir, f"{version_id}.json"), os.path.join(vdir, f"{version_id}.jar")
+
+    def ensure_version(self, version_id, progress=print_progress, verify=False, cancel=None,
+                       metrics=None, status=None):
+        metrics = metrics or RunMetrics(self.launcher, "ensure", version_id)
+        vdir, vjson, jar_path = self.version_paths(version_id)
+        os.makedirs(vdir, exist_ok=True)
+
+        # JSON
+        with metrics.phase("version_json"):
+            if not os.path.exists(vjson):
+                url = self.versions.get(version_id)
+                if url: download_file(url, vjson, sha1=self.version_sha1.get(version_id))
+        data = self.meta.version(vjson)
+        if data is None: return None
+        dl = Downloader(download_file, workers=self.workers,
+                        per_host=self.per_host, progress=progress, cancel=cancel)
+
+        # Client JAR
+        jar_info = data.get("downloads", {}).get("client")
+        if jar_info and not is_complete(jar_path, jar_info.get("size"), jar_info.get("sha1"), verify):
+            dl.add(jar_info["url"], jar_path, jar_info.get("size"), jar_info.get("sha1"), "client_jar", 0, verify)
+
+        # Libraries
+        for path, url, sha1, size in data.artifacts():
+            lib_path = os.path.join(self.libraries_dir, path)
+            if url and not is_complete(lib_path, size, sha1, verify):
+                dl.add(url, lib_path, size, sha1, "libraries", 0, verify)
+
+        # Assets (the index is needed up front to know which objects to queue)
+        asset_index = data.get("assetIndex", {})
+        if asset_index:
+            idx_path = os.path.join(self.assets_dir, "indexes", f"{asset_index['id']}.json")
+            with metrics.phase("asset_index"):
+                if not is_complete(idx_path, asset_index.get("size"), asset_index.get("sha1"), verify):
+                    download_file(asset_index["url"], idx_path, asset_index.get("size"),
+                                  asset_index.get("sha1"), verify)
+                idx = self.meta.asset_index(idx_path)
+                if idx is None: raise ValueError(f"unreadable asset index {idx_path}")
+            objects_dir = os.path.join(self.assets_dir, "objects")
+            with metrics.phase("asset_check"):
+                missing, self.asset_timings = find_missing_objects(idx.hashes(), objects_dir)
+                if verify:
+                    missing.update({h: size for h, size in idx.hashes()
+                                    if not is_complete(os.path.join(objects_dir, h[:2], h), size, h, True)})
+            # An object shared with a start-up path is never deferred
+            needed = None
+            if self.defer_assets:
+                needed = {h for name, h, size in idx.objects() if not is_deferred_asset(name)}
+            later = []
+            for h, size in missing.items():
+                sub = h[:2]
+                job = (f"{self.resources_url}{sub}/{h}", os.path.join(objects_dir, sub, h), size, h)
+                if needed is None or h in needed: dl.add(*job, "assets", 1, verify)
+                else: later.append(job + (verify,))
+            self.deferred[version_id] = later
+            incr("assets.deferred", len(later))
+
+        # The Java runtime installs alongside the game files
+        runtime = None
+        if self.runtimes:
+            pool = ThreadPoolExecutor(max_workers=1)
+            runtime = pool.submit(in_context(self.runtimes.ensure), java_version(data), cancel=cancel)
+            pool.shutdown(wait=False)
+        with metrics.phase("download"):
+            dl.run()
+        if runtime:
+            with metrics.phase("java_runtime"):
+                try: runtime.result()
+                except Cancelled: raise
+                except Exception as e:
+                    # build_launch_command falls back to the default java (and tries again)
+                    incr("java_runtime.failed")
+                    if status: status(f"Java runtime install failed: {e}")
+        for tag, t in dl.tags.items():
+            metrics.record(tag, t["end"] - t["start"], {"files": t["files"]}, bytes=t["bytes"])
+        return vjson
+
+    def fetch_deferred(self, version_id, rate=BACKGROUND_RATE, progress=None, cancel=None):
+        """Download the objects ensure_version left out; returns how many there were."""
+        jobs = self.deferred.pop(version_id, [])
+        if not jobs: return 0
+        dl = Downloader(download_file, workers=min(self.workers, 4), per_host=self.per_host,
+                        progress=progress, cancel=cancel, rate=rate)
+        for url, dest, size, sha1, verify in jobs: dl.add(url, dest, size, sha1, "deferred_assets", 2, verify)
+        try:
+            return dl.run()
+        except BaseException:
+            self.deferred.setdefault(version_id, jobs)
+            raise
+
+    # --- Launch plans ---
+    def get_launch_plan(self, version_id, task=None, metrics=None):
+        vdir, vjson, jar_path = self.version_paths(version_id)
+        plan = self.launch_plans.get(version_id, vjson)
+        if plan: return plan
+        if task: vjson = self.ensure_version(version_id, task.progress, cancel=task.cancelled, metrics=metrics,
+                                             status=task.status)
+        else: vjson = self.ensure_version(version_id, metrics=metrics)
+        if not vjson: return None
+        data = self.meta.version(vjson)
+        if data is None: return None
+        plan = build_plan(version_id, data, jar_path, self.libraries_dir)
+        # Not cached while objects are still deferred, so the next launch
+        # re-checks assets and picks up whatever the background fetch missed
+        if plan and not self.deferred.get(version_id): self.launch_plans.put(version_id, vjson, plan)
+        return plan
+
+    def build_launch_command(self, version_id, session, task=None, metrics=None, jvm=None, game_dir=None):
+        plan = self.get_launch_plan(version_id, task, metrics)
+        if not plan: return []
+        repl = {
+            "${auth_player_name}": session["username"],
+            "${auth_uuid}": session["uuid"],
+            "${auth_access_token}": session["token"],
+            "${version_name}": version_id,
+            "${game_directory}": game_dir or self.minecraft_dir,
+            "${assets_root}": self.assets_dir,
+            "${assets_index_name}": plan["asset_index"],
+            "${user_type}": session.get("type","catclient"),
+            "${user_properties}": "{}"
+        }
+        java = major = None
+        if self.runtimes:
+            try:
+                java, major = self.runtimes.ensure(plan.get("java") or LEGACY_RUNTIME)
+            except Exception as e:
+                # Not installed and unreachable: the game may still run on the java on PATH
+                incr("java_runtime.fallback")
+                if task: task.status(f"Java runtime unavailable, using the default java: {e}")
+        if jvm is None: return render_command(plan, repl, java or "java")
+        java, jvm_args = jvm.jvm_args(version_id, classpath=os.pathsep.join(plan["classpath"]),
+                                      java=java, java_major=major)
+        return render_command(plan, repl, java or "java", jvm_args)
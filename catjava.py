@@ -0,0 +1,148 @@
+import os, sys, time, stat, platform, threading
+from catdl import Downloader, download_file, is_complete
+from catmirrors import get_mirrors
+from catmeta import read_json, write_json_atomic
+from catmetrics import incr
+
+JAVA_RUNTIMES_URL = ("https://launchermeta.mojang.com/v1/products/java-runtime/"
+                     "2ec0cc96c44e5a76b9c8b7c39df7210883d12871/all.json")
+JAVA_RUNTIMES_TTL = 24 * 3600
+# What the official launcher uses for versions without a javaVersion entry
+LEGACY_RUNTIME = {"component": "jre-legacy", "majorVersion": 8}
+
+# --- Managed Java runtimes ---
+# The version JSON names the runtime it was built for
+# ("javaVersion": {"component": "java-runtime-gamma", "majorVersion": 17}).
+# Mojang publishes each component per platform as a manifest of files with
+# sha1/size/url. A component is installed once under runtimes/<component>/,
+# all files in parallel through the Downloader, each checked against its sha1.
+# Files go through the object store like any other download, so the large
+# share of identical files between runtime releases is stored once.
+# runtimes/<component>/.catruntime.json records which manifest was installed;
+# with it present, ensure() is a stat and the launch knows the java binary
+# and its major version without running `java -version`.
+
+def runtime_platform():
+    machine = platform.machine().lower()
+    if sys.platform == "win32":
+        return {"amd64": "windows-x64", "x86_64": "windows-x64", "arm64": "windows-arm64"}.get(machine, "windows-x86")
+    if sys.platform == "darwin":
+        return "mac-os-arm64" if machine == "arm64" else "mac-os"
+    if sys.platform.startswith("linux"):
+        return {"x86_64": "linux", "amd64": "linux", "i386": "linux-i386", "i686": "linux-i386"}.get(machine)
+    return None
+
+def java_version(data):
+    """The javaVersion entry of a version JSON (or its compact view)."""
+    return data.get("javaVersion") or LEGACY_RUNTIME
+
+def _java_binary(root):
+    if sys.platform == "win32": return os.path.join(root, "bin", "javaw.exe")
+    if sys.platform == "darwin": return os.path.join(root, "jre.bundle", "Contents", "Home", "bin", "java")
+    return os.path.join(root, "bin", "java")
+
+class RuntimeManager:
+    def __init__(self, runtimes_dir, cache_dir, platform_key=None, workers=16, per_host=8,
+                 session=None, ttl=JAVA_RUNTIMES_TTL, url=JAVA_RUNTIMES_URL):
+        self.dir, self.cache_dir = runtimes_dir, cache_dir
+        self.platform = platform_key or runtime_platform()
+        self.workers, self.per_host, self.session = workers, per_host, session
+        self.ttl, self.url = ttl, url
+        self._index_path = os.path.join(cache_dir, "java_runtimes.json")
+        self._installed = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _http(self): return self.session or get_mirrors()
+
+    def runtimes(self, refresh=False):
+        """{component: [entries]} for this platform; the index is cached for `ttl`."""
+        cached = read_json(self._index_path)
+        if cached and not refresh and time.time() - cached.get("fetched", 0) < self.ttl:
+            incr("java_runtime.index_cache_hit")
+            data = cached["data"]
+        else:
+            incr("java_runtime.index_cache_miss")
+            try:
+                data = self._http().get(self.url).raise_for_status().json()
+            except Exception:
+                if not cached: raise
+                data = cached["data"]
+            else:
+                write_json_atomic(self._index_path, {"fetched": time.time(), "data": data})
+        return data.get(self.platform) or {}
+
+    def installed(self, component):
+        """(java binary, marker) of an installed component, or None."""
+        marker = read_json(os.path.join(self.dir, component, ".catruntime.json"))
+        if not marker: return None
+        java = _java_binary(os.path.join(self.dir, component))
+        return (java, marker) if os.path.isfile(java) else None
+
+    def ensure(self, java_version, progress=None, cancel=None, update=False):
+        """Return (java binary, major version) for a javaVersion entry, installing it if needed.
+
+        (None, major) when Mojang ships no such runtime for this platform.
+        """
+        if not java_version.get("component"): java_version = LEGACY_RUNTIME
+        component, major = java_version["component"], java_version.get("majorVersion")
+        with self._lock:
+            lock = self._locks.setdefault(component, threading.Lock())
+        with lock:
+            if not update and component in self._installed:
+                incr("java_runtime.hit"); return self._installed[component], major
+            found = None if update else self.installed(component)
+            if found is None:
+                found = self._install(component, progress, cancel)
+                if found is None: return None, major
+            else:
+                incr("java_runtime.hit")
+            self._installed[component] = found[0]
+            return found[0], major
+
+    def _install(self, component, progress, cancel):
+        entries = self.runtimes().get(component) if self.platform else None
+        if not entries:
+            incr("java_runtime.unavailable"); return None
+        incr("java_runtime.install")
+        ref = entries[0]["manifest"]
+        # Component manifests are addressed by sha1 and never change
+        manifest_path = os.path.join(self.cache_dir, "java", f"{ref['sha1']}.json")
+        if not is_complete(manifest_path, ref.get("size"), ref["sha1"]):
+            download_file(ref["url"], manifest_path, ref.get("size"), ref["sha1"])
+        files = read_json(manifest_path, {}).get("files", {})
+        root = os.path.join(self.dir, component)
+        dl = Downloader(download_file, workers=self.workers, per_host=self.per_host,
+                        progress=progress, cancel=cancel)
+        executables, links = [], []
+        for rel, entry in sorted(files.items()):
+            path = os.path.join(root, *rel.split("/"))
+            if entry["type"] == "directory":
+                os.makedirs(path, exist_ok=True)
+            elif entry["type"] == "link":
+                links.append((path, entry["target"]))
+            elif entry["type"] == "file":
+                raw = entry["downloads"]["raw"]
+                if not is_complete(path, raw.get("size"), raw["sha1"]):
+                    dl.add(raw["url"], path, raw.get("size"), raw["sha1"], "java_runtime", 0)
+                if entry.get("executable"): executables.append(path)
+        dl.run()
+        # Files an older release of the component had and this one doesn't
+        wanted = {os.path.join(root, *rel.split("/")) for rel in files}
+        for dirpath, _, names in os.walk(root):
+            for n in names:
+                path = os.path.join(dirpath, n)
+                if path not in wanted and n != ".catruntime.json": os.remove(path)
+        if sys.platform != "win32":
+            for path in executables:
+                mode = os.stat(path).st_mode
+                os.chmod(path, mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+            for path, target in links:
+                if os.path.lexists(path): os.remove(path)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.symlink(target, path)
+        marker = {"component": component, "manifest": ref["sha1"],
+                  "version": entries[0].get("version", {}).get("name"), "installed": time.time()}
+        write_json_atomic(os.path.join(root, ".catruntime.json"), marker)
+        java = _java_binary(root)
+        return (java, marker) if os.path.isfile(java) else None
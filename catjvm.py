@@ -0,0 +1,148 @@
+import os, re, sys, shutil, hashlib, subprocess, threading
+from catmeta import read_json, write_json_atomic
+from catmetrics import incr
+
+DEFAULT_HEAP_MB = 2048
+MODDED_HEAP_MB = 3072
+HEAP_PER_MOD_MB = 48
+MIN_HEAP_MB = 1024
+MAX_HEAP_MB = 8192
+OS_RESERVE_MB = 2048
+G1_ARGS = ["-XX:+UseG1GC", "-XX:MaxGCPauseMillis=50", "-XX:G1HeapRegionSize=16M",
+           "-XX:+ParallelRefProcEnabled", "-XX:+DisableExplicitGC"]
+
+# --- JVM profiles ---
+# Instead of a fixed -Xmx2G, the heap is sized from the installed RAM and what
+# is launched (vanilla vs. a mod loader plus its mods), and G1 gets a short
+# pause target. A profile is a plain dict, so jvm.json can override any key
+# per version:
+#   {"default": {"heap_mb": 3072}, "versions": {"1.20.1": {"extra": ["-Dfoo=1"], "cds": false}}}
+#
+# Class Data Sharing: the first launch of a given java + classpath dumps the
+# loaded classes into cds/<key>.jsa (-XX:ArchiveClassesAtExit, JDK 13+, or
+# -XX:+AutoCreateSharedArchive on JDK 19+), later launches map that archive
+# instead of parsing and verifying the same classes again. The version probe
+# can be wrong when a launcher library picks its own runtime, so the CDS flags
+# go behind -XX:+IgnoreUnrecognizedVMOptions rather than risk a failed start.
+
+def total_memory_mb():
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                            ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                            ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                            ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+            stat = MEMORYSTATUSEX(dwLength=ctypes.sizeof(MEMORYSTATUSEX))
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(stat))
+            return stat.ullTotalPhys // 1048576
+        if sys.platform == "darwin":
+            out = subprocess.run(["sysctl", "-n", "hw.memsize"], capture_output=True, text=True, timeout=5)
+            return int(out.stdout) // 1048576
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 1048576
+    except (OSError, ValueError, AttributeError, subprocess.SubprocessError):
+        return None
+
+def heap_for(total_mb, loader=None, mods=0):
+    wanted = MODDED_HEAP_MB + mods * HEAP_PER_MOD_MB if loader else DEFAULT_HEAP_MB
+    if total_mb:
+        wanted = min(wanted, total_mb // 2, total_mb - OS_RESERVE_MB)
+    return max(MIN_HEAP_MB, min(MAX_HEAP_MB, wanted // 256 * 256))
+
+def detect_loader(version_id):
+    v = version_id.lower()
+    return next((l for l in ("fabric", "quilt", "neoforge", "forge") if l in v), None)
+
+def count_mods(mods_dir):
+    try: return sum(1 for n in os.listdir(mods_dir) if n.endswith(".jar"))
+    except OSError: return 0
+
+_VERSION_RE = re.compile(r'version "(\d+)(?:\.(\d+))?')
+
+def parse_java_major(text):
+    m = _VERSION_RE.search(text or "")
+    if not m: return None
+    major = int(m.group(1))
+    return int(m.group(2) or 0) if major == 1 else major   # 1.8.0_x -> 8
+
+class JvmTuner:
+    def __init__(self, cache_dir, config_path=None, java=None, cds=True):
+        self.cache_dir, self.java, self.cds = cache_dir, java, cds
+        self.config_path = config_path or os.path.join(cache_dir, "jvm.json")
+        self.cds_dir = os.path.join(cache_dir, "cds")
+        self._java_cache = os.path.join(cache_dir, "java_versions.json")
+        self._lock = threading.Lock()
+        self._total_mb = None
+
+    def total_mb(self):
+        if self._total_mb is None: self._total_mb = total_memory_mb() or 0
+        return self._total_mb
+
+    def java_major(self, java=None):
+        """Major version of `java`, cached on disk by binary path and mtime."""
+        path = shutil.which(java or self.java or "java")
+        if not path: return None
+        path = os.path.realpath(path)
+        try: key = f"{path}:{os.stat(path).st_mtime_ns}"
+        except OSError: return None
+        with self._lock:
+            cache = read_json(self._java_cache, {})
+            if key in cache: return cache[key]
+            try:
+                out = subprocess.run([path, "-version"], capture_output=True, text=True, timeout=15)
+                major = parse_java_major(out.stderr + out.stdout)
+            except (OSError, subprocess.SubprocessError):
+                return None
+            cache = {k: v for k, v in cache.items() if not k.startswith(path + ":")}
+            cache[key] = major
+            write_json_atomic(self._java_cache, cache)
+            return major
+
+    def profile(self, version_id, loader=None, mods=0, java=None):
+        config = read_json(self.config_path, {})
+        loader = loader or detect_loader(version_id)
+        profile = {"java": java or self.java, "heap_mb": heap_for(self.total_mb(), loader, mods),
+                   "gc": list(G1_ARGS), "extra": [], "cds": self.cds}
+        profile.update(config.get("default", {}))
+        profile.update(config.get("versions", {}).get(version_id, {}))
+        return profile
+
+    def cds_args(self, version_id, java, classpath=None, major=None):
+        major = major or self.java_major(java)
+        if not major or major < 13: return []
+        key = hashlib.sha1(f"{shutil.which(java or 'java')}|{major}|{version_id}|{classpath or ''}".encode()).hexdigest()[:16]
+        archive = os.path.join(self.cds_dir, f"{version_id}-{key}.jsa")
+        os.makedirs(self.cds_dir, exist_ok=True)
+        if major >= 19:
+            incr("jvm.cds_hit" if os.path.exists(archive) else "jvm.cds_miss")
+            return ["-XX:+IgnoreUnrecognizedVMOptions", "-XX:+AutoCreateSharedArchive",
+                    f"-XX:SharedArchiveFile={archive}"]
+        if os.path.exists(archive):
+            incr("jvm.cds_hit")
+            return ["-XX:+IgnoreUnrecognizedVMOptions", f"-XX:SharedArchiveFile={archive}", "-Xshare:auto"]
+        incr("jvm.cds_miss")
+        return ["-XX:+IgnoreUnrecognizedVMOptions", f"-XX:ArchiveClassesAtExit={archive}"]
+
+    def jvm_args(self, version_id, loader=None, mods=0, classpath=None, java=None, java_major=None):
+        """Return (java executable or None for the launcher's default, JVM arguments).
+
+        java/java_major: a managed runtime whose version is already known; jvm.json still wins.
+        """
+        p = self.profile(version_id, loader, mods, java)
+        heap = int(p["heap_mb"])
+        args = [f"-Xms{min(heap, 1024)}M", f"-Xmx{heap}M", *p["gc"]]
+        major = java_major if java and p["java"] == java else None
+        if p["cds"]: args += self.cds_args(version_id, p["java"], classpath, major)
+        return p["java"], args + list(p["extra"])
+
+    def clear_cds(self, version_id=None):
+        try: names = os.listdir(self.cds_dir)
+        except OSError: return 0
+        removed = 0
+        for n in names:
+            if version_id is None or n.startswith(f"{version_id}-"):
+                try: os.remove(os.path.join(self.cds_dir, n)); removed += 1
+                except OSError: pass
+        return removed
@@ -0,0 +1,72 @@
+import os, threading
+from catmeta import read_json, write_json_atomic
+from catmetrics import incr
+
+PLAN_FORMAT = 2
+
+# --- Launch plans ---
+# A plan is everything build_launch_command derives from a version JSON:
+# resolved classpath, main class and the raw game argument template. It is
+# keyed by the JSON's mtime and size, so editing or re-downloading the JSON
+# drops the plan and the next launch goes through ensure_version again.
+
+def json_key(vjson):
+    try: st = os.stat(vjson)
+    except OSError: return None
+    return [st.st_mtime_ns, st.st_size]
+
+def build_plan(version_id, data, jar_path, libraries_dir):
+    """data: the version's catindex.VersionMeta."""
+    main_class = data.get("mainClass")
+    if not main_class: return None
+    classpath = [jar_path]
+    for path, *_ in data.artifacts():
+        lib_path = os.path.join(libraries_dir, path)
+        if os.path.exists(lib_path): classpath.append(lib_path)
+    return {"version": version_id, "main_class": main_class, "classpath": classpath,
+            "args": data.get("minecraftArguments", "").split(),
+            "asset_index": data.get("assetIndex", {}).get("id", ""), "java": data.get("javaVersion")}
+
+def render_command(plan, repl, java="java", jvm_args=("-Xmx2G",)):
+    final_args = []
+    for a in plan["args"]:
+        for k, v in repl.items():
+            if k in a: a = a.replace(k, v)
+        final_args.append(a)
+    return [java, *jvm_args, "-cp", os.pathsep.join(plan["classpath"]), plan["main_class"]] + final_args
+
+class LaunchPlanCache:
+    def __init__(self, cache_dir):
+        self.dir = cache_dir
+        self._mem = {}
+        self._lock = threading.Lock()
+
+    def _path(self, version_id):
+        return os.path.join(self.dir, f"{version_id}.json")
+
+    def get(self, version_id, vjson):
+        key = json_key(vjson)
+        if key is None:
+            incr("launch_plan.miss"); return None
+        with self._lock:
+            entry = self._mem.get(version_id)
+        if entry is None:
+            entry = read_json(self._path(version_id))
+        if not entry or entry.get("format") != PLAN_FORMAT or entry.get("key") != key:
+            incr("launch_plan.miss"); return None
+        with self._lock:
+            self._mem[version_id] = entry
+        incr("launch_plan.hit")
+        return entry["plan"]
+
+    def put(self, version_id, vjson, plan):
+        entry = {"format": PLAN_FORMAT, "key": json_key(vjson), "plan": plan}
+        with self._lock:
+            self._mem[version_id] = entry
+        write_json_atomic(self._path(version_id), entry)
+
+    def invalidate(self, version_id):
+        with self._lock:
+            self._mem.pop(version_id, None)
+        try: os.remove(self._path(version_id))
+        except OSError: pass
@@ -0,0 +1,80 @@
+import os, re, threading, logging, logging.handlers
+from collections import deque
+
+LOG_RING_LINES = 2000
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+
+CRASH_SIGNATURES = [re.compile(p) for p in (
+    r"---- Minecraft Crash Report ----",
+    r"Exception in thread \"main\"",
+    r"java\.lang\.OutOfMemoryError",
+    r"java\.lang\.UnsupportedClassVersionError",
+    r"A fatal error has been detected by the Java Runtime Environment",
+    r"Could not create the Java Virtual Machine",
+    r"Error: Could not find or load main class",
+    r"Incompatible mods? found",
+)]
+
+def find_crash(line):
+    for sig in CRASH_SIGNATURES:
+        if sig.search(line): return sig.pattern
+    return None
+
+# --- Game log pump ---
+# One reader thread per pipe keeps stdout/stderr drained for the lifetime of
+# the game so it never blocks on a full pipe. Lines land in a bounded ring
+# buffer for the UI and in a size-rotated log file on disk.
+
+class LogPump:
+    def __init__(self, process, log_dir, name="game", ring=LOG_RING_LINES,
+                 max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS, on_line=None, on_crash=None):
+        self.process = process
+        self.on_line, self.on_crash = on_line, on_crash
+        self.crash = None
+        self._ring = deque(maxlen=ring)
+        self._lock = threading.Lock()
+        self._threads = []
+        os.makedirs(log_dir, exist_ok=True)
+        self.path = os.path.join(log_dir, f"{name}.log")
+        self._handler = logging.handlers.RotatingFileHandler(
+            self.path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._logger = logging.getLogger(f"catclient.game.{id(self)}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(self._handler)
+
+    def start(self):
+        for stream, tag in ((self.process.stdout, ""), (self.process.stderr, "[stderr] ")):
+            if stream is None: continue
+            t = threading.Thread(target=self._pump, args=(stream, tag), daemon=True)
+            t.start(); self._threads.append(t)
+        threading.Thread(target=self._close_when_done, daemon=True).start()
+        return self
+
+    def _pump(self, stream, tag):
+        with stream:
+            for raw in iter(stream.readline, b""):
+                line = tag + raw.decode("utf-8", "replace").rstrip("\r\n")
+                with self._lock: self._ring.append(line)
+                self._logger.info(line)
+                if self.on_line: self.on_line(line)
+                if self.crash is None:
+                    sig = find_crash(line)
+                    if sig:
+                        self.crash = sig
+                        if self.on_crash: self.on_crash(sig, line)
+
+    def _close_when_done(self):
+        for t in self._threads: t.join()
+        self._logger.removeHandler(self._handler)
+        self._handler.close()
+
+    def lines(self, n=None):
+        with self._lock:
+            lines = list(self._ring)
+        return lines if n is None else lines[-n:]
+
+    def join(self, timeout=None):
+        for t in self._threads: t.join(timeout)
@@ -0,0 +1,73 @@
+import os, json, time, threading
+from catmetrics import incr
+
+VERSION_MANIFEST_URL = "https://piston-meta.mojang.com/mc/game/version_manifest_v2.json"
+
+def write_json_atomic(path, data, **kw):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f: json.dump(data, f, **kw)
+    os.replace(tmp, path)
+
+def read_json(path, default=None):
+    try:
+        with open(path) as f: return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+# --- Version manifest cache ---
+# The last good manifest is kept on disk together with its ETag/Last-Modified.
+# get() hands back the cached copy immediately and revalidates it with a
+# conditional request in the background; on_update fires only when it changed.
+
+class ManifestCache:
+    def __init__(self, cache_dir, url=VERSION_MANIFEST_URL, session=None):
+        self.url = url
+        self.path = os.path.join(cache_dir, "version_manifest_v2.json")
+        self.meta_path = self.path + ".meta"
+        self.session = session
+        self._lock = threading.Lock()
+
+    def load(self):
+        return read_json(self.path)
+
+    def revalidate(self):
+        with self._lock:
+            meta = read_json(self.meta_path, {})
+            cached = self.load() if meta else None
+            headers = {}
+            if cached is not None:
+                if meta.get("etag"): headers["If-None-Match"] = meta["etag"]
+                if meta.get("last_modified"): headers["If-Modified-Since"] = meta["last_modified"]
+            if self.session is None:
+                # Imported here so reading the cached manifest never pays for http.client/ssl
+                from cathttp import get_session
+                self.session = get_session()
+            resp = self.session.get(self.url, headers=headers)
+            if resp.status == 304 and cached is not None:
+                incr("manifest.not_modified")
+                meta["checked"] = time.time()
+                write_json_atomic(self.meta_path, meta)
+                return cached, False
+            manifest = resp.raise_for_status().json()
+            write_json_atomic(self.path, manifest)
+            write_json_atomic(self.meta_path, {"url": self.url, "etag": resp.headers.get("ETag"),
+                                               "last_modified": resp.headers.get("Last-Modified"),
+                                               "checked": time.time()})
+            return manifest, manifest != cached
+
+    def get(self, on_update=None, on_error=None, background=True):
+        cached = self.load()
+        if cached is None:
+            incr("manifest.cache_miss")
+            return self.revalidate()[0]
+        incr("manifest.cache_hit")
+        def worker():
+            try:
+                manifest, changed = self.revalidate()
+                if changed and on_update: on_update(manifest)
+            except Exception as e:
+                if on_error: on_error(e)
+        if background: threading.Thread(target=worker, daemon=True).start()
+        else: worker()
+        return cached
@@ -0,0 +1,128 @@
+import os, time, json, threading, contextvars
+from contextlib import contextmanager
+
+# --- Counters ---
+# Modules bump named counters (http.requests, download.bytes, launch_plan.hit,
+# ...) with incr(), without knowing about reports. Every count goes into the
+# process-wide totals and into the counter sets of the runs and phases active
+# in the current context: a RunMetrics phase binds its own set to a context
+# variable, so concurrent work (parallel installs, background refreshes and
+# probes) lands only in the run that did it. Threads start with an empty
+# context, so work handed to a pool is wrapped with in_context().
+
+_counters = {}
+_lock = threading.Lock()
+_scope = contextvars.ContextVar("catmetrics_scope", default=())
+
+def incr(name, n=1):
+    scope = _scope.get()
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+        for c in scope: c[name] = c.get(name, 0) + n
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+def in_context(fn):
+    """fn counting into the caller's runs and phases, from whichever thread calls it."""
+    scope = _scope.get()
+    def run(*args, **kwargs):
+        token = _scope.set(scope)
+        try: return fn(*args, **kwargs)
+        finally: _scope.reset(token)
+    return run
+
+# Pairs reported as hit ratios: name -> (hit counter, miss counter)
+RATIOS = {
+    "manifest_cache": ("manifest.cache_hit", "manifest.cache_miss"),
+    "launch_plan": ("launch_plan.hit", "launch_plan.miss"),
+    "fabric_meta": ("fabric_meta.cache_hit", "fabric_meta.cache_miss"),
+    "object_store": ("download.store_hits", "download.files"),
+    "assets_present": ("assets.present", "assets.missing"),
+    "http_connection_reuse": ("http.reused", "http.connections"),
+    "mods_up_to_date": ("mods.up_to_date", "mods.downloaded"),
+    "jvm_cds": ("jvm.cds_hit", "jvm.cds_miss"),
+    "auth_session": ("auth.cache_hit", "auth.cache_miss"),
+    "meta_cache": ("meta_cache.hit", "meta_cache.miss"),
+    "modrinth_cache": ("modrinth.cache_hit", "modrinth.cache_miss"),
+}
+
+class RunMetrics:
+    def __init__(self, launcher, action, version=None):
+        self.launcher, self.action, self.version = launcher, action, version
+        self.started = time.time()
+        self.phases = []
+        self._counters = {}
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        mine, t0 = {}, time.perf_counter()
+        scope = _scope.get()
+        # Nested phases of one run share its run-level set
+        run = () if any(c is self._counters for c in scope) else (self._counters,)
+        token = _scope.set(scope + run + (mine,))
+        try:
+            yield
+        finally:
+            _scope.reset(token)
+            with _lock: deltas = dict(mine)
+            self.record(name, time.perf_counter() - t0, deltas, start=t0 - self._t0)
+
+    def record(self, name, seconds, deltas=None, bytes=None, start=None):
+        deltas = deltas or {}
+        if bytes is None: bytes = deltas.get("download.bytes", 0)
+        entry = {"phase": name, "seconds": round(seconds, 4), "bytes": bytes,
+                 "bytes_per_sec": round(bytes / seconds) if seconds > 0 else 0}
+        # Offset from the start of the run, so phases can be laid out on a timeline
+        if start is not None: entry["start"] = round(start, 4)
+        if deltas: entry["counters"] = deltas
+        with self._lock: self.phases.append(entry)
+
+    def report(self):
+        with _lock: totals = dict(self._counters)
+        ratios = {}
+        for name, (hit, miss) in RATIOS.items():
+            h, m = totals.get(hit, 0), totals.get(miss, 0)
+            if h + m: ratios[name] = round(h / (h + m), 4)
+        seconds = time.perf_counter() - self._t0
+        return {"launcher": self.launcher, "action": self.action, "version": self.version,
+                "started": self.started, "seconds": round(seconds, 4),
+                "bytes": totals.get("download.bytes", 0),
+                "bytes_per_sec": round(totals.get("download.bytes", 0) / seconds) if seconds > 0 else 0,
+                "phases": list(self.phases), "counters": totals, "ratios": ratios}
+
+    def openmetrics(self, report=None):
+        r = report or self.report()
+        base = f'launcher="{r["launcher"]}",action="{r["action"]}",version="{r["version"] or ""}"'
+        lines = ["# TYPE catclient_run_seconds gauge", f"catclient_run_seconds{{{base}}} {r['seconds']}",
+                 "# TYPE catclient_phase_seconds gauge"]
+        lines += [f'catclient_phase_seconds{{{base},phase="{p["phase"]}"}} {p["seconds"]}' for p in r["phases"]]
+        lines.append("# TYPE catclient_phase_bytes gauge")
+        lines += [f'catclient_phase_bytes{{{base},phase="{p["phase"]}"}} {p["bytes"]}' for p in r["phases"]]
+        lines.append("# TYPE catclient_events counter")
+        lines += [f'catclient_events_total{{{base},name="{k}"}} {v}' for k, v in sorted(r["counters"].items())]
+        lines.append("# TYPE catclient_hit_ratio gauge")
+        lines += [f'catclient_hit_ratio{{{base},cache="{k}"}} {v}' for k, v in sorted(r["ratios"].items())]
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, report_dir):
+        """Write <stamp>-<launcher>-<action>[-<version>].json and latest.prom; returns the JSON path."""
+        r = self.report()
+        os.makedirs(report_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        name = f"{stamp}-{self.launcher}-{self.action}"
+        if self.version:
+            name += "-" + "".join(c if c.isalnum() or c in "._-" else "_" for c in self.version)
+        # Parallel runs (catcli install -j) can start within the same second
+        for n in range(1, 1000):
+            path = os.path.join(report_dir, f"{name}.json" if n == 1 else f"{name}-{n}.json")
+            try: f = open(path, "x")
+            except FileExistsError: continue
+            with f: json.dump(r, f, indent=2)
+            break
+        with open(os.path.join(report_dir, "latest.prom"), "w") as f: f.write(self.openmetrics(r))
+        return path
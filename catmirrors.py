@@ -0,0 +1,184 @@
+import os, time, random, threading, http.client
+from concurrent.futures import ThreadPoolExecutor
+from cathttp import get_session, RETRY_STATUSES
+from catmeta import read_json, write_json_atomic
+from catstore import default_base_dir
+from catmetrics import incr
+
+DEFAULT_MIRRORS = {
+    "meta": ["https://piston-meta.mojang.com/"],
+    "data": ["https://piston-data.mojang.com/"],
+    "resources": ["https://resources.download.minecraft.net/"],
+    "libraries": ["https://libraries.minecraft.net/"],
+    "modrinth": ["https://api.modrinth.com/v2"],
+    "fabric": ["https://meta.fabricmc.net/v2"],
+}
+PROBE_TIMEOUT = 5
+STALL_TIMEOUT = 15
+COOLDOWN = 30
+MAX_COOLDOWN = 300
+EWMA = 0.3
+# Nominal transfer used to turn latency + throughput into one expected cost
+SCORE_BYTES = 256 * 1024
+
+# --- Mirror registry ---
+# Each resource class has a list of equivalent base URLs. The first entry is
+# the canonical one that version JSONs and APIs hand out, and any URL under
+# it can be rewritten onto the other entries. mirrors.json in the base dir
+# replaces a class's list, e.g.
+#   {"resources": ["https://resources.download.minecraft.net/", "https://mirror.example/assets/"]}
+# Mirrors are ranked by smoothed latency plus the time a SCORE_BYTES transfer
+# would take at their measured throughput. Requests are spread over the healthy
+# ones, with better mirrors picked more often, and a mirror that errors or
+# stalls sits out an exponential cooldown. Everything with a known sha1 is
+# verified by download_file whichever mirror served it. Metadata (manifest,
+# Modrinth, Fabric) is not hashed, so only list mirrors you trust for those.
+
+class Mirror:
+    __slots__ = ("base", "latency", "throughput", "failures", "down_until")
+    def __init__(self, base, latency=None, throughput=None):
+        self.base, self.latency, self.throughput = base, latency, throughput
+        self.failures, self.down_until = 0, 0.0
+
+    def healthy(self, now): return self.down_until <= now
+
+    def score(self):
+        if self.latency is None: return 0.0        # untried mirrors get a chance first
+        return self.latency + (SCORE_BYTES / self.throughput if self.throughput else 0.0)
+
+class MirrorRegistry:
+    def __init__(self, config=None, state_path=None, session=None):
+        self.session, self.state_path = session, state_path
+        self._lock = threading.Lock()
+        classes = dict(DEFAULT_MIRRORS); classes.update(config or {})
+        state = read_json(state_path, {}) if state_path else {}
+        self.classes = {}
+        for cls, bases in classes.items():
+            self.classes[cls] = [Mirror(b, *state.get(b, (None, None))) for b in bases]
+
+    def _http(self): return self.session or get_session()
+
+    def _match(self, url):
+        for cls, mirrors in self.classes.items():
+            for m in mirrors:
+                if url.startswith(m.base): return cls, url[len(m.base):]
+        return None, None
+
+    def ranked(self, cls):
+        """Healthy mirrors of cls, the first picked at random weighted by score."""
+        now = time.monotonic()
+        with self._lock:
+            mirrors = self.classes.get(cls, [])
+            healthy = sorted((m for m in mirrors if m.healthy(now)), key=Mirror.score)
+            down = sorted((m for m in mirrors if not m.healthy(now)), key=lambda m: m.down_until)
+        if len(healthy) > 1:
+            weights = [1.0 / (m.score() + 0.01) for m in healthy]
+            first = random.choices(healthy, weights)[0]
+            healthy.remove(first); healthy.insert(0, first)
+        # Mirrors in cooldown stay as a last resort rather than failing outright
+        return healthy + down
+
+    def candidates(self, url):
+        """Return [(mirror or None, url)] to try in order for url."""
+        cls, rest = self._match(url)
+        if cls is None: return [(None, url)]
+        return [(m, m.base + rest) for m in self.ranked(cls)]
+
+    def report(self, mirror, latency=None, nbytes=0, seconds=0.0, ok=True):
+        if mirror is None: return
+        with self._lock:
+            if not ok:
+                mirror.failures += 1
+                mirror.down_until = time.monotonic() + min(MAX_COOLDOWN, COOLDOWN * 2 ** (mirror.failures - 1))
+                incr("mirrors.failures")
+                return
+            mirror.failures, mirror.down_until = 0, 0.0
+            if latency is not None:
+                mirror.latency = latency if mirror.latency is None else \
+                    (1 - EWMA) * mirror.latency + EWMA * latency
+            # Tiny bodies say more about latency than throughput
+            if nbytes >= 64 * 1024 and seconds > 0:
+                rate = nbytes / seconds
+                mirror.throughput = rate if mirror.throughput is None else \
+                    (1 - EWMA) * mirror.throughput + EWMA * rate
+
+    def request(self, method, url, **kw):
+        """session.request with failover across mirrors on errors and 5xx answers."""
+        tries = self.candidates(url)
+        retries = kw.pop("retries", None)
+        for i, (mirror, target) in enumerate(tries):
+            t0 = time.perf_counter()
+            last = i == len(tries) - 1
+            try:
+                # Only the last mirror gets the session's own retries
+                resp = self._http().request(method, target, retries=retries if last else 0, **kw)
+            except (OSError, http.client.HTTPException):
+                self.report(mirror, ok=False)
+                if last: raise
+                incr("mirrors.failover"); continue
+            if resp.status in RETRY_STATUSES and not last:
+                resp.close(); self.report(mirror, ok=False)
+                incr("mirrors.failover"); continue
+            self.report(mirror, latency=time.perf_counter() - t0)
+            return resp
+
+    def get(self, url, **kw): return self.request("GET", url, **kw)
+    def post(self, url, **kw): return self.request("POST", url, **kw)
+
+    def probe(self, classes=None, timeout=PROBE_TIMEOUT):
+        """Time a HEAD against each mirror in parallel; returns {base: seconds or None}.
+
+        By default only classes that actually have a choice of mirrors are probed.
+        """
+        mirrors = [m for cls, ms in self.classes.items()
+                   if (cls in classes if classes else len(ms) > 1) for m in ms]
+        def one(m):
+            t0 = time.perf_counter()
+            try:
+                resp = self._http().request("HEAD", m.base, timeout=timeout, retries=0)
+                resp.content
+            except (OSError, http.client.HTTPException):
+                self.report(m, ok=False); return None
+            if resp.status >= 500:
+                self.report(m, ok=False); return None
+            latency = time.perf_counter() - t0
+            self.report(m, latency=latency)
+            return latency
+        if not mirrors: return {}
+        with ThreadPoolExecutor(max_workers=min(16, len(mirrors))) as pool:
+            result = dict(zip((m.base for m in mirrors), pool.map(one, mirrors)))
+        self.save()
+        return result
+
+    def save(self):
+        if not self.state_path: return
+        with self._lock:
+            state = {m.base: [m.latency, m.throughput] for ms in self.classes.values() for m in ms
+                     if m.latency is not None}
+        write_json_atomic(self.state_path, state)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {cls: [{"base": m.base, "latency": m.latency, "throughput": m.throughput,
+                           "failures": m.failures, "healthy": m.healthy(now)} for m in ms]
+                    for cls, ms in self.classes.items()}
+
+_mirrors = None
+_mirrors_lock = threading.Lock()
+
+def load_mirrors(base_dir):
+    """Registry configured by <base_dir>/mirrors.json, with its state under cache/."""
+    return MirrorRegistry(read_json(os.path.join(base_dir, "mirrors.json")),
+                          os.path.join(base_dir, "cache", "mirrors_state.json"))
+
+def get_mirrors():
+    global _mirrors
+    with _mirrors_lock:
+        if _mirrors is None: _mirrors = load_mirrors(default_base_dir())
+        return _mirrors
+
+def set_mirrors(registry):
+    """Swap the shared registry (None restores the default on next use)."""
+    global _mirrors
+    with _mirrors_lock: _mirrors = registry
@@ -0,0 +1,216 @@
+import os, json, time, hashlib
+from concurrent.futures import ThreadPoolExecutor
+from catmirrors import get_mirrors
+from cathttp import HTTPError
+from catdl import Downloader, DownloadError, download_file, sha1_file
+from catmeta import read_json, write_json_atomic
+from catstore import default_base_dir
+from catmetrics import incr, in_context
+
+MODRINTH_API = "https://api.modrinth.com/v2"
+MODRINTH_TTL = 3600
+# A version document never changes once published
+MODRINTH_VERSION_TTL = 7 * 24 * 3600
+
+# --- Modrinth mod installer ---
+# Resolves a whole mod set, dependencies included, before anything is downloaded:
+#   1. GET  /projects?ids=[...]       slug -> project id, one request for all mods
+#   2. GET  /project/{id}/version     newest version for the game version and loader,
+#                                     or GET /version/{id} when a dependent pins one;
+#                                     one level of the dependency graph at a time, in parallel
+#   3. required dependencies of the picks are queued for the next level, incompatible
+#      ones are checked against the final set
+#   4. POST /version_files            which project the jars in mods/ that are not
+#                                     already the picked files belong to
+# Conflicts (a required dependency with no usable version, two pins on
+# different versions of one project, a pick that declares another pick
+# incompatible) stop the install before any download. Every response
+# is kept under cache/modrinth for MODRINTH_TTL, so re-resolving an unchanged
+# set costs no round-trips; a stale copy is used when Modrinth can't be reached.
+# Files are then streamed to disk concurrently and verified against their sha1.
+# A jar whose sha1 already matches the wanted file is never downloaded again.
+
+def primary_file(version):
+    files = version.get("files") or []
+    return next((f for f in files if f.get("primary")), files[0] if files else None)
+
+class ModrinthCache:
+    def __init__(self, cache_dir, ttl=MODRINTH_TTL):
+        self.dir, self.ttl = cache_dir, ttl
+
+    def get(self, key, fetch, ttl=None):
+        path = os.path.join(self.dir, hashlib.sha1(key.encode()).hexdigest() + ".json")
+        cached = read_json(path)
+        if cached and cached.get("key") == key and time.time() - cached["fetched"] < (ttl or self.ttl):
+            incr("modrinth.cache_hit")
+            return cached["data"]
+        incr("modrinth.cache_miss")
+        try:
+            data = fetch()
+        except Exception:
+            if not cached or cached.get("key") != key: raise
+            return cached["data"]
+        write_json_atomic(path, {"key": key, "fetched": time.time(), "data": data})
+        return data
+
+class ModInstaller:
+    def __init__(self, mods_dir, mc_version, loader="fabric", session=None,
+                 workers=8, status=None, api=None, cache_dir=None):
+        self.mods_dir, self.mc_version, self.loader = mods_dir, mc_version, loader
+        self.session, self.workers = session, workers
+        self.status = status or (lambda text: None)
+        self.api = api or MODRINTH_API
+        self.cache = ModrinthCache(cache_dir or os.path.join(default_base_dir(), "cache", "modrinth"))
+
+    def _http(self): return self.session or get_mirrors()
+
+    def _get(self, path, params=None, ttl=None):
+        key = f"GET {self.api}{path}?{json.dumps(params, sort_keys=True)}"
+        return self.cache.get(key, lambda: self._http().get(self.api + path, params=params)
+                              .raise_for_status().json(), ttl)
+
+    def _post(self, path, body):
+        key = f"POST {self.api}{path} {json.dumps(body, sort_keys=True)}"
+        return self.cache.get(key, lambda: self._http().post(self.api + path, json=body)
+                              .raise_for_status().json())
+
+    def local_jars(self):
+        if not os.path.isdir(self.mods_dir): return {}
+        return {sha1_file(os.path.join(self.mods_dir, n)): n
+                for n in os.listdir(self.mods_dir) if n.endswith(".jar")}
+
+    def compatible(self, version):
+        return self.mc_version in version.get("game_versions", []) and self.loader in version.get("loaders", [])
+
+    def latest_version(self, project_id):
+        versions = self._get(f"/project/{project_id}/version",
+                             {"game_versions": json.dumps([self.mc_version]),
+                              "loaders": json.dumps([self.loader])})
+        return next((v for v in versions if self.compatible(v)), None)
+
+    def version(self, version_id):
+        return self._get(f"/version/{version_id}", ttl=MODRINTH_VERSION_TTL)
+
+    def resolve(self, slugs, local=None):
+        """Resolve slugs and their required dependencies.
+
+        Returns {"chosen": {slug: version}, "replaces": {slug: local filename},
+        "missing": [...], "conflicts": [...], "dependencies": [slugs pulled in]}.
+        """
+        slugs = list(slugs)
+        projects = self._get("/projects", {"ids": json.dumps(sorted(slugs))})
+        names, roots = {}, []
+        for slug in slugs:
+            p = next((p for p in projects if slug in (p["id"], p["slug"])), None)
+            if p and p["id"] not in names:
+                names[p["id"]] = slug; roots.append(p["id"])
+        missing = [s for s in slugs if s not in names.values()]
+        chosen, pins, required_by, incompatible, problems = {}, {}, {}, [], []
+        def pick(pid):
+            try: return self.version(pins[pid]) if pid in pins else self.latest_version(pid)
+            except HTTPError as e:
+                if e.status == 404: return None
+                raise
+        frontier = roots
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while frontier:
+                queued = []
+                for pid, version in zip(frontier, pool.map(in_context(pick), frontier)):
+                    if version is None:
+                        problems.append(("missing", pid, None)); continue
+                    if pid in pins and not self.compatible(version):
+                        problems.append(("unsupported", pid, version))
+                    chosen[pid] = version
+                    for dep in version.get("dependencies") or []:
+                        kind, dep_pid, dep_vid = dep.get("dependency_type"), dep.get("project_id"), dep.get("version_id")
+                        if kind not in ("required", "incompatible"): continue
+                        if not dep_pid and dep_vid: dep_pid = self.version(dep_vid).get("project_id")
+                        if not dep_pid: continue
+                        if kind == "incompatible":
+                            incompatible.append((pid, dep_pid, dep_vid)); continue
+                        required_by.setdefault(dep_pid, []).append(pid)
+                        if dep_vid:
+                            current = chosen[dep_pid]["id"] if dep_pid in chosen else pins.get(dep_pid)
+                            if current and current != dep_vid:
+                                problems.append(("pins", dep_pid, (current, dep_vid))); continue
+                            pins[dep_pid] = dep_vid
+                        if dep_pid not in chosen and dep_pid not in frontier and dep_pid not in queued:
+                            queued.append(dep_pid)
+                frontier = queued
+
+        # Which project the other jars in mods/ belong to, so a new pick replaces them
+        local = self.local_jars() if local is None else local
+        picked = {(primary_file(v) or {}).get("hashes", {}).get("sha1") for v in chosen.values()}
+        unknown = sorted(h for h in local if h not in picked)
+        owners = {}
+        if unknown:
+            known = self._post("/version_files", {"hashes": unknown, "algorithm": "sha1"})
+            for h, version in known.items(): owners.setdefault(version["project_id"], local[h])
+
+        unnamed = sorted({*chosen, *required_by} - set(names))
+        if unnamed:
+            for p in self._get("/projects", {"ids": json.dumps(unnamed)}): names[p["id"]] = p["slug"]
+        name = lambda pid: names.get(pid, pid)
+        by = lambda pid: ", ".join(name(p) for p in required_by.get(pid, []))
+        conflicts = []
+        for kind, pid, info in problems:
+            if kind == "missing" and pid in required_by:
+                # The dependents would only crash at start-up without it
+                conflicts.append(f"{name(pid)} (required by {by(pid)}) has no version for "
+                                 f"{self.mc_version}/{self.loader}")
+            elif kind == "missing":
+                missing.append(name(pid))
+            elif kind == "unsupported":
+                conflicts.append(f"{name(pid)} {info.get('version_number')} (required by {by(pid)}) "
+                                 f"does not support {self.mc_version}/{self.loader}")
+            else:
+                conflicts.append(f"{name(pid)}: dependents require both versions {info[0]} and {info[1]}")
+        for pid, other, vid in incompatible:
+            if other in chosen and (not vid or chosen[other]["id"] == vid):
+                conflicts.append(f"{name(pid)} is incompatible with {name(other)}")
+        return {"chosen": {name(pid): v for pid, v in chosen.items()},
+                "replaces": {name(pid): f for pid, f in owners.items() if pid in chosen},
+                "missing": missing, "conflicts": conflicts,
+                "dependencies": [name(pid) for pid in chosen if pid not in roots]}
+
+    def install(self, slugs):
+        os.makedirs(self.mods_dir, exist_ok=True)
+        self.status(f"Resolving {len(slugs)} mods...")
+        local = self.local_jars()
+        res = self.resolve(slugs, local)
+        chosen, replaces = res["chosen"], res["replaces"]
+        result = {"downloaded": [], "up_to_date": [], "missing": res["missing"], "failed": [], "removed": [],
+                  "dependencies": res["dependencies"], "conflicts": res["conflicts"]}
+        if res["conflicts"]:
+            self.status(f"Mod conflicts, nothing installed: {'; '.join(res['conflicts'])}")
+            return result
+        dl = Downloader(download_file, workers=self.workers)
+        planned = {}
+        for slug, version in chosen.items():
+            f = primary_file(version)
+            if not f:
+                result["missing"].append(slug); continue
+            sha1 = f.get("hashes", {}).get("sha1")
+            if sha1 in local:
+                result["up_to_date"].append(slug); continue
+            dest = os.path.join(self.mods_dir, f["filename"])
+            dl.add(f["url"], dest, f.get("size"), sha1)
+            planned[dest] = slug
+        if planned:
+            self.status(f"Downloading {len(planned)} mods...")
+            try:
+                dl.run()
+            except DownloadError as e:
+                for job, _ in e.failures:
+                    result["failed"].append(planned.pop(job.dest))
+        incr("mods.up_to_date", len(result["up_to_date"]))
+        incr("mods.downloaded", len(planned))
+        for dest, slug in planned.items():
+            result["downloaded"].append(slug)
+            old = replaces.get(slug)
+            if old and old != os.path.basename(dest):
+                try:
+                    os.remove(os.path.join(self.mods_dir, old)); result["removed"].append(old)
+                except OSError:
+                    pass
+        return result
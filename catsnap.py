@@ -0,0 +1,241 @@
+import os, sys, json, time, zlib, struct, hashlib, argparse, threading
+from concurrent.futures import ThreadPoolExecutor
+from catstore import get_store, version_files
+from catmetrics import incr, in_context
+
+MAGIC = b"CATSNAP1"
+SNAP_FORMAT = 2
+CHUNK_TARGET = 8 * 1024 * 1024
+TRAILER = struct.Struct("<QQ8s")
+DEFAULT_EXTRAS = ("mods", "catclient_config.json")
+# Format 1 snapshots don't mark shared files; these are the trees they came from
+SHARED_PREFIXES = ("assets/", "libraries/", "versions/")
+
+# --- Instance snapshots ---
+# One file holding everything an installed instance needs, for provisioning
+# machines without touching the network:
+#   MAGIC | chunk 0 | chunk 1 | ... | manifest | trailer(manifest offset, length, MAGIC)
+# Files are packed back to back into chunks of about CHUNK_TARGET bytes. Each
+# chunk is zlib-compressed on its own, so an import inflates them on all cores.
+# The manifest is zlib-compressed JSON that lists every file:
+#   [path relative to the instance, sha1, size, chunk, offset within chunk, shared]
+# Import only inflates chunks that hold a missing file. Every file is checked
+# against its sha1 before it is renamed into place. Only shared files, the
+# ones whose sha1 comes from a version JSON (jars, libraries, assets), are
+# linked from or adopted into the object store. Extras such as mods/ and
+# catclient_config.json are rewritten in place by the launchers, so each
+# instance gets private copies of them.
+
+def maven_path(name):
+    """group:artifact:version[:classifier] -> libraries/ relative path (Fabric-style entries)."""
+    parts = name.split(":")
+    if len(parts) < 3: return None
+    group, artifact, version = parts[:3]
+    suffix = f"-{parts[3]}" if len(parts) > 3 else ""
+    return "/".join([*group.split("."), artifact, version, f"{artifact}-{version}{suffix}.jar"])
+
+def _version_chain(minecraft_dir, version_id):
+    seen = []
+    while version_id and version_id not in seen:
+        vjson = os.path.join(minecraft_dir, "versions", version_id, f"{version_id}.json")
+        try:
+            with open(vjson) as f: data = json.load(f)
+        except (OSError, ValueError):
+            break
+        seen.append(version_id)
+        yield version_id, data
+        version_id = data.get("inheritsFrom")
+
+def installed_versions(minecraft_dir):
+    root = os.path.join(minecraft_dir, "versions")
+    try: names = sorted(os.listdir(root))
+    except OSError: return []
+    return [n for n in names if os.path.exists(os.path.join(root, n, f"{n}.json"))]
+
+def instance_files(minecraft_dir, versions=None, extras=DEFAULT_EXTRAS, existing=True):
+    """Return {relative path: known sha1 or None} for the given versions plus extras.
+
+    With existing=False, referenced files that are not on disk (yet) are included too.
+    """
+    files = {}
+    def add(path, sha1=None):
+        rel = os.path.relpath(path, minecraft_dir).replace(os.sep, "/")
+        # A known sha1 wins over an earlier plain entry (the jar is listed before version_files)
+        if (not existing or os.path.isfile(path)) and not rel.startswith("../") and (sha1 or rel not in files):
+            files[rel] = sha1
+    for vid in versions or installed_versions(minecraft_dir):
+        for version_id, data in _version_chain(minecraft_dir, vid):
+            vdir = os.path.join(minecraft_dir, "versions", version_id)
+            add(os.path.join(vdir, f"{version_id}.json"))
+            add(os.path.join(vdir, f"{version_id}.jar"))
+            for sha1, size, path in version_files(data, minecraft_dir, version_id):
+                add(path, sha1)
+            for lib in data.get("libraries", []):
+                if "downloads" not in lib and lib.get("name"):
+                    rel = maven_path(lib["name"])
+                    if rel: add(os.path.join(minecraft_dir, "libraries", rel))
+    for extra in extras:
+        path = os.path.join(minecraft_dir, extra)
+        if os.path.isdir(path):
+            for dirpath, _, names in os.walk(path):
+                for n in sorted(names):
+                    if not n.endswith((".part", ".tmp")): add(os.path.join(dirpath, n))
+        else:
+            add(path)
+    return files
+
+# --- Export ---
+
+def _pack_chunk(minecraft_dir, paths, level):
+    buf, entries = bytearray(), []
+    for rel in paths:
+        with open(os.path.join(minecraft_dir, rel), "rb") as f: data = f.read()
+        entries.append([rel, hashlib.sha1(data).hexdigest(), len(data), len(buf)])
+        buf += data
+    return zlib.compress(bytes(buf), level), len(buf), entries
+
+def export_instance(minecraft_dir, out_path, versions=None, extras=DEFAULT_EXTRAS, level=6,
+                    workers=None, progress=None):
+    """Write a snapshot of minecraft_dir to out_path; returns the manifest."""
+    files = instance_files(minecraft_dir, versions, extras)
+    # Group by directory so related files share a chunk and compress together
+    plan, chunk, chunk_size = [], [], 0
+    for rel in sorted(files):
+        size = os.path.getsize(os.path.join(minecraft_dir, rel))
+        if chunk and chunk_size + size > CHUNK_TARGET:
+            plan.append(chunk); chunk, chunk_size = [], 0
+        chunk.append(rel); chunk_size += size
+    if chunk: plan.append(chunk)
+    manifest = {"format": SNAP_FORMAT, "created": time.time(),
+                "versions": versions or installed_versions(minecraft_dir), "chunks": [], "files": []}
+    workers = workers or os.cpu_count() or 4
+    tmp = f"{out_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+            out.write(MAGIC)
+            # Compress a window of chunks at a time to bound memory
+            for start in range(0, len(plan), workers * 2):
+                window = plan[start:start + workers * 2]
+                for i, (blob, raw, entries) in enumerate(
+                        pool.map(lambda p: _pack_chunk(minecraft_dir, p, level), window), start):
+                    for rel, sha1, size, offset in entries:
+                        known = files[rel]
+                        if known and known != sha1:
+                            raise ValueError(f"{rel}: sha1 {sha1} does not match its version JSON ({known})")
+                        manifest["files"].append([rel, sha1, size, i, offset, known is not None])
+                    manifest["chunks"].append([out.tell(), len(blob), raw])
+                    out.write(blob)
+                    if progress: progress(i + 1, len(plan))
+            offset = out.tell()
+            blob = zlib.compress(json.dumps(manifest).encode(), 9)
+            out.write(blob)
+            out.write(TRAILER.pack(offset, len(blob), MAGIC))
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp): os.remove(tmp)
+    return manifest
+
+# --- Import ---
+
+class SnapshotError(Exception):
+    pass
+
+def read_manifest(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC: raise SnapshotError(f"{path}: not a CatClient snapshot")
+        f.seek(-TRAILER.size, os.SEEK_END)
+        offset, length, magic = TRAILER.unpack(f.read(TRAILER.size))
+        if magic != MAGIC: raise SnapshotError(f"{path}: truncated snapshot")
+        f.seek(offset)
+        manifest = json.loads(zlib.decompress(f.read(length)))
+    if manifest.get("format") not in (1, SNAP_FORMAT):
+        raise SnapshotError(f"{path}: unsupported snapshot format {manifest.get('format')}")
+    return manifest
+
+def _safe_dest(minecraft_dir, rel):
+    dest = os.path.normpath(os.path.join(minecraft_dir, rel))
+    if os.path.isabs(rel) or os.path.commonpath([os.path.abspath(minecraft_dir), os.path.abspath(dest)]) \
+            != os.path.abspath(minecraft_dir):
+        raise SnapshotError(f"refusing to write outside the instance: {rel}")
+    return dest
+
+def _write_file(dest, data, sha1):
+    if hashlib.sha1(data).hexdigest() != sha1:
+        incr("snapshot.integrity_errors")
+        raise SnapshotError(f"{dest}: sha1 mismatch in snapshot")
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f: f.write(data)
+    os.replace(tmp, dest)
+
+def import_instance(snapshot, minecraft_dir, workers=None, verify=False, store=None, progress=None):
+    """Unpack snapshot into minecraft_dir; returns counts of what was written and skipped."""
+    manifest = read_manifest(snapshot)
+    store = get_store() if store is None else store
+    result = {"files": len(manifest["files"]), "written": 0, "linked": 0, "skipped": 0,
+              "chunks": 0, "bytes": 0}
+    lock = threading.Lock()
+    wanted = {}
+    for entry in manifest["files"]:
+        rel, sha1, size, chunk, offset = entry[:5]
+        shared = entry[5] if len(entry) > 5 else rel.startswith(SHARED_PREFIXES)
+        dest = _safe_dest(minecraft_dir, rel)
+        try: present = os.path.getsize(dest) == size
+        except OSError: present = False
+        if present and verify:
+            with open(dest, "rb") as f: present = hashlib.sha1(f.read()).hexdigest() == sha1
+        if present:
+            result["skipped"] += 1; continue
+        if shared and store and store.link_into(sha1, dest, size):
+            result["linked"] += 1; continue
+        wanted.setdefault(chunk, []).append((dest, sha1, size, offset, shared))
+
+    def unpack(chunk):
+        offset, length, raw = manifest["chunks"][chunk]
+        with open(snapshot, "rb") as f:
+            f.seek(offset); blob = f.read(length)
+        data = zlib.decompress(blob)
+        if len(data) != raw: raise SnapshotError(f"chunk {chunk}: expected {raw} bytes, got {len(data)}")
+        view = memoryview(data)
+        for dest, sha1, size, start, shared in wanted[chunk]:
+            _write_file(dest, view[start:start + size], sha1)
+            if shared and store: store.adopt(dest, sha1, verified=True)
+        with lock:
+            result["chunks"] += 1
+            result["written"] += len(wanted[chunk])
+            result["bytes"] += sum(w[2] for w in wanted[chunk])
+            if progress: progress(result["chunks"], len(wanted))
+
+    if wanted:
+        with ThreadPoolExecutor(max_workers=min(workers or os.cpu_count() or 4, len(wanted))) as pool:
+            list(pool.map(in_context(unpack), wanted))
+    incr("snapshot.files_written", result["written"]); incr("snapshot.files_skipped", result["skipped"])
+    return result
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export or import a CatClient instance snapshot")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ex = sub.add_parser("export", help="pack an installed instance into one file")
+    ex.add_argument("minecraft_dir"); ex.add_argument("out")
+    ex.add_argument("--version", action="append", dest="versions", help="only this version (repeatable)")
+    ex.add_argument("--extra", action="append", help="extra file or directory, relative to the instance")
+    ex.add_argument("--level", type=int, default=6, help="zlib level, 1 (fast) to 9 (small)")
+    im = sub.add_parser("import", help="unpack a snapshot into an instance directory")
+    im.add_argument("snapshot"); im.add_argument("minecraft_dir")
+    im.add_argument("--verify", action="store_true", help="hash files already present instead of trusting their size")
+    for p in (ex, im): p.add_argument("--workers", type=int)
+    a = ap.parse_args(argv)
+    t0 = time.perf_counter()
+    if a.cmd == "export":
+        manifest = export_instance(a.minecraft_dir, a.out, a.versions, tuple(a.extra or DEFAULT_EXTRAS),
+                                   a.level, a.workers)
+        print(f"Exported {len(manifest['files'])} files in {len(manifest['chunks'])} chunks "
+              f"to {a.out} ({os.path.getsize(a.out) // 1048576} MiB) in {time.perf_counter() - t0:.1f}s")
+    else:
+        r = import_instance(a.snapshot, a.minecraft_dir, a.workers, a.verify)
+        print(f"Imported {r['written']} files ({r['bytes'] // 1048576} MiB), linked {r['linked']}, "
+              f"skipped {r['skipped']} in {time.perf_counter() - t0:.1f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import os, platform, shutil, threading, hashlib
+
+FICLONE = 0x40049409
+
+def default_base_dir():
+    if platform.system() == "Windows":
+        appdata = os.environ.get('APPDATA', os.path.expanduser('~\\AppData\\Roaming'))
+        return os.path.join(appdata, '.catclient')
+    return os.path.join(os.path.expanduser('~'), '.catclient')
+
+def _reflink(src, dst):
+    import fcntl
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+def place(src, dst):
+    """Make dst a copy of src, preferring a hardlink, then a reflink, then a real copy."""
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        try:
+            os.link(src, tmp)
+        except OSError:
+            try: _reflink(src, tmp)
+            except (OSError, ImportError): shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp): os.remove(tmp)
+
+# --- Content-addressed object store ---
+# Jars, libraries and asset objects are kept once under store/objects/<xx>/<sha1>
+# and placed into each launcher's game tree with place(). Installing a version
+# that another launcher already fetched then only costs the links.
+
+class ObjectStore:
+    def __init__(self, root=None):
+        self.root = root or os.path.join(default_base_dir(), "store")
+        self.objects = os.path.join(self.root, "objects")
+
+    def path_for(self, sha1):
+        return os.path.join(self.objects, sha1[:2], sha1)
+
+    def has(self, sha1, size=None):
+        try: st = os.stat(self.path_for(sha1))
+        except OSError: return False
+        return size is None or st.st_size == size
+
+    def link_into(self, sha1, dest, size=None):
+        if not self.has(sha1, size): return False
+        try: same = os.path.samefile(self.path_for(sha1), dest)
+        except OSError: same = False
+        if not same: place(self.path_for(sha1), dest)
+        return True
+
+    def adopt(self, path, sha1=None, verified=False):
+        """Add an existing file to the store. Returns its sha1, or None on a hash mismatch."""
+        if not verified:
+            h = hashlib.sha1()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 16), b""): h.update(chunk)
+            if sha1 and h.hexdigest() != sha1: return None
+            sha1 = h.hexdigest()
+        if not self.has(sha1): place(path, self.path_for(sha1))
+        return sha1
+
+    def discard(self, sha1):
+        try: os.remove(self.path_for(sha1))
+        except OSError: pass
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None: _store = ObjectStore()
+        return _store
+
+def set_store(store):
+    """Swap the shared store (None disables sharing)."""
+    global _store
+    with _store_lock: _store = store or False
+
+# --- Version trees ---
+# Helpers for installers we don't control (minecraft_launcher_lib): seed a tree
+# from the store before they run so their own sha1 checks skip the download,
+# and adopt whatever they fetched afterwards.
+
+def version_files(data, minecraft_dir, version_id):
+    """Yield (sha1, size, path) for the client jar, libraries, asset index and objects."""
+    jar = data.get("downloads", {}).get("client")
+    if jar and jar.get("sha1"):
+        yield jar["sha1"], jar.get("size"), os.path.join(minecraft_dir, "versions", version_id, f"{version_id}.jar")
+    for lib in data.get("libraries", []):
+        dls = lib.get("downloads", {})
+        for art in [dls.get("artifact")] + list(dls.get("classifiers", {}).values()):
+            if art and art.get("sha1") and art.get("path"):
+                yield art["sha1"], art.get("size"), os.path.join(minecraft_dir, "libraries", art["path"])
+    idx = data.get("assetIndex")
+    if idx and idx.get("sha1"):
+        idx_path = os.path.join(minecraft_dir, "assets", "indexes", f"{idx['id']}.json")
+        yield idx["sha1"], idx.get("size"), idx_path
+        from catindex import get_meta_cache
+        objects = get_meta_cache().asset_index(idx_path)
+        for h, size in objects.hashes() if objects else ():
+            yield h, size, os.path.join(minecraft_dir, "assets", "objects", h[:2], h)
+
+def seed_tree(store, files):
+    placed = 0
+    for sha1, size, path in files:
+        if not os.path.exists(path) and store.link_into(sha1, path, size): placed += 1
+    return placed
+
+def adopt_tree(store, files):
+    adopted = 0
+    for sha1, size, path in files:
+        if not store.has(sha1, size) and os.path.exists(path) and \
+                (size is None or os.path.getsize(path) == size):
+            if store.adopt(path, sha1): adopted += 1
+    return adopted
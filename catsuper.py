@@ -0,0 +1,287 @@
+import os, re, sys, time, uuid, shutil, threading, subprocess
+from catlog import LogPump
+from catjvm import total_memory_mb, OS_RESERVE_MB
+from catstore import place
+from catmetrics import incr
+
+DEFAULT_STAGGER = 5.0
+SAMPLE_INTERVAL = 2.0
+CPU_HEADROOM = 0.8
+# Copied (not linked: the game rewrites them in place) from the shared tree into a new instance
+INSTANCE_TEMPLATE = ("options.txt", "servers.dat")
+USERNAME_RE = re.compile(r"^[A-Za-z0-9_]{3,16}$")
+CDS_DUMP_FLAGS = ("-XX:ArchiveClassesAtExit=", "-XX:+AutoCreateSharedArchive")
+
+# --- Multi-instance supervisor ---
+# Launches N clients of one version for load testing. Each gets its own game
+# directory under instances/<username>/ (saves, options, logs, mods hardlinked
+# from the shared tree) and a distinct offline username/UUID. versions/,
+# libraries/ and assets/ are shared read-only through the launch command.
+# Starts are staggered so the JVMs don't all load classes and build chunks at
+# once. A monitor thread samples CPU time and RSS of every live client without
+# psutil (/proc on Linux, ps on macOS, GetProcessTimes/GetProcessMemoryInfo on
+# Windows) and records exit codes. stats() turns the samples into an estimate
+# of how many clients the host can sustain.
+
+def offline_session(username):
+    return {"username": username, "uuid": str(uuid.uuid3(uuid.NAMESPACE_DNS, username)),
+            "token": "cat_offline", "type": "offline"}
+
+# --- Process sampling ---
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def _sample_proc(pids):
+    out = {}
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f: stat = f.read()
+        except OSError:
+            continue
+        fields = stat[stat.rindex(b")") + 2:].split()
+        out[pid] = ((int(fields[11]) + int(fields[12])) / _CLK_TCK, int(fields[21]) * _PAGE)
+    return out
+
+def _ps_seconds(text):
+    # [[dd-]hh:]mm:ss[.ss]
+    days, _, rest = text.rpartition("-")
+    seconds = 0.0
+    for part in rest.split(":"): seconds = seconds * 60 + float(part)
+    return seconds + int(days or 0) * 86400
+
+def _sample_ps(pids):
+    try:
+        ps = subprocess.run(["ps", "-o", "pid=,rss=,time=", "-p", ",".join(map(str, pids))],
+                            capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return {}
+    out = {}
+    for line in ps.stdout.splitlines():
+        parts = line.split()
+        if len(parts) == 3:
+            try: out[int(parts[0])] = (_ps_seconds(parts[2]), int(parts[1]) * 1024)
+            except ValueError: pass
+    return out
+
+def _sample_windows(pids):
+    import ctypes
+    from ctypes import wintypes
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + \
+                   [(n, ctypes.c_size_t) for n in ("PeakWorkingSetSize", "WorkingSetSize",
+                    "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                    "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+    kernel32, psapi = ctypes.windll.kernel32, ctypes.windll.psapi
+    out = {}
+    for pid in pids:
+        handle = kernel32.OpenProcess(0x1000, False, pid)   # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle: continue
+        try:
+            times = [wintypes.FILETIME() for _ in range(4)]
+            counters = PROCESS_MEMORY_COUNTERS(cb=ctypes.sizeof(PROCESS_MEMORY_COUNTERS))
+            if not kernel32.GetProcessTimes(handle, *map(ctypes.byref, times)): continue
+            if not psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb): continue
+            kernel, user = ((t.dwHighDateTime << 32 | t.dwLowDateTime) / 1e7 for t in times[2:])
+            out[pid] = (kernel + user, counters.WorkingSetSize)
+        finally:
+            kernel32.CloseHandle(handle)
+    return out
+
+def sample_processes(pids):
+    """Return {pid: (CPU seconds, RSS bytes)} for the pids that are still alive."""
+    if not pids: return {}
+    if sys.platform == "win32": return _sample_windows(pids)
+    if os.path.isdir("/proc/self"): return _sample_proc(pids)
+    return _sample_ps(pids)
+
+# --- Instances ---
+
+class Instance:
+    def __init__(self, index, username, game_dir):
+        self.index, self.username, self.game_dir = index, username, game_dir
+        self.process = self.log = None
+        self.started = self.ended = None
+        self.exit_code = None
+        self.stopped = False     # terminated by stop(), so a non-zero exit is not a failure
+        self.cpu_seconds = self.cpu_percent = 0.0
+        self.rss = self.peak_rss = 0
+        self.samples = 0
+        self._last = None
+
+    @property
+    def running(self): return self.process is not None and self.exit_code is None
+
+    def info(self):
+        return {"index": self.index, "username": self.username, "dir": self.game_dir,
+                "pid": self.process.pid if self.process else None, "running": self.running,
+                "exit_code": self.exit_code, "stopped": self.stopped, "crash": self.log.crash if self.log else None,
+                "uptime": round((self.ended or time.time()) - self.started, 1) if self.started else 0,
+                "cpu_percent": round(self.cpu_percent, 1), "cpu_seconds": round(self.cpu_seconds, 1),
+                "rss_mb": self.rss // 1048576, "peak_rss_mb": self.peak_rss // 1048576}
+
+class _InstanceJvm:
+    # Wraps a JvmTuner: a fixed heap per client, and only the first client may
+    # write the CDS archive (N JVMs dumping to one file at exit would race);
+    # the others map it once it exists
+    def __init__(self, jvm, heap_mb, first):
+        self.jvm, self.heap_mb, self.first = jvm, heap_mb, first
+
+    def jvm_args(self, version_id, loader=None, mods=0, classpath=None, java=None, java_major=None):
+        java, args = self.jvm.jvm_args(version_id, loader, mods, classpath, java, java_major)
+        if self.heap_mb:
+            args = [a for a in args if not a.startswith(("-Xms", "-Xmx"))]
+            args = [f"-Xms{min(self.heap_mb, 1024)}M", f"-Xmx{self.heap_mb}M", *args]
+        if not self.first:
+            args = [a for a in args if not a.startswith(CDS_DUMP_FLAGS)]
+        return java, args
+
+class Supervisor:
+    def __init__(self, installer, jvm=None, instances_dir=None, prefix="CatBot", stagger=DEFAULT_STAGGER,
+                 heap_mb=None, game_args=(), interval=SAMPLE_INTERVAL, on_exit=None):
+        self.installer, self.jvm = installer, jvm
+        self.instances_dir = instances_dir or os.path.join(installer.minecraft_dir, "instances")
+        self.prefix, self.stagger, self.heap_mb = prefix, stagger, heap_mb
+        self.game_args, self.interval, self.on_exit = list(game_args), interval, on_exit
+        self.instances = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sample_lock = threading.Lock()
+        self._monitor = None
+        self._capacity = None
+
+    def username(self, index, count):
+        name = f"{self.prefix}{index:0{len(str(max(count - 1, 0)))}d}"
+        if not USERNAME_RE.match(name): raise ValueError(f"invalid offline username {name!r} (3-16 of A-Z a-z 0-9 _)")
+        return name
+
+    def prepare(self, username):
+        """Create (or reuse) an instance directory seeded from the shared tree."""
+        game_dir = os.path.join(self.instances_dir, username)
+        os.makedirs(os.path.join(game_dir, "logs"), exist_ok=True)
+        shared = self.installer.minecraft_dir
+        for name in INSTANCE_TEMPLATE:
+            src, dst = os.path.join(shared, name), os.path.join(game_dir, name)
+            if os.path.isfile(src) and not os.path.exists(dst): shutil.copyfile(src, dst)
+        mods = os.path.join(shared, "mods")
+        if os.path.isdir(mods):
+            # Hardlinks where possible; a jar removed from the shared mods/ is not removed here
+            for n in os.listdir(mods):
+                dst = os.path.join(game_dir, "mods", n)
+                if n.endswith(".jar") and not os.path.exists(dst): place(os.path.join(mods, n), dst)
+        return game_dir
+
+    def launch(self, version_id, count, cancel=None, task=None):
+        """Start `count` clients, `stagger` seconds apart; returns the new instances."""
+        first = not self.instances
+        start = len(self.instances)
+        names = [self.username(i, start + count) for i in range(start, start + count)]
+        # Resolve/install once before anything is spawned
+        if not self.installer.get_launch_plan(version_id, task):
+            raise RuntimeError(f"No launch plan for {version_id}")
+        self._start_monitor()
+        launched = []
+        for n, username in enumerate(names):
+            if n and (cancel or self._stop).wait(self.stagger): break
+            if self._stop.is_set(): break
+            inst = Instance(start + n, username, self.prepare(username))
+            jvm = _InstanceJvm(self.jvm, self.heap_mb, first and n == 0) if self.jvm else None
+            command = self.installer.build_launch_command(version_id, offline_session(username),
+                                                          jvm=jvm, game_dir=inst.game_dir)
+            inst.process = subprocess.Popen(command + self.game_args, cwd=inst.game_dir,
+                                            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                            stderr=subprocess.PIPE)
+            inst.started = time.time()
+            inst.log = LogPump(inst.process, os.path.join(inst.game_dir, "logs", "catclient")).start()
+            incr("super.launched")
+            with self._lock: self.instances.append(inst)
+            launched.append(inst)
+        return launched
+
+    # --- Monitoring ---
+    def _start_monitor(self):
+        if self._monitor is None or not self._monitor.is_alive():
+            self._monitor = threading.Thread(target=self._run_monitor, daemon=True)
+            self._monitor.start()
+
+    def _run_monitor(self):
+        while True:
+            self.sample()
+            if self._stop.wait(self.interval) and not any(i.running for i in self.instances): return
+
+    def sample(self):
+        with self._sample_lock:
+            self._sample()
+
+    def _sample(self):
+        with self._lock: live = [i for i in self.instances if i.running]
+        now = time.monotonic()
+        samples = sample_processes([i.process.pid for i in live])
+        for inst in live:
+            s = samples.get(inst.process.pid)
+            if s:
+                cpu, inst.rss = s
+                if inst._last: inst.cpu_percent = 100 * (cpu - inst._last[0]) / max(now - inst._last[1], 1e-6)
+                inst._last, inst.cpu_seconds = (cpu, now), cpu
+                inst.samples += 1
+                inst.peak_rss = max(inst.peak_rss, inst.rss)
+            code = inst.process.poll()
+            if code is not None:
+                inst.exit_code, inst.ended, inst.cpu_percent, inst.rss = code, time.time(), 0.0, 0
+                incr("super.exited" if code == 0 or inst.stopped else "super.failed")
+                if self.on_exit: self.on_exit(inst)
+
+    def stats(self):
+        """Aggregate usage and an estimate of how many clients this host can sustain."""
+        with self._lock: instances = list(self.instances)
+        running = [i for i in instances if i.running]
+        # CPU% needs two samples
+        measured = [i for i in running if i.samples >= 2]
+        cpus = os.cpu_count() or 1
+        memory_mb = total_memory_mb() or 0
+        out = {"instances": len(instances), "running": len(running),
+               "exited": sum(1 for i in instances if i.exit_code == 0),
+               "stopped": sum(1 for i in instances if i.stopped and not i.running),
+               "failed": sum(1 for i in instances if i.exit_code not in (None, 0) and not i.stopped),
+               "cpu_percent": round(sum(i.cpu_percent for i in running), 1),
+               "rss_mb": sum(i.rss for i in running) // 1048576,
+               "host": {"cpus": cpus, "memory_mb": memory_mb}, "capacity": self._capacity,
+               "clients": [i.info() for i in instances]}
+        if measured:
+            # Per-client peak RSS against RAM minus the OS reserve, mean CPU against
+            # all cores minus some headroom; the tighter of the two wins
+            peak_mb = sum(i.peak_rss for i in measured) / len(measured) / 1048576
+            cpu = sum(i.cpu_percent for i in measured) / len(measured)
+            by_memory = int((memory_mb - OS_RESERVE_MB) // peak_mb) if memory_mb and peak_mb else None
+            by_cpu = int(cpus * 100 * CPU_HEADROOM // cpu) if cpu > 0 else None
+            out["capacity"] = {"per_client_peak_rss_mb": round(peak_mb), "per_client_cpu_percent": round(cpu, 1),
+                               "by_memory": by_memory, "by_cpu": by_cpu,
+                               "clients": min(c for c in (by_memory, by_cpu) if c is not None)
+                               if by_memory is not None or by_cpu is not None else None}
+            # Kept for the final report, after the clients are gone
+            self._capacity = out["capacity"]
+        return out
+
+    def wait(self, timeout=None):
+        """Block until every client has exited (True) or timeout passes (False)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while any(i.running for i in self.instances):
+            if deadline is not None and time.monotonic() >= deadline: return False
+            time.sleep(min(self.interval, 0.5))
+            if self._monitor is None or not self._monitor.is_alive(): self.sample()
+        return True
+
+    def stop(self, timeout=30):
+        """Stop launching, terminate every client, kill whatever outlives timeout."""
+        self._stop.set()
+        with self._lock: live = [i for i in self.instances if i.running]
+        for inst in live:
+            inst.stopped = True
+            try: inst.process.terminate()
+            except OSError: pass
+        deadline = time.monotonic() + timeout
+        for inst in live:
+            try: inst.process.wait(max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                inst.process.kill(); inst.process.wait()
+        self.sample()
@@ -0,0 +1,89 @@
+import queue, threading, itertools
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Background tasks for Tk front-ends ---
+# Work runs on a small thread pool; anything that has to touch widgets is put
+# on a queue that the Tk main loop drains every `poll_ms` via root.after.
+# Workers never call into Tk directly.
+
+class Cancelled(Exception):
+    pass
+
+class Task:
+    _ids = itertools.count(1)
+
+    def __init__(self, runner, on_progress=None, on_status=None):
+        self.id = next(self._ids)
+        self.cancelled = threading.Event()
+        self._runner, self._on_progress, self._on_status = runner, on_progress, on_status
+
+    def cancel(self): self.cancelled.set()
+
+    def check(self):
+        if self.cancelled.is_set(): raise Cancelled()
+
+    def progress(self, *args):
+        if self._on_progress: self._runner._post(("progress", self.id), self._on_progress, args)
+
+    def status(self, text):
+        if self._on_status: self._runner._post(("status", self.id), self._on_status, (text,))
+
+class TaskRunner:
+    def __init__(self, root, workers=4, poll_ms=50):
+        self.root, self.poll_ms = root, poll_ms
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._queue = queue.SimpleQueue()
+        self._tasks = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.root.after(self.poll_ms, self._drain)
+
+    # Progress and status events are coalesced per task: only the newest one
+    # of each kind is delivered on a drain, so a chatty worker can't flood Tk.
+    def _post(self, key, fn, args):
+        self._queue.put((key, fn, args))
+
+    def call(self, fn, *args):
+        """Run fn(*args) on the Tk thread."""
+        self._post(None, fn, args)
+
+    def _drain(self):
+        pending, slots = [], {}
+        while True:
+            try: key, fn, args = self._queue.get_nowait()
+            except queue.Empty: break
+            if key is not None and key in slots:
+                pending[slots[key]] = (fn, args); continue
+            if key is not None: slots[key] = len(pending)
+            pending.append((fn, args))
+        for fn, args in pending:
+            try: fn(*args)
+            except Exception as e: print(f"UI callback failed: {e}")
+        if not self._closed: self.root.after(self.poll_ms, self._drain)
+
+    def submit(self, fn, *args, on_done=None, on_error=None, on_progress=None,
+               on_status=None, on_finish=None):
+        """Run fn(task, *args) on a worker and report back on the Tk thread."""
+        task = Task(self, on_progress, on_status)
+        with self._lock: self._tasks.add(task)
+        def run():
+            try:
+                result = fn(task, *args)
+            except Exception as e:
+                if on_error and not isinstance(e, Cancelled): self.call(on_error, e)
+            else:
+                if on_done: self.call(on_done, result)
+            finally:
+                with self._lock: self._tasks.discard(task)
+                if on_finish: self.call(on_finish)
+        self._pool.submit(run)
+        return task
+
+    def cancel_all(self):
+        with self._lock: tasks = list(self._tasks)
+        for t in tasks: t.cancel()
+
+    def shutdown(self):
+        self._closed = True
+        self.cancel_all()
+        self._pool.shutdown(wait=False)
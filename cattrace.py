@@ -0,0 +1,213 @@
+import os, re, sys, json, math, time, getpass, hashlib, argparse, tempfile, threading
+from catmetrics import RunMetrics, incr
+
+TRACE_FORMAT = 1
+HISTORY_NAME = "launch_history.jsonl"
+HISTORY_MAX = 2000
+TRACE_TIMEOUT = 600
+READY_MILESTONE = "sound_engine"
+# Game log lines that mark how far start-up got
+MILESTONES = [(name, re.compile(p)) for name, p in (
+    ("game_init", r"Setting user: |Loading Minecraft "),
+    ("window", r"Backend library: LWJGL|LWJGL Version: "),
+    ("resource_reload", r"Reloading ResourceManager"),
+    ("sound_engine", r"Sound engine started|OpenAL initialized"),
+    ("atlas", r"Created: \d+x\d+x\d+ minecraft:textures/atlas/blocks"),
+)]
+
+# --- Launch tracing ---
+# A LaunchTrace is the RunMetrics of one launch, started at the PLAY click.
+# Phases recorded on it (auth, ensure_version's version_json/asset_check/
+# download, launch_command, spawn) keep their offset from the click. After the
+# spawn it adds milestones, also as seconds since the click:
+#   jvm_started     the JVM's hsperfdata file appeared (VM created, before main)
+#   first_log_line  first line on the game's stdout/stderr
+#   game_init ... sound_engine, atlas   from MILESTONES
+# The trace is appended to metrics/launch_history.jsonl under the CatClient
+# base dir once the game reaches READY_MILESTONE, exits or TRACE_TIMEOUT
+# passes. Every launcher writes to that one file, whatever its own game
+# directory, so one report compares them. report() groups the history by
+# version and launcher build and prints p50/p95 per stage.
+
+_build = None
+
+def history_path():
+    from catstore import default_base_dir
+    return os.path.join(default_base_dir(), "metrics", HISTORY_NAME)
+
+def launcher_build():
+    """Short git commit of this checkout, or a hash of the sources outside git."""
+    global _build
+    if _build: return _build
+    root = os.path.dirname(os.path.abspath(__file__))
+    git = os.path.join(root, ".git")
+    try:
+        with open(os.path.join(git, "HEAD")) as f: head = f.read().strip()
+        if head.startswith("ref: "):
+            ref = head[5:]
+            try:
+                with open(os.path.join(git, *ref.split("/"))) as f: head = f.read().strip()
+            except FileNotFoundError:
+                with open(os.path.join(git, "packed-refs")) as f:
+                    head = next(l.split()[0] for l in f if l.rstrip().endswith(" " + ref))
+        _build = head[:10]
+    except (OSError, StopIteration):
+        h = hashlib.sha1()
+        for name in sorted(os.listdir(root)):
+            if name.endswith(".py"):
+                with open(os.path.join(root, name), "rb") as f: h.update(f.read())
+        _build = "src-" + h.hexdigest()[:10]
+    return _build
+
+def _hsperfdata(pid):
+    # HotSpot creates this while the VM is being created (unless -XX:-UsePerfData)
+    tmp = "/tmp" if sys.platform.startswith("linux") else tempfile.gettempdir()
+    try: user = getpass.getuser()
+    except Exception: return None
+    return os.path.join(tmp, f"hsperfdata_{user}", str(pid))
+
+class LaunchTrace(RunMetrics):
+    def __init__(self, launcher, version=None, build=None):
+        super().__init__(launcher, "launch", version)
+        self.build = build or launcher_build()
+        self.milestones = {}
+        self.outcome = None
+        self._ready = threading.Event()
+
+    def elapsed(self): return round(time.perf_counter() - self._t0, 4)
+
+    def mark(self, name):
+        with self._lock:
+            if name in self.milestones: return
+            self.milestones[name] = self.elapsed()
+        if name == READY_MILESTONE: self._ready.set()
+
+    def on_line(self, line):
+        """LogPump on_line hook."""
+        if "first_log_line" not in self.milestones: self.mark("first_log_line")
+        for name, pattern in MILESTONES:
+            if name not in self.milestones and pattern.search(line): self.mark(name)
+
+    def report(self):
+        r = super().report()
+        with self._lock: milestones = dict(self.milestones)
+        r.update({"format": TRACE_FORMAT, "build": self.build, "milestones": milestones, "outcome": self.outcome})
+        return r
+
+    def watch(self, process, history=None, log=None, timeout=TRACE_TIMEOUT, on_done=None):
+        """Follow a spawned game until it is ready, exits or times out; then append the trace."""
+        def run():
+            perf = _hsperfdata(process.pid)
+            deadline = time.monotonic() + timeout
+            while perf and "jvm_started" not in self.milestones and "first_log_line" not in self.milestones:
+                if os.path.exists(perf): self.mark("jvm_started"); break
+                # A JVM hung before main still ends as a timeout
+                if process.poll() is not None or time.monotonic() >= deadline: break
+                time.sleep(0.01)
+            while not self._ready.wait(0.25):
+                if process.poll() is not None or time.monotonic() >= deadline: break
+            if self._ready.is_set(): self.outcome = "ready"
+            elif log is not None and log.crash: self.outcome = "crashed"
+            elif process.poll() is not None: self.outcome = f"exited {process.returncode}"
+            else: self.outcome = "timeout"
+            incr(f"trace.{self.outcome.split()[0]}")
+            append_history(history or history_path(), self.report())
+            if on_done: on_done(self)
+        threading.Thread(target=run, daemon=True).start()
+        return self
+
+# --- History ---
+
+def append_history(path, trace):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    keep = {k: v for k, v in trace.items() if k != "counters"}
+    with open(path, "a") as f: f.write(json.dumps(keep) + "\n")
+    # Trim now and then rather than on every launch
+    if os.path.getsize(path) > HISTORY_MAX * 4096:
+        lines = load_history(path)[-HISTORY_MAX:]
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f: f.writelines(json.dumps(t) + "\n" for t in lines)
+        os.replace(tmp, path)
+
+def load_history(path):
+    out = []
+    try:
+        with open(path) as f:
+            for line in f:
+                try: out.append(json.loads(line))
+                except ValueError: pass
+    except OSError:
+        pass
+    return out
+
+def stages(trace):
+    """{stage: seconds}: phase durations plus milestones (prefixed '@', seconds since the click)."""
+    out = {}
+    for p in trace.get("phases", []):
+        out[p["phase"]] = out.get(p["phase"], 0) + p["seconds"]
+    out.update({f"@{k}": v for k, v in trace.get("milestones", {}).items()})
+    return out
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p * len(ordered)) - 1)]
+
+def report(traces, by=("version", "build")):
+    """{group: {stage: {"n", "p50", "p95"}}} with groups keyed by the `by` fields."""
+    groups = {}
+    for t in traces:
+        key = " ".join(str(t.get(k)) for k in by)
+        for stage, seconds in stages(t).items():
+            groups.setdefault(key, {}).setdefault(stage, []).append(seconds)
+    return {key: {stage: {"n": len(v), "p50": round(percentile(v, 0.5), 3), "p95": round(percentile(v, 0.95), 3)}
+                  for stage, v in s.items()}
+            for key, s in groups.items()}
+
+def _stage_order(rep):
+    # Phases by name, then milestones in the order the game reaches them
+    first = {}
+    for g in rep.values():
+        for s, c in g.items():
+            first[s] = min(first.get(s, c["p50"]), c["p50"])
+    return sorted(first, key=lambda s: (s.startswith("@"), first[s] if s.startswith("@") else 0, s))
+
+def format_report(rep):
+    groups = list(rep)
+    stage_names = _stage_order(rep)
+    width = max([len(s) for s in stage_names] + [5])
+    lines = [" " * width + "".join(f"  {g[:24]:>24}" for g in groups),
+             " " * width + "".join(f"  {'p50 / p95 (n)':>24}" for _ in groups)]
+    for s in stage_names:
+        cells = []
+        for g in groups:
+            c = rep[g].get(s)
+            text = f"{c['p50']:.2f} / {c['p95']:.2f} ({c['n']})" if c else "-"
+            cells.append(f"  {text:>24}")
+        lines.append(f"{s:{width}}" + "".join(cells))
+    return "\n".join(lines)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="p50/p95 launch stage times from the launch history")
+    ap.add_argument("--history", default=history_path())
+    ap.add_argument("--by", choices=["version", "build", "both", "launcher"], default="both")
+    ap.add_argument("--launcher", help="only traces from this launcher (client, catclient21, ...)")
+    ap.add_argument("--version", help="only this game version")
+    ap.add_argument("--last", type=int, help="only the most recent N traces")
+    ap.add_argument("--ready-only", action="store_true", help="skip launches that crashed, exited or timed out")
+    ap.add_argument("--json", action="store_true")
+    a = ap.parse_args(argv)
+    traces = [t for t in load_history(a.history)
+              if (not a.launcher or t.get("launcher") == a.launcher)
+              and (not a.version or t.get("version") == a.version)
+              and (not a.ready_only or t.get("outcome") == "ready")]
+    if a.last: traces = traces[-a.last:]
+    if not traces:
+        print(f"No launch traces in {a.history}", file=sys.stderr); return 1
+    by = {"version": ("version",), "build": ("build",), "both": ("version", "build"),
+          "launcher": ("launcher", "version")}[a.by]
+    rep = report(traces, by)
+    print(json.dumps(rep, indent=2) if a.json else format_report(rep))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,79 +1,77 @@
-import os, sys, json, tkinter as tk
+import os, tkinter as tk
 import tkinter.ttk as ttk
 import tkinter.messagebox as messagebox
-import urllib.request, subprocess, platform, threading, uuid, requests, shutil
+import subprocess, uuid
+from catmirrors import get_mirrors
+from catmeta import ManifestCache
+from catinstall import (VersionInstaller, print_progress, RESOURCES_URL, DOWNLOAD_WORKERS,
+                        DOWNLOAD_PER_HOST, BACKGROUND_RATE)
+from cattasks import TaskRunner
+from catjvm import JvmTuner
+from catjava import RuntimeManager
+from catauth import AuthError, SessionStore
+from catstore import default_base_dir
+from catmetrics import RunMetrics
+from catlog import LogPump
+from cattrace import LaunchTrace
 
 # --- Constants ---
-USER_AGENT = "CatClient/1.5 (LunarCat)"
 VERSION_MANIFEST_URL = "https://piston-meta.mojang.com/mc/game/version_manifest_v2.json"
-ELYBY_AUTH_URL = "https://authserver.ely.by/auth/authenticate"
 
 # Directories
-if platform.system() == "Windows":
-    APPDATA = os.environ.get('APPDATA', os.path.expanduser('~\\AppData\\Roaming'))
-    BASE_DIR = os.path.join(APPDATA, '.catclient')
-else:
-    BASE_DIR = os.path.join(os.path.expanduser('~'), '.catclient')
+BASE_DIR = default_base_dir()
 
+CACHE_DIR = os.path.join(BASE_DIR, 'cache')
+METRICS_DIR = os.path.join(BASE_DIR, 'metrics')
 MINECRAFT_DIR = os.path.join(BASE_DIR, 'minecraft')
 VERSIONS_DIR = os.path.join(MINECRAFT_DIR, 'versions')
 LIBRARIES_DIR = os.path.join(MINECRAFT_DIR, 'libraries')
 ASSETS_DIR = os.path.join(MINECRAFT_DIR, 'assets')
-for d in [MINECRAFT_DIR, VERSIONS_DIR, LIBRARIES_DIR, ASSETS_DIR,
-          os.path.join(ASSETS_DIR, 'indexes'), os.path.join(ASSETS_DIR, 'objects')]:
-    os.makedirs(d, exist_ok=True)
 
 # --- Helpers ---
-def download_file(url, dest):
-    os.makedirs(os.path.dirname(dest), exist_ok=True)
-    if os.path.exists(dest): return
-    req = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
-    with urllib.request.urlopen(req) as resp, open(dest, "wb") as f:
-        f.write(resp.read())
-    print(f"Downloaded {dest}")
-
-def authenticate_elyby(username, password):
-    try:
-        payload = {"agent": {"name": "Minecraft", "version": 1},
-                   "username": username, "password": password}
-        resp = requests.post(ELYBY_AUTH_URL, json=payload, timeout=10)
-        if resp.status_code == 200:
-            data = resp.json()
-            profile = data.get("selectedProfile", {})
-            return {
-                "username": profile.get("name", username),
-                "uuid": profile.get("id"),
-                "token": data.get("accessToken"),
-                "type": "elyby"
-            }
-        else:
-            messagebox.showerror("Ely.by Error", resp.text)
-    except Exception as e:
-        messagebox.showerror("Ely.by Error", f"Auth failed: {e}")
-    return None
+def offline_session():
+    return {"username": "CatPlayer",
+            "uuid": str(uuid.uuid3(uuid.NAMESPACE_DNS, "CatPlayer")),
+            "token": "cat_offline",
+            "type": "offline"}
 
 # --- CatClient Lunar Edition ---
 class CatClientApp(tk.Tk):
     def __init__(self):
         super().__init__()
+        for d in [VERSIONS_DIR, LIBRARIES_DIR, os.path.join(ASSETS_DIR, 'indexes'),
+                  os.path.join(ASSETS_DIR, 'objects'), CACHE_DIR]:
+            os.makedirs(d, exist_ok=True)
         self.title("CatClient 1.5.x 🐾 (Lunar Cat)")
         self.geometry("900x550")
         self.configure(bg="#1b1b1b")
 
-        self.versions, self.version_categories = {}, {
+        self.version_categories = {
             "Latest Release": [], "Latest Snapshot": [],
             "Release": [], "Snapshot": [], "Old Beta": [], "Old Alpha": []
         }
 
         # Default offline session
-        self.session = {"username": "CatPlayer",
-                        "uuid": str(uuid.uuid3(uuid.NAMESPACE_DNS, "CatPlayer")),
-                        "token": "cat_offline",
-                        "type": "offline"}
+        self.session = offline_session()
 
+        self.installer = VersionInstaller(MINECRAFT_DIR, CACHE_DIR, RESOURCES_URL,
+                                          DOWNLOAD_WORKERS, DOWNLOAD_PER_HOST, defer_assets=True,
+                                          runtimes=RuntimeManager(os.path.join(BASE_DIR, 'runtimes'), CACHE_DIR))
+        self.jvm = JvmTuner(CACHE_DIR)
+        self.auth = SessionStore(os.path.join(BASE_DIR, 'auth.json'))
         self.online_mode = tk.BooleanVar(value=False)
+        self.tasks = TaskRunner(self)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         self.init_ui()
-        threading.Thread(target=self.load_version_manifest, daemon=True).start()
+        self.load_version_manifest()
+        if self.auth.last_username:
+            # Have the saved token checked (and refreshed) before Play is pressed
+            self.username_input.insert(0, self.auth.last_username)
+            self.tasks.submit(lambda task: self.auth.revalidate(self.auth.last_username))
+
+    def on_close(self):
+        self.tasks.shutdown()
+        self.destroy()
 
     # --- UI ---
     def init_ui(self):
@@ -106,12 +104,24 @@ class CatClientApp(tk.Tk):
         self.version_combo.pack(fill="x", padx=15, pady=3)
 
         # Buttons
-        tk.Button(sidebar, text="🐾 PLAY 🐾", font=("Consolas", 14, "bold"),
-                  bg="#3aa13a", fg="white", relief="flat",
-                  command=self.prepare_and_launch).pack(fill="x", padx=15, pady=(20,5))
-        tk.Button(sidebar, text="Play Mojang Offline", font=("Consolas", 10),
-                  bg="#505050", fg="white", relief="flat",
-                  command=self.run_offline_only).pack(fill="x", padx=15)
+        self.play_btn = tk.Button(sidebar, text="🐾 PLAY 🐾", font=("Consolas", 14, "bold"),
+                                  bg="#3aa13a", fg="white", relief="flat",
+                                  command=self.prepare_and_launch)
+        self.play_btn.pack(fill="x", padx=15, pady=(20,5))
+        self.offline_btn = tk.Button(sidebar, text="Play Mojang Offline", font=("Consolas", 10),
+                                     bg="#505050", fg="white", relief="flat",
+                                     command=self.run_offline_only)
+        self.offline_btn.pack(fill="x", padx=15)
+
+        # Progress
+        self.status_label = tk.Label(sidebar, text="Ready", bg="#242424", fg="#aaaaaa", anchor="w")
+        self.status_label.pack(fill="x", padx=15, pady=(20,0))
+        self.progress = ttk.Progressbar(sidebar, mode="determinate")
+        self.progress.pack(fill="x", padx=15, pady=3)
+        self.cancel_btn = tk.Button(sidebar, text="Cancel", font=("Consolas", 10),
+                                    bg="#505050", fg="white", relief="flat", state="disabled",
+                                    command=self.tasks.cancel_all)
+        self.cancel_btn.pack(fill="x", padx=15)
 
         # Right side news panel
         content = tk.Frame(self, bg="#1b1b1b")
@@ -125,31 +135,39 @@ class CatClientApp(tk.Tk):
 
     # --- Version manifest ---
     def load_version_manifest(self):
-        try:
-            req = urllib.request.Request(VERSION_MANIFEST_URL, headers={'User-Agent': USER_AGENT})
-            with urllib.request.urlopen(req) as url:
-                manifest = json.loads(url.read().decode())
-            self.versions = {v["id"]: v["url"] for v in manifest["versions"]}
-            for c in self.version_categories: self.version_categories[c] = []
-            latest_release, latest_snapshot = manifest["latest"]["release"], manifest["latest"]["snapshot"]
-            for v in manifest["versions"]:
-                if v["id"] == latest_release:
-                    self.version_categories["Latest Release"].append(v["id"])
-                elif v["id"] == latest_snapshot:
-                    self.version_categories["Latest Snapshot"].append(v["id"])
-                elif v["type"] == "release":
-                    self.version_categories["Release"].append(v["id"])
-                elif v["type"] == "snapshot":
-                    self.version_categories["Snapshot"].append(v["id"])
-                elif v["type"] == "old_beta":
-                    self.version_categories["Old Beta"].append(v["id"])
-                elif v["type"] == "old_alpha":
-                    self.version_categories["Old Alpha"].append(v["id"])
-            for c in ["Release","Snapshot","Old Beta","Old Alpha"]:
-                self.version_categories[c].sort(reverse=True)
-            self.update_version_list()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load versions: {e}")
+        cache = ManifestCache(CACHE_DIR, VERSION_MANIFEST_URL, session=get_mirrors())
+        # Rank configured mirrors while the manifest loads (no-op with the defaults)
+        self.tasks.submit(lambda task: get_mirrors().probe())
+        on_update = lambda manifest: self.tasks.call(self.apply_manifest, manifest)
+        def work(task):
+            metrics = RunMetrics("client", "startup")
+            with metrics.phase("manifest"):
+                manifest = cache.get(on_update=on_update)
+            metrics.write(METRICS_DIR)
+            return manifest
+        self.tasks.submit(work, on_done=self.apply_manifest,
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to load versions: {e}"))
+
+    def apply_manifest(self, manifest):
+        self.installer.set_manifest(manifest)
+        for c in self.version_categories: self.version_categories[c] = []
+        latest_release, latest_snapshot = manifest["latest"]["release"], manifest["latest"]["snapshot"]
+        for v in manifest["versions"]:
+            if v["id"] == latest_release:
+                self.version_categories["Latest Release"].append(v["id"])
+            elif v["id"] == latest_snapshot:
+                self.version_categories["Latest Snapshot"].append(v["id"])
+            elif v["type"] == "release":
+                self.version_categories["Release"].append(v["id"])
+            elif v["type"] == "snapshot":
+                self.version_categories["Snapshot"].append(v["id"])
+            elif v["type"] == "old_beta":
+                self.version_categories["Old Beta"].append(v["id"])
+            elif v["type"] == "old_alpha":
+                self.version_categories["Old Alpha"].append(v["id"])
+        for c in ["Release","Snapshot","Old Beta","Old Alpha"]:
+            self.version_categories[c].sort(reverse=True)
+        self.update_version_list()
 
     def update_version_list(self, event=None):
         cat = self.category_combo.get()
@@ -157,123 +175,96 @@ class CatClientApp(tk.Tk):
         self.version_combo['values'] = vs
         if vs: self.version_combo.current(0)
 
-    # --- Downloader ---
-    def ensure_version(self, version_id):
-        vdir = os.path.join(VERSIONS_DIR, version_id)
-        vjson = os.path.join(vdir, f"{version_id}.json")
-        os.makedirs(vdir, exist_ok=True)
-
-        # JSON
-        if not os.path.exists(vjson):
-            url = self.versions.get(version_id)
-            if url: download_file(url, vjson)
-        if not os.path.exists(vjson): return None
-
-        with open(vjson) as f: data = json.load(f)
-
-        # Client JAR
-        jar_info = data.get("downloads", {}).get("client")
-        jar_path = os.path.join(vdir, f"{version_id}.jar")
-        if jar_info and not os.path.exists(jar_path):
-            download_file(jar_info["url"], jar_path)
-
-        # Libraries
-        for lib in data.get("libraries", []):
-            art = lib.get("downloads", {}).get("artifact")
-            if art:
-                lib_path = os.path.join(LIBRARIES_DIR, art["path"])
-                if not os.path.exists(lib_path):
-                    download_file(art["url"], lib_path)
-
-        # Assets
-        asset_index = data.get("assetIndex", {})
-        if asset_index:
-            idx_path = os.path.join(ASSETS_DIR, "indexes", f"{asset_index['id']}.json")
-            if not os.path.exists(idx_path):
-                download_file(asset_index["url"], idx_path)
-            with open(idx_path) as f: idx = json.load(f)
-            for name, obj in idx.get("objects", {}).items():
-                h = obj["hash"]; sub = h[:2]
-                apath = os.path.join(ASSETS_DIR, "objects", sub, h)
-                if not os.path.exists(apath):
-                    url = f"https://resources.download.minecraft.net/{sub}/{h}"
-                    download_file(url, apath)
-
-        return vjson
-
-    # --- Launcher ---
-    def build_launch_command(self, version_id):
-        vjson = self.ensure_version(version_id)
-        if not vjson: return []
-        with open(vjson) as f: data = json.load(f)
-        main_class = data.get("mainClass")
-        if not main_class: return []
-        vdir = os.path.join(VERSIONS_DIR, version_id)
-        jar_path = os.path.join(vdir, f"{version_id}.jar")
-        classpath = [jar_path]
-        for lib in data.get("libraries", []):
-            art = lib.get("downloads", {}).get("artifact")
-            if art:
-                lib_path = os.path.join(LIBRARIES_DIR, art["path"])
-                if os.path.exists(lib_path): classpath.append(lib_path)
-        cmd = ["java", "-Xmx2G", "-cp", os.pathsep.join(classpath), main_class]
-
-        args = data.get("minecraftArguments","").split()
-        repl = {
-            "${auth_player_name}": self.session["username"],
-            "${auth_uuid}": self.session["uuid"],
-            "${auth_access_token}": self.session["token"],
-            "${version_name}": version_id,
-            "${game_directory}": MINECRAFT_DIR,
-            "${assets_root}": ASSETS_DIR,
-            "${assets_index_name}": data.get("assetIndex",{}).get("id",""),
-            "${user_type}": self.session.get("type","catclient"),
-            "${user_properties}": "{}"
-        }
-        final_args = []
-        for a in args:
-            for k,v in repl.items():
-                if k in a: a = a.replace(k,v)
-            final_args.append(a)
-        return cmd + final_args
+    # --- Downloader / launcher (see catinstall.VersionInstaller) ---
+    def ensure_version(self, version_id, progress=print_progress, verify=False, cancel=None,
+                       metrics=None, status=None):
+        return self.installer.ensure_version(version_id, progress, verify, cancel, metrics, status)
+
+    def build_launch_command(self, version_id, task=None, metrics=None):
+        return self.installer.build_launch_command(version_id, self.session, task, metrics, self.jvm)
 
     def prepare_and_launch(self):
         version = self.version_combo.get()
         if not version: return messagebox.showerror("Error","Pick a version")
-
+        credentials = None
         if self.online_mode.get():
-            u, p = self.username_input.get().strip(), self.password_input.get().strip()
-            s = authenticate_elyby(u,p)
-            if not s: return
-            self.session = s
-        else:
-            self.session = {"username": "CatPlayer",
-                            "uuid": str(uuid.uuid3(uuid.NAMESPACE_DNS, "CatPlayer")),
-                            "token": "cat_offline",
-                            "type": "offline"}
-
-        cmd = self.build_launch_command(version)
-        if not cmd: return
-        try:
-            subprocess.Popen(cmd, cwd=MINECRAFT_DIR)
-            messagebox.showinfo("Launch", f"Meowcraft {version} started as {self.session['username']}!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Launch failed: {e}")
+            credentials = (self.username_input.get().strip(), self.password_input.get().strip())
+        self.start_launch(version, credentials, "Launch", "Meowcraft {version} started as {username}!")
 
     def run_offline_only(self):
         version = self.version_combo.get()
         if not version: return messagebox.showerror("Error","Pick a version")
-        self.session = {"username": "CatPlayer",
-                        "uuid": str(uuid.uuid3(uuid.NAMESPACE_DNS, "CatPlayer")),
-                        "token": "cat_offline",
-                        "type": "offline"}
-        cmd = self.build_launch_command(version)
-        if not cmd: return
-        try:
-            subprocess.Popen(cmd, cwd=MINECRAFT_DIR)
-            messagebox.showinfo("Launch", f"Mojang Offline {version} launched!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Launch failed: {e}")
+        self.start_launch(version, None, "Launch", "Mojang Offline {version} launched!")
+
+    # --- Background launch ---
+    def start_launch(self, version, credentials, title, message):
+        # Started at the click so the trace covers everything the player waits for
+        metrics = LaunchTrace("client", version)
+
+        def work(task):
+            try:
+                with metrics.phase("auth"):
+                    if credentials:
+                        task.status("Logging in to Ely.by...")
+                        self.session = self.auth.session(
+                            *credentials,
+                            on_refresh=lambda s: self.tasks.call(self.on_auth_refreshed, s),
+                            on_invalid=lambda u: self.tasks.call(self.on_auth_invalid, u))
+                    else:
+                        self.session = offline_session()
+                task.status(f"Preparing {version}...")
+                with metrics.phase("launch_command"):
+                    cmd = self.build_launch_command(version, task, metrics)
+                if not cmd: raise RuntimeError(f"No launch command for {version}")
+                task.check()
+                with metrics.phase("spawn"):
+                    process = subprocess.Popen(cmd, cwd=MINECRAFT_DIR, stdout=subprocess.PIPE,
+                                               stderr=subprocess.PIPE)
+                log = LogPump(process, os.path.join(MINECRAFT_DIR, 'logs', 'catclient'),
+                              on_line=metrics.on_line).start()
+                metrics.watch(process, log=log)
+            finally:
+                metrics.write(METRICS_DIR)
+            if self.installer.deferred.get(version):
+                self.tasks.call(self.fetch_deferred, version)
+            return message.format(version=version, username=self.session["username"])
+
+        self.set_busy(True)
+        self.tasks.submit(work, on_done=lambda text: messagebox.showinfo(title, text),
+                          on_error=self.on_launch_error, on_progress=self.on_progress,
+                          on_status=lambda text: self.status_label.config(text=text),
+                          on_finish=lambda: self.set_busy(False))
+
+    def fetch_deferred(self, version):
+        # Music and records, while the game is already running
+        self.tasks.submit(lambda task: self.installer.fetch_deferred(
+                              version, BACKGROUND_RATE, cancel=task.cancelled),
+                          on_error=lambda e: self.status_label.config(
+                              text=f"Background asset download failed: {e}"))
+
+    def on_auth_refreshed(self, session):
+        self.session = session
+        self.status_label.config(text="Ely.by session refreshed; restart the game to join online servers")
+
+    def on_auth_invalid(self, username):
+        self.status_label.config(text=f"Ely.by session for {username} expired, enter the password to log in")
+
+    def set_busy(self, busy):
+        state = "disabled" if busy else "normal"
+        self.play_btn.config(state=state); self.offline_btn.config(state=state)
+        self.cancel_btn.config(state="normal" if busy else "disabled")
+        if not busy:
+            self.progress["value"] = 0
+            self.status_label.config(text="Ready")
+
+    def on_progress(self, done, total, bytes_done, bytes_total):
+        self.progress["maximum"] = max(total, 1)
+        self.progress["value"] = done
+        self.status_label.config(text=f"Downloading {done}/{total} ({bytes_done // 1048576} MiB)")
+
+    def on_launch_error(self, e):
+        if isinstance(e, AuthError): messagebox.showerror("Ely.by Error", str(e))
+        else: messagebox.showerror("Error", f"Launch failed: {e}")
 
 if __name__ == "__main__":
     app = CatClientApp()
@@ -5,7 +5,12 @@ import subprocess
 import os
 import json
 import uuid
-import threading
+from cattasks import TaskRunner
+from catmeta import ManifestCache
+from catmirrors import get_mirrors
+from catdl import seed_version, adopt_version
+from catstore import default_base_dir
+from catjvm import JvmTuner, count_mods
 
 class MinecraftCrackedClient:
     def __init__(self, root):
@@ -16,12 +21,16 @@ class MinecraftCrackedClient:
         
         # Minecraft directory
         self.minecraft_dir = minecraft_launcher_lib.utils.get_minecraft_directory()
+        self.manifest_cache = ManifestCache(os.path.join(default_base_dir(), "cache"),
+                                           session=get_mirrors())
+        self.jvm = JvmTuner(os.path.join(default_base_dir(), "cache"))
         
         # Setup variables
         self.versions = []
         self.selected_version = tk.StringVar()
         self.username = tk.StringVar(value="Player")
         self.setup_done = False
+        self.tasks = TaskRunner(self.root)
         
         self.setup_ui()
         self.check_setup()
@@ -92,92 +101,103 @@ class MinecraftCrackedClient:
         except Exception as e:
             self.status_label.config(text=f"Error loading versions: {str(e)}")
     
+    def set_status(self, text):
+        self.status_label.config(text=text)
+    
     def setup_minecraft(self):
-        threading.Thread(target=self._setup_minecraft_thread).start()
+        self.setup_btn.config(state=tk.DISABLED)
+        self.progress.start()
+        self.status_label.config(text="Setting up Minecraft...")
+        self.tasks.submit(self._setup_minecraft_thread,
+                          on_done=self._setup_done, on_error=self._setup_failed,
+                          on_status=self.set_status, on_finish=self._setup_finished)
     
-    def _setup_minecraft_thread(self):
-        try:
-            self.setup_btn.config(state=tk.DISABLED)
-            self.progress.start()
-            self.status_label.config(text="Setting up Minecraft...")
-            
-            # Create Minecraft directory if it doesn't exist
-            if not os.path.exists(self.minecraft_dir):
-                os.makedirs(self.minecraft_dir)
-            
-            # Get latest version
-            version_list = minecraft_launcher_lib.utils.get_version_list()
-            latest_version = None
-            
-            for version in version_list:
-                if version["type"] == "release":
-                    latest_version = version["id"]
-                    break
-            
-            if not latest_version:
-                raise Exception("No release version found")
-            
-            self.status_label.config(text=f"Downloading Minecraft {latest_version}...")
-            
-            # Install Minecraft
-            minecraft_launcher_lib.install.install_minecraft_version(
-                latest_version, self.minecraft_dir
-            )
-            
-            self.status_label.config(text="Download complete!")
-            self.load_versions()
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Setup failed: {str(e)}")
-            self.status_label.config(text=f"Setup failed: {str(e)}")
-        finally:
-            self.progress.stop()
-            self.setup_btn.config(state=tk.NORMAL)
+    def _setup_minecraft_thread(self, task):
+        # Create Minecraft directory if it doesn't exist
+        if not os.path.exists(self.minecraft_dir):
+            os.makedirs(self.minecraft_dir)
+        
+        # Get latest version
+        version_list = self.manifest_cache.get()["versions"]
+        latest = None
+        
+        for version in version_list:
+            if version["type"] == "release":
+                latest = version
+                break
+        
+        if not latest:
+            raise Exception("No release version found")
+        latest_version = latest["id"]
+        
+        task.status(f"Downloading Minecraft {latest_version}...")
+        
+        # Link anything another launcher already downloaded into this tree
+        seed_version(self.minecraft_dir, latest_version, latest["url"], latest.get("sha1"))
+        
+        # Install Minecraft
+        minecraft_launcher_lib.install.install_minecraft_version(
+            latest_version, self.minecraft_dir, callback={"setStatus": task.status}
+        )
+        adopt_version(self.minecraft_dir, latest_version)
+    
+    def _setup_done(self, result):
+        self.status_label.config(text="Download complete!")
+        self.load_versions()
+    
+    def _setup_failed(self, e):
+        messagebox.showerror("Error", f"Setup failed: {str(e)}")
+        self.status_label.config(text=f"Setup failed: {str(e)}")
+    
+    def _setup_finished(self):
+        self.progress.stop()
+        self.setup_btn.config(state=tk.NORMAL)
     
     def launch_minecraft(self):
         if not self.setup_done:
             messagebox.showerror("Error", "Please setup Minecraft first")
             return
         
-        threading.Thread(target=self._launch_minecraft_thread).start()
+        self.launch_btn.config(state=tk.DISABLED)
+        self.progress.start()
+        self.status_label.config(text="Launching Minecraft...")
+        self.tasks.submit(self._launch_minecraft_thread,
+                          self.selected_version.get(), self.username.get(),
+                          on_done=lambda result: self.status_label.config(text="Game started!"),
+                          on_error=self._launch_failed, on_status=self.set_status,
+                          on_finish=self._launch_finished)
     
-    def _launch_minecraft_thread(self):
-        try:
-            self.launch_btn.config(state=tk.DISABLED)
-            self.progress.start()
-            self.status_label.config(text="Launching Minecraft...")
-            
-            version = self.selected_version.get()
-            username = self.username.get()
-            
-            # Generate a persistent UUID for cracked mode :cite[1]
-            player_uuid = str(uuid.uuid5(uuid.NAMESPACE_OID, username))
-            
-            # Launch options
-            options = {
-                "username": username,
-                "uuid": player_uuid,
-                "token": ""
-            }
-            
-            # Get launch command
-            command = minecraft_launcher_lib.command.get_minecraft_command(
-                version, self.minecraft_dir, options
-            )
-            
-            self.status_label.config(text="Starting game...")
-            
-            # Launch game
-            subprocess.Popen(command)
-            
-            self.status_label.config(text="Game started!")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Launch failed: {str(e)}")
-            self.status_label.config(text=f"Launch failed: {str(e)}")
-        finally:
-            self.progress.stop()
-            self.launch_btn.config(state=tk.NORMAL)
+    def _launch_minecraft_thread(self, task, version, username):
+        # Generate a persistent UUID for cracked mode :cite[1]
+        player_uuid = str(uuid.uuid5(uuid.NAMESPACE_OID, username))
+        
+        # Launch options
+        options = {
+            "username": username,
+            "uuid": player_uuid,
+            "token": ""
+        }
+        java, options["jvmArguments"] = self.jvm.jvm_args(
+            version, mods=count_mods(os.path.join(self.minecraft_dir, "mods")))
+        if java: options["executablePath"] = java
+        
+        # Get launch command
+        command = minecraft_launcher_lib.command.get_minecraft_command(
+            version, self.minecraft_dir, options
+        )
+        
+        task.status("Starting game...")
+        
+        # Launch game
+        subprocess.Popen(command)
+    
+    def _launch_failed(self, e):
+        messagebox.showerror("Error", f"Launch failed: {str(e)}")
+        self.status_label.config(text=f"Launch failed: {str(e)}")
+    
+    def _launch_finished(self):
+        self.progress.stop()
+        self.launch_btn.config(state=tk.NORMAL)
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,46 @@
+import os, sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catbench import Fixture, BenchServer
+from catstore import ObjectStore, set_store
+from catmirrors import MirrorRegistry, set_mirrors
+from catindex import MetaCache, set_meta_cache
+
+@pytest.fixture(autouse=True)
+def base_dir(tmp_path, monkeypatch):
+    """Keep every shared cache out of the real ~/.catclient."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("APPDATA", str(tmp_path))
+    set_store(None)
+    set_mirrors(MirrorRegistry())
+    set_meta_cache(MetaCache(str(tmp_path / "cache" / "meta")))
+    yield tmp_path
+    set_store(None); set_mirrors(None); set_meta_cache(None)
+
+@pytest.fixture(scope="session")
+def server():
+    srv = BenchServer(Fixture(assets=40, libraries=4, library_size=16 * 1024,
+                              jar_size=128 * 1024, mods=3, mod_size=16 * 1024)).start()
+    yield srv
+    srv.stop()
+
+@pytest.fixture
+def installer(server, base_dir):
+    from catinstall import VersionInstaller
+    from catmeta import ManifestCache
+    def make(tree="minecraft", **kw):
+        cache = str(base_dir / "cache")
+        inst = VersionInstaller(str(base_dir / tree), cache, server.base + "/resources/", 8, 4,
+                                launcher="test", **kw)
+        inst.set_manifest(ManifestCache(cache, server.base + "/mojang/version_manifest_v2.json")
+                          .get(background=False))
+        return inst
+    return make
+
+@pytest.fixture
+def use_store(base_dir):
+    store = ObjectStore(str(base_dir / "store"))
+    set_store(store)
+    return store
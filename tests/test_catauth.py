@@ -0,0 +1,62 @@
+import json, threading, time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+from catauth import SessionStore, VALIDATE_INTERVAL
+
+class StubElyby(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    def log_message(self, *args): pass
+
+    def _reply(self, status, data=None):
+        body = json.dumps(data).encode() if data is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        srv = self.server
+        req = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with srv.lock:
+            if self.path.endswith("/validate"):
+                ok = req["accessToken"] == srv.token and srv.token != "expired"
+                return self._reply(204 if ok else 401)
+            if self.path.endswith("/refresh"):
+                srv.refreshes += 1
+                if req["accessToken"] != srv.token: return self._reply(401, {"error": "invalid"})
+                time.sleep(0.2)       # let a second caller catch up
+                srv.token = f"token{srv.refreshes}"
+                return self._reply(200, {"accessToken": srv.token, "clientToken": req["clientToken"],
+                                         "selectedProfile": {"name": "Cat", "id": "abc"}})
+        self._reply(404)
+
+@pytest.fixture
+def elyby():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), StubElyby)
+    srv.lock, srv.token, srv.refreshes = threading.Lock(), "token0", 0
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown(); srv.server_close()
+
+def test_concurrent_revalidation_refreshes_once(elyby, base_dir):
+    server = f"http://127.0.0.1:{elyby.server_port}/auth"
+    path = str(base_dir / "auth.json")
+    stale = {"username": "Cat", "uuid": "abc", "token": "expired", "client_token": "c", "type": "elyby"}
+    first = SessionStore(path, server)
+    first.put("Cat", stale)
+    with open(path) as f: data = json.load(f)
+    data["accounts"]["cat"]["validated"] -= VALIDATE_INTERVAL + 1
+    with open(path, "w") as f: json.dump(data, f)
+    elyby.token = "expired"
+
+    # The startup check and the Play button's worker, on separate stores over one file
+    stores = [SessionStore(path, server), SessionStore(path, server)]
+    results = [None, None]
+    def run(i): results[i] = stores[i].revalidate("Cat")
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(2)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    assert elyby.refreshes == 1
+    assert [r["token"] for r in results] == ["token1", "token1"]
+    assert SessionStore(path, server).get("Cat")["token"] == "token1"
@@ -0,0 +1,38 @@
+import os
+import pytest
+from catbench import BENCH_VERSION
+from catdl import sha1_file
+
+def _flip(path, at=1000):
+    with open(path, "r+b") as f:
+        f.seek(at); b = f.read(1); f.seek(at); f.write(bytes([b[0] ^ 0xFF]))
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_verify_repairs_same_size_corruption(request, installer, shared):
+    if shared: request.getfixturevalue("use_store")
+    inst = installer()
+    vjson = inst.ensure_version(BENCH_VERSION, progress=None)
+    _, _, jar = inst.version_paths(BENCH_VERSION)
+    good = sha1_file(jar)
+    lib = next(os.path.join(dp, n) for dp, _, ns in os.walk(inst.libraries_dir) for n in ns)
+    lib_good = sha1_file(lib)
+    _flip(jar); _flip(lib, 10)
+    assert sha1_file(jar) != good
+
+    installer().ensure_version(BENCH_VERSION, progress=None)
+    assert sha1_file(jar) != good          # a plain install trusts the size
+    assert installer().ensure_version(BENCH_VERSION, progress=None, verify=True) == vjson
+    assert sha1_file(jar) == good
+    assert sha1_file(lib) == lib_good
+
+def test_parallel_installs_into_one_tree(installer):
+    from concurrent.futures import ThreadPoolExecutor
+    insts = [installer(), installer()]
+    with ThreadPoolExecutor(2) as pool:
+        results = list(pool.map(lambda i: i.ensure_version(BENCH_VERSION, progress=None), insts))
+    assert results[0] == results[1] is not None
+    _, _, jar = insts[0].version_paths(BENCH_VERSION)
+    assert os.path.exists(jar)
+    leftovers = [n for dp, _, ns in os.walk(insts[0].minecraft_dir) for n in ns if n.endswith(".part")]
+    assert leftovers == []
+    assert installer().ensure_version(BENCH_VERSION, progress=None, verify=True) == results[0]
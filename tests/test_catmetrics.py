@@ -0,0 +1,30 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from catmetrics import RunMetrics, incr, in_context
+
+def test_overlapping_runs_count_only_their_own_work():
+    a, b = RunMetrics("test", "install", "A"), RunMetrics("test", "install", "B")
+    a_in, b_done = threading.Event(), threading.Event()
+
+    def run_b():
+        a_in.wait()
+        with b.phase("download"):
+            with ThreadPoolExecutor(4) as pool:
+                list(pool.map(in_context(lambda _: incr("download.bytes", 100)), range(5)))
+        b_done.set()
+
+    t = threading.Thread(target=run_b); t.start()
+    with a.phase("download"):
+        a_in.set()
+        incr("download.bytes", 7)
+        b_done.wait()
+        with a.phase("inner"): incr("download.files")
+    t.join()
+    incr("download.bytes", 1000)       # outside any run
+
+    ra, rb = a.report(), b.report()
+    assert ra["bytes"] == 7 and ra["counters"] == {"download.bytes": 7, "download.files": 1}
+    assert rb["bytes"] == 500 and rb["counters"] == {"download.bytes": 500}
+    phases = {p["phase"]: p for p in ra["phases"]}
+    assert phases["download"]["counters"] == {"download.bytes": 7, "download.files": 1}
+    assert phases["inner"]["counters"] == {"download.files": 1}
@@ -0,0 +1,29 @@
+import os, json
+from catbench import BENCH_VERSION
+from catdl import sha1_file
+from catsnap import export_instance, import_instance
+
+def test_import_links_game_files_and_copies_extras(installer, use_store, base_dir):
+    inst = installer()
+    inst.ensure_version(BENCH_VERSION, progress=None)
+    src = inst.minecraft_dir
+    os.makedirs(os.path.join(src, "mods"))
+    with open(os.path.join(src, "mods", "extra.jar"), "wb") as f: f.write(b"mod bytes")
+    with open(os.path.join(src, "catclient_config.json"), "w") as f: json.dump({"ram": 2}, f)
+    snap = str(base_dir / "instance.catsnap")
+    export_instance(src, snap)
+
+    dst = str(base_dir / "imported")
+    r = import_instance(snap, dst, store=use_store)
+    assert r["linked"] > 0
+    _, _, jar = inst.version_paths(BENCH_VERSION)
+    assert os.stat(os.path.join(dst, os.path.relpath(jar, src))).st_nlink > 1
+    config = os.path.join(dst, "catclient_config.json")
+    for path in (config, os.path.join(dst, "mods", "extra.jar")):
+        assert os.stat(path).st_nlink == 1
+        assert not use_store.has(sha1_file(path))
+
+    # What catclienthdrv0.save_config does
+    with open(config, "w") as f: json.dump({"ram": 4}, f)
+    for dirpath, _, names in os.walk(use_store.objects):
+        for n in names: assert sha1_file(os.path.join(dirpath, n)) == n
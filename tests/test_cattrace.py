@@ -0,0 +1,14 @@
+import sys, subprocess, threading
+from cattrace import LaunchTrace, load_history
+
+def test_silent_hung_process_times_out(base_dir):
+    history = str(base_dir / "history.jsonl")
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        trace, done = LaunchTrace("test", "1.0"), threading.Event()
+        trace.watch(process, history, timeout=0.5, on_done=lambda t: done.set())
+        assert done.wait(5)
+    finally:
+        process.kill(); process.wait()
+    assert trace.outcome == "timeout"
+    assert [t["outcome"] for t in load_history(history)] == ["timeout"]